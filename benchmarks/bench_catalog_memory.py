@@ -0,0 +1,76 @@
+"""
+Benchmark de memoria del catálogo: InMemoryProductRepository (un objeto
+Product por SKU) frente a ColumnarProductRepository (columnas tipadas).
+
+Uso:
+    python benchmarks/bench_catalog_memory.py --skus 1000000
+"""
+
+import argparse
+import gc
+import os
+import sys
+import time
+import tracemalloc
+
+# Agregar la carpeta "src" al PYTHONPATH (igual que en los tests)
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from core.models import Product
+from infra.columnar_repositories import ColumnarProductRepository
+from infra.memory_repositories import InMemoryProductRepository
+
+_LOCATIONS = [f"Pasillo {n} - Sección {n % 7}" for n in range(40)]
+
+
+def _products(count: int):
+    for n in range(count):
+        yield Product(
+            code=f"SKU{n:07}",
+            name=f"Producto de ferretería {n}",
+            price=1.0 + n % 500,
+            stock=n % 1000,
+            # Cada producto trae su propia copia del texto, como llegaría
+            # desde una BD o un archivo de importación.
+            location="".join(_LOCATIONS[n % len(_LOCATIONS)]),
+        )
+
+
+def _measure(factory, count: int):
+    gc.collect()
+    tracemalloc.start()
+    started = time.perf_counter()
+    repo = factory()
+    repo.save_many(_products(count))
+    elapsed = time.perf_counter() - started
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    started = time.perf_counter()
+    for n in range(0, count, max(1, count // 100000)):
+        repo.find_by_code(f"SKU{n:07}")
+    lookups = min(count, 100000)
+    lookup_us = (time.perf_counter() - started) / lookups * 1e6
+    return current, elapsed, lookup_us
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--skus", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    print(f"catálogo de {args.skus:,} SKUs")
+    for label, factory in (
+        ("InMemory (dict de Product)", InMemoryProductRepository),
+        ("Columnar (arreglos)", ColumnarProductRepository),
+    ):
+        current, elapsed, lookup_us = _measure(factory, args.skus)
+        print(
+            f"{label:<28} {current / 2**20:>8.1f} MiB  "
+            f"{current / args.skus:>6.0f} B/SKU  carga {elapsed:.1f}s  "
+            f"find_by_code {lookup_us:.2f} µs"
+        )
+
+
+if __name__ == "__main__":
+    main()
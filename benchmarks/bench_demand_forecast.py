@@ -0,0 +1,106 @@
+"""
+Benchmark del análisis de demanda (requiere NumPy): carga un año de
+líneas de venta sintéticas en la matriz producto x día y calcula
+demanda, días de cobertura y punto de pedido de todo el catálogo en
+una pasada vectorizada.
+
+Uso:
+    python benchmarks/bench_demand_forecast.py --skus 1000000 --days 365
+    python benchmarks/bench_demand_forecast.py --skus 100000 --lines-per-day 50000 --dtype float32
+"""
+
+import argparse
+import os
+import sys
+import time
+
+# Agregar la carpeta "src" al PYTHONPATH (igual que en los tests)
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import numpy as np
+
+from infra.demand_forecast import DailySales, DemandForecast, ReorderPolicy
+from infra.snapshots import SaleLineColumns
+
+_DAY = 86_400
+_START = 20_000 * _DAY
+# Días "tipo" que se repiten a lo largo del año (con su fecha correspondiente).
+_TEMPLATES = 7
+
+
+def _day_templates(codes, lines_per_day: int, rng):
+    """
+    Líneas de algunos días tipo, como las entrega una partición
+    compactada: los códigos del día en `texts` y cada línea como índice.
+    Un puñado de SKUs concentra gran parte de las ventas.
+    """
+    templates = []
+    popularity = rng.zipf(1.3, size=lines_per_day) % len(codes)
+    for _ in range(_TEMPLATES):
+        scattered = rng.integers(0, len(codes), size=lines_per_day) * (rng.random(lines_per_day) < 0.7)
+        rows = (popularity + scattered) % len(codes)
+        sold, line_codes = np.unique(rows, return_inverse=True)
+        sales = lines_per_day // 3
+        line_counts = np.full(sales, 3, dtype=np.uint32)
+        line_counts[-1] += lines_per_day - line_counts.sum()
+        templates.append((
+            [codes[row] for row in sold],
+            np.sort(rng.random(sales)) * _DAY,
+            line_counts,
+            line_codes.astype(np.uint32),
+            rng.integers(1, 4, size=lines_per_day),
+        ))
+    return templates
+
+
+def _chunks(templates, days: int):
+    for day in range(days):
+        texts, offsets, line_counts, line_codes, quantities = templates[day % len(templates)]
+        yield SaleLineColumns(
+            texts=texts,
+            timestamps=_START + day * _DAY + offsets,
+            line_counts=line_counts,
+            line_codes=line_codes,
+            quantities=quantities,
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--skus", type=int, default=1_000_000)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--lines-per-day", type=int, default=50_000)
+    parser.add_argument("--dtype", default="float32", help="tipo de la matriz (float32, uint16, ...)")
+    parser.add_argument("--window", type=int, default=28)
+    parser.add_argument("--seed", type=int, default=3)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    codes = [f"SKU{n:07}" for n in range(args.skus)]
+    templates = _day_templates(codes, args.lines_per_day, rng)
+    stock = rng.integers(0, 200, size=args.skus)
+
+    started = time.perf_counter()
+    daily = DailySales.from_line_columns(_chunks(templates, args.days), codes, _START, args.days, dtype=args.dtype)
+    load_s = time.perf_counter() - started
+
+    started = time.perf_counter()
+    forecast = DemandForecast(daily, stock, ReorderPolicy(window_days=args.window))
+    low = forecast.low_stock()
+    forecast_s = time.perf_counter() - started
+
+    lines = args.days * args.lines_per_day
+    print(f"{args.skus:,} SKUs x {args.days} días, {lines:,} líneas de venta")
+    print(f"matriz {daily.units.shape} {daily.units.dtype}: {daily.units.nbytes / 2**20:,.0f} MiB")
+    print(f"carga de líneas: {load_s:.2f} s ({lines / load_s / 1e6:.1f} M líneas/s)")
+    print(f"demanda + punto de pedido + reporte: {forecast_s:.2f} s")
+    print(f"SKUs para reponer: {len(low):,}")
+    for item in low[:5]:
+        print(
+            f"  {item.code}: stock {item.stock}, {item.daily_demand:.1f}/día, "
+            f"{item.days_of_cover:.1f} días de cobertura, pedir {item.order_quantity}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""
+Prueba de carga por loopback del servidor de inventario: varias cajas
+(hilos con su propio InventoryClient) venden contra un InventoryServer
+en otro proceso en tres modos: una venta por ida y vuelta, varias
+ventas en vuelo por caja (pipelining) y ventas enviadas en lotes por
+trama (el servidor confirma cada lote con confirm_sales). Al final
+verifica que el stock del servidor cuadre con las ventas confirmadas.
+
+Uso:
+    python benchmarks/bench_inventory_server.py --terminals 8 --seconds 3
+    python benchmarks/bench_inventory_server.py --unix /tmp/sigi-inventario.sock --window 32
+"""
+
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+from collections import deque
+
+# Agregar la carpeta "src" al PYTHONPATH (igual que en los tests)
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from core.errors import DomainError
+from core.models import Cart, Product
+from infra.inventory_server import InventoryServerProcess
+from infra.remote_repositories import InventoryClient, RemoteProductRepository, RemoteSaleRepository, RemoteSaleService
+
+_INITIAL_STOCK = 10**9
+
+
+def _cart(rng: random.Random, catalog: int, lines: int) -> Cart:
+    cart = Cart()
+    for n in rng.sample(range(catalog), lines):
+        cart.add_item(f"SKU{n:06}", rng.randint(1, 3))
+    return cart
+
+
+def _run_terminal(
+    address, seconds: float, window: int, batched: bool, catalog: int, lines: int, seed: int, totals: list
+) -> None:
+    rng = random.Random(seed)
+    sold = units = errors = 0
+    with InventoryClient(address, connections=1) as client:
+        terminal = RemoteSaleService(client)
+        in_flight: deque = deque()
+        deadline = time.perf_counter() + seconds
+        while time.perf_counter() < deadline or in_flight:
+            if batched and not in_flight and time.perf_counter() < deadline:
+                carts = [_cart(rng, catalog, lines) for _ in range(window)]
+                for future, cart in zip(terminal.submit_sales(carts), carts):
+                    in_flight.append((future, sum(i.quantity for i in cart.get_items())))
+            while not batched and time.perf_counter() < deadline and len(in_flight) < window:
+                cart = _cart(rng, catalog, lines)
+                in_flight.append((terminal.submit_sale(cart), sum(i.quantity for i in cart.get_items())))
+            if not in_flight:
+                break
+            future, quantity = in_flight.popleft()
+            try:
+                future.result(30)
+                sold += 1
+                units += quantity
+            except DomainError:
+                errors += 1
+    totals.append((sold, units, errors))
+
+
+def _load(address, terminals: int, seconds: float, window: int, batched: bool, catalog: int, lines: int, seed: int):
+    totals: list = []
+    threads = [
+        threading.Thread(
+            target=_run_terminal,
+            args=(address, seconds, window, batched, catalog, lines, seed + n, totals),
+        )
+        for n in range(terminals)
+    ]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    sold = sum(t[0] for t in totals)
+    units = sum(t[1] for t in totals)
+    errors = sum(t[2] for t in totals)
+    return sold, units, errors, elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--terminals", type=int, default=8, help="cajas concurrentes")
+    parser.add_argument("--seconds", type=float, default=3.0, help="duración de cada modo")
+    parser.add_argument("--window", type=int, default=16, help="ventas en vuelo (o por lote) por caja")
+    parser.add_argument("--catalog", type=int, default=2000, help="SKUs del catálogo")
+    parser.add_argument("--lines", type=int, default=3, help="líneas por carrito")
+    parser.add_argument("--unix", default=None, help="ruta de socket Unix (por defecto, TCP 127.0.0.1)")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    products = [
+        Product(f"SKU{n:06}", f"Producto {n}", 1.0 + n % 100, _INITIAL_STOCK, f"Pasillo {n % 20}")
+        for n in range(args.catalog)
+    ]
+    address = args.unix or ("127.0.0.1", 0)
+    with InventoryServerProcess(address, products=products) as server:
+        print(f"servidor en {server.address}, {args.terminals} cajas, {args.catalog:,} SKUs")
+        sold_total = units_total = 0
+        modes = (
+            ("una venta por ida y vuelta", 1, False),
+            (f"{args.window} ventas en vuelo", args.window, False),
+            (f"lotes de {args.window} por trama", args.window, True),
+        )
+        for label, window, batched in modes:
+            sold, units, errors, elapsed = _load(
+                server.address, args.terminals, args.seconds, window, batched, args.catalog, args.lines, args.seed
+            )
+            sold_total += sold
+            units_total += units
+            print(f"{label:<28} {sold / elapsed:>9,.0f} ventas/s  ({sold:,} ventas, {errors} rechazos)")
+
+        with InventoryClient(server.address) as client:
+            remaining = sum(p.stock for p in RemoteProductRepository(client).iter_products(batch_size=1000))
+            recorded = len(RemoteSaleRepository(client).list_sales())
+        expected = _INITIAL_STOCK * len(products) - units_total
+        print(f"stock del servidor cuadra con las ventas: {remaining == expected}")
+        print(f"ventas registradas en el servidor: {recorded:,} de {sold_total:,}")
+
+
+if __name__ == "__main__":
+    main()
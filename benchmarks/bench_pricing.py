@@ -0,0 +1,118 @@
+"""
+Benchmark del motor de precios: valorizar carritos con miles de reglas
+activas usando los índices compilados de PricingEngine, frente a
+evaluar todas las reglas en cada línea.
+
+Uso:
+    python benchmarks/bench_pricing.py --rules 5000 --lines 10 --carts 2000
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+# Agregar la carpeta "src" al PYTHONPATH (igual que en los tests)
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from core.models import Product
+from core.pricing import BundleDiscount, PercentOff, PricingEngine, VolumeDiscount
+
+_CATALOG = 20_000
+_LOCATIONS = [f"Pasillo {n}" for n in range(30)]
+
+
+def _product(n: int) -> Product:
+    return Product(f"SKU{n:07}", f"Producto {n}", 1.0 + n % 500, 10**9, _LOCATIONS[n % len(_LOCATIONS)])
+
+
+def _rules(count: int, rng: random.Random):
+    rules = [PercentOff("tienda", percent=2)]
+    rules += [PercentOff(f"seccion-{n}", percent=5, location=location) for n, location in enumerate(_LOCATIONS)]
+    for n in range(count - len(rules)):
+        kind = n % 4
+        code = f"SKU{rng.randrange(_CATALOG):07}"
+        if kind == 0:
+            first, second = rng.sample(range(_CATALOG), 2)
+            rules.append(BundleDiscount(
+                f"combo-{n}", (f"SKU{first:07}", f"SKU{second:07}"), percent=rng.choice((10, 15))
+            ))
+        elif kind == 1:
+            rules.append(PercentOff(f"oferta-{n}", percent=rng.choice((5, 10, 20)), product_code=code))
+        else:
+            rules.append(VolumeDiscount(
+                f"volumen-{n}", min_quantity=rng.choice((5, 10, 50)), percent=rng.choice((5, 10, 15)),
+                product_code=code,
+            ))
+    return rules
+
+
+def _naive_discounts(rules, lines):
+    """
+    Referencia: recorre todas las reglas en cada línea.
+    """
+    quantities = {}
+    for product, quantity in lines:
+        quantities[product.code] = quantities.get(product.code, 0) + quantity
+    result = []
+    for product, quantity in lines:
+        best = 0.0
+        for rule in rules:
+            if isinstance(rule, BundleDiscount):
+                if product.code in rule.product_codes:
+                    sets = min(quantities.get(code, 0) for code in rule.product_codes)
+                    best = max(best, product.price * min(sets, quantity) * rule.percent / 100)
+                continue
+            if rule.product_code not in (None, product.code) or rule.location not in (None, product.location):
+                continue
+            if isinstance(rule, VolumeDiscount) and quantities[product.code] < rule.min_quantity:
+                continue
+            best = max(best, product.price * quantity * rule.percent / 100)
+        result.append(round(best, 2) if best else None)
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rules", type=int, default=5000)
+    parser.add_argument("--lines", type=int, default=10)
+    parser.add_argument("--carts", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    rules = _rules(args.rules, rng)
+    carts = [
+        [(_product(rng.randrange(_CATALOG)), rng.choice((1, 2, 10, 60))) for _ in range(args.lines)]
+        for _ in range(args.carts)
+    ]
+
+    started = time.perf_counter()
+    engine = PricingEngine(rules)
+    compile_ms = (time.perf_counter() - started) * 1000
+
+    started = time.perf_counter()
+    compiled = [engine.discounts(lines) for lines in carts]
+    engine_us = (time.perf_counter() - started) / len(carts) * 1e6
+
+    sample = carts[: max(1, min(len(carts), 200))]
+    started = time.perf_counter()
+    naive = [_naive_discounts(rules, lines) for lines in sample]
+    naive_us = (time.perf_counter() - started) / len(sample) * 1e6
+
+    mismatches = sum(
+        1
+        for got, expected in zip(compiled, naive)
+        for line, amount in zip(got, expected)
+        if (line.amount if line else None) != amount
+    )
+    print(f"{engine.rule_count:,} reglas activas, carritos de {args.lines} líneas")
+    print(f"compilación: {compile_ms:.1f} ms")
+    print(f"PricingEngine (índices): {engine_us:>10.1f} µs por carrito")
+    print(f"todas las reglas por línea: {naive_us:>7.1f} µs por carrito ({naive_us / engine_us:.0f}x)")
+    print(f"líneas con resultado distinto a la referencia: {mismatches}")
+
+
+if __name__ == "__main__":
+    main()
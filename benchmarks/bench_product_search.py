@@ -0,0 +1,72 @@
+"""
+Benchmark de la búsqueda de productos por nombre (índice invertido)
+frente a un recorrido lineal de list_all().
+
+Uso:
+    python benchmarks/bench_product_search.py --skus 300000
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+# Agregar la carpeta "src" al PYTHONPATH (igual que en los tests)
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from core.models import Product
+from core.services import InventoryService
+from infra.memory_repositories import InMemoryProductRepository
+from infra.search_index import normalize_search_text
+
+_KINDS = ["Tornillo", "Tuerca", "Arandela", "Martillo", "Taladro", "Galón de pintura",
+          "Brocha", "Rodillo", "Llave inglesa", "Destornillador", "Clavo", "Cinta métrica"]
+_DETAILS = ["acero", "galvanizado", "inoxidable", "blanca", "azul", "roja", "fibra",
+            "madera", "eléctrico", "1/4\"", "3/8\"", "16 oz", "600W", "interior", "exterior"]
+_QUERIES = ["torn", "galon pint", "llave ingl", "tuerca inox", "brocha", "taladro 600", "clav gal"]
+
+
+def _catalog(count: int, rng: random.Random):
+    for n in range(count):
+        name = f"{rng.choice(_KINDS)} {rng.choice(_DETAILS)} {rng.choice(_DETAILS)} mod {n % 5000}"
+        yield Product(code=f"SKU{n:07}", name=name, price=1.0, stock=10,
+                      location=f"Pasillo {n % 30}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--skus", type=int, default=300_000)
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    rng = random.Random(3)
+    repo = InMemoryProductRepository()
+    started = time.perf_counter()
+    repo.save_many(_catalog(args.skus, rng))
+    print(f"{args.skus:,} productos indexados en {time.perf_counter() - started:.1f}s")
+
+    service = InventoryService(repo)
+    service.search_products("calentar")  # primera búsqueda: ordena el vocabulario
+
+    for query in _QUERIES:
+        started = time.perf_counter()
+        for _ in range(args.rounds):
+            result = service.search_products(query, limit=20)
+        indexed_ms = (time.perf_counter() - started) / args.rounds * 1000
+
+        started = time.perf_counter()
+        prefixes = normalize_search_text(query).split()
+        matches = [
+            p for p in repo.list_all()
+            if all(any(w.startswith(x) for w in normalize_search_text(p.name).split()) for x in prefixes)
+        ]
+        scan_ms = (time.perf_counter() - started) * 1000
+
+        print(f"{query!r:<16} {result.total:>7} coincidencias  índice {indexed_ms:7.2f} ms  "
+              f"recorrido lineal {scan_ms:8.1f} ms")
+        assert result.total == len(matches)
+
+
+if __name__ == "__main__":
+    main()
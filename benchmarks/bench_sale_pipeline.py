@@ -0,0 +1,277 @@
+"""
+Suite de benchmarks del flujo de venta.
+
+Mide, para cada combinación de tamaño de catálogo, tamaño de carrito
+y concurrencia (hilos):
+
+- SaleService.confirm_sale
+- InventoryService.check_availability (una línea)
+- InMemoryProductRepository.find_by_codes / save_many (un carrito)
+
+y reporta throughput, latencias p50/p99 y memoria pico (tracemalloc,
+en una pasada aparte para no distorsionar los tiempos). Los resultados
+se guardan en JSON y pueden compararse contra una corrida anterior.
+
+Uso:
+    # Corrida rápida y guardado como línea base
+    python benchmarks/bench_sale_pipeline.py --quick --output baseline.json
+
+    # Corrida completa comparada contra la línea base (código 1 si hay regresión)
+    python benchmarks/bench_sale_pipeline.py --baseline baseline.json --output actual.json
+
+    # Matriz a medida
+    python benchmarks/bench_sale_pipeline.py --catalog 100,1000000 --cart 1,1000 --concurrency 1,8
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+
+# Agregar la carpeta "src" al PYTHONPATH (igual que en los tests)
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from core.models import Cart, Product
+from core.services import InventoryService, SaleService
+from infra.memory_repositories import InMemoryProductRepository, InMemorySaleRepository
+
+_FULL = {"catalog": [100, 10_000, 1_000_000], "cart": [1, 10, 100, 1000], "concurrency": [1, 4, 16]}
+_QUICK = {"catalog": [100, 10_000], "cart": [1, 10, 100], "concurrency": [1, 4]}
+
+# Stock suficiente para que ninguna venta del benchmark falle por falta de unidades.
+_UNLIMITED_STOCK = 10**12
+
+
+# ==========
+# Preparación
+# ==========
+
+
+def _build_catalog(size: int) -> InMemoryProductRepository:
+    repo = InMemoryProductRepository()
+    repo.save_many(
+        Product(
+            code=f"SKU{n:07}",
+            name=f"Producto de ferretería {n}",
+            price=1.0 + n % 500,
+            stock=_UNLIMITED_STOCK,
+            location=f"Pasillo {n % 30}",
+        )
+        for n in range(size)
+    )
+    return repo
+
+
+def _build_carts(count: int, catalog_size: int, lines: int, seed: int) -> List[Cart]:
+    rng = random.Random(seed)
+    lines = min(lines, catalog_size)
+    carts = []
+    for _ in range(count):
+        cart = Cart()
+        for n in rng.sample(range(catalog_size), lines):
+            cart.add_item(f"SKU{n:07}", 1)
+        carts.append(cart)
+    return carts
+
+
+# ==========
+# Medición
+# ==========
+
+
+def _percentile(sorted_values: List[float], fraction: float) -> float:
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def _time_operations(operations: List[Callable[[], object]], concurrency: int) -> Dict[str, float]:
+    latencies: List[float] = []
+    guard = threading.Lock()
+
+    def run(operation: Callable[[], object]) -> None:
+        started = time.perf_counter()
+        operation()
+        elapsed = time.perf_counter() - started
+        with guard:
+            latencies.append(elapsed)
+
+    started = time.perf_counter()
+    if concurrency == 1:
+        for operation in operations:
+            run(operation)
+    else:
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            list(executor.map(run, operations))
+    wall = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "ops": len(operations),
+        "throughput_ops_s": len(operations) / wall,
+        "p50_ms": _percentile(latencies, 0.50) * 1000,
+        "p99_ms": _percentile(latencies, 0.99) * 1000,
+    }
+
+
+def _peak_memory_kib(operations: List[Callable[[], object]]) -> float:
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    baseline, _ = tracemalloc.get_traced_memory()
+    for operation in operations:
+        operation()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return (peak - baseline) / 1024
+
+
+def _scenarios(repo: InMemoryProductRepository, carts: List[Cart]) -> Dict[str, List[Callable[[], object]]]:
+    inventory = InventoryService(repo)
+    sales = SaleService(repo, InMemorySaleRepository(), inventory)
+    first_lines = [cart.get_items()[0] for cart in carts]
+    cart_codes = [[item.product_code for item in cart.get_items()] for cart in carts]
+    cart_products = [list(repo.find_by_codes(codes).values()) for codes in cart_codes]
+
+    return {
+        "confirm_sale": [lambda c=c: sales.confirm_sale(c) for c in carts],
+        "check_availability": [
+            lambda i=i: inventory.check_availability(i.product_code, i.quantity)
+            for i in first_lines
+        ],
+        "repo.find_by_codes": [lambda c=c: repo.find_by_codes(c) for c in cart_codes],
+        "repo.save_many": [lambda p=p: repo.save_many(p) for p in cart_products],
+    }
+
+
+def _operations_for(catalog: int, cart: int, requested: int) -> int:
+    # Limita el trabajo total para que los carritos grandes no dominen la corrida.
+    return max(20, min(requested, 200_000 // max(1, min(cart, catalog))))
+
+
+def run_suite(matrix: Dict[str, List[int]], operations: int, seed: int) -> List[dict]:
+    results: List[dict] = []
+    for catalog in matrix["catalog"]:
+        started = time.perf_counter()
+        repo = _build_catalog(catalog)
+        print(f"\ncatálogo {catalog:,} SKUs (carga {time.perf_counter() - started:.1f}s)")
+        for cart in matrix["cart"]:
+            count = _operations_for(catalog, cart, operations)
+            carts = _build_carts(count, catalog, cart, seed)
+            for concurrency in matrix["concurrency"]:
+                for name, ops in _scenarios(repo, carts).items():
+                    result = {
+                        "name": name,
+                        "catalog": catalog,
+                        "cart": min(cart, catalog),
+                        "concurrency": concurrency,
+                        **_time_operations(ops, concurrency),
+                        "peak_kib": _peak_memory_kib(ops[: min(len(ops), 50)]),
+                    }
+                    results.append(result)
+                    print(
+                        f"  {name:<20} carrito={result['cart']:<5} hilos={concurrency:<3} "
+                        f"{result['throughput_ops_s']:>12,.0f} ops/s  "
+                        f"p50={result['p50_ms']:8.3f} ms  p99={result['p99_ms']:8.3f} ms  "
+                        f"pico={result['peak_kib']:9.1f} KiB"
+                    )
+    return results
+
+
+# ==========
+# Comparación contra línea base
+# ==========
+
+
+def _key(result: dict) -> tuple:
+    return (result["name"], result["catalog"], result["cart"], result["concurrency"])
+
+
+def compare(results: List[dict], baseline: dict, tolerance: float) -> List[str]:
+    """
+    Devuelve una descripción por cada escenario que empeoró más de
+    `tolerance` (fracción) en throughput o en p99 respecto de la base.
+    """
+    previous = {_key(r): r for r in baseline["results"]}
+    regressions: List[str] = []
+    for result in results:
+        before = previous.get(_key(result))
+        if before is None:
+            continue
+        label = "{} catálogo={} carrito={} hilos={}".format(*_key(result))
+        if result["throughput_ops_s"] < before["throughput_ops_s"] * (1 - tolerance):
+            regressions.append(
+                f"{label}: throughput {before['throughput_ops_s']:,.0f} -> "
+                f"{result['throughput_ops_s']:,.0f} ops/s"
+            )
+        if result["p99_ms"] > before["p99_ms"] * (1 + tolerance):
+            regressions.append(
+                f"{label}: p99 {before['p99_ms']:.3f} -> {result['p99_ms']:.3f} ms"
+            )
+    return regressions
+
+
+def _parse_sizes(text: Optional[str], default: List[int]) -> List[int]:
+    if not text:
+        return default
+    return [int(float(value)) for value in text.split(",")]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--quick", action="store_true", help="matriz reducida")
+    parser.add_argument("--catalog", help="tamaños de catálogo, ej. 100,1e4,1e6")
+    parser.add_argument("--cart", help="líneas por carrito, ej. 1,10,1000")
+    parser.add_argument("--concurrency", help="hilos, ej. 1,4,16")
+    parser.add_argument("--operations", type=int, default=2000, help="operaciones por escenario")
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--baseline", help="JSON de una corrida anterior para comparar")
+    parser.add_argument("--tolerance", type=float, default=0.20)
+    args = parser.parse_args()
+
+    defaults = _QUICK if args.quick else _FULL
+    matrix = {
+        "catalog": _parse_sizes(args.catalog, defaults["catalog"]),
+        "cart": _parse_sizes(args.cart, defaults["cart"]),
+        "concurrency": _parse_sizes(args.concurrency, defaults["concurrency"]),
+    }
+
+    results = run_suite(matrix, args.operations, args.seed)
+    report = {
+        "meta": {
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "matrix": matrix,
+            "operations": args.operations,
+            "seed": args.seed,
+        },
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nresultados guardados en {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        if regressions:
+            print(f"\n⚠ {len(regressions)} regresiones (tolerancia {args.tolerance:.0%}):")
+            for line in regressions:
+                print(f"  - {line}")
+            return 1
+        print(f"\nsin regresiones respecto de {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,55 @@
+"""
+Benchmark del journal de ventas: fsync por venta vs group commit.
+
+Uso:
+    python benchmarks/bench_sales_journal.py --sales 5000 --threads 32
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Agregar la carpeta "src" al PYTHONPATH (igual que en los tests)
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from infra.journal_repositories import JournalSaleRepository
+
+_SALE = {
+    "items": [
+        {"product_code": "T001", "name": "Caja de tornillos", "quantity": 3, "unit_price": 5.2, "total": 15.6},
+        {"product_code": "P001", "name": "Galón de pintura", "quantity": 1, "unit_price": 18.0, "total": 18.0},
+    ],
+    "grand_total": 33.6,
+}
+
+
+def _run(label: str, sales: int, threads: int, **options) -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        repo = JournalSaleRepository(directory, **options)
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            list(executor.map(lambda _: repo.save_sale(_SALE), range(sales)))
+        elapsed = time.perf_counter() - started
+        repo.close()
+    print(
+        f"{label:<16} {sales / elapsed:>10,.0f} ventas/s  "
+        f"{repo.fsync_count:>6} fsync  ({sales / repo.fsync_count:.1f} ventas por fsync)"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sales", type=int, default=5000)
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--window", type=float, default=0.002)
+    args = parser.parse_args()
+
+    _run("fsync por venta", args.sales, args.threads, commit_window=0.0, max_batch=1)
+    _run("group commit", args.sales, args.threads, commit_window=args.window)
+
+
+if __name__ == "__main__":
+    main()
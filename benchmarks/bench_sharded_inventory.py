@@ -0,0 +1,140 @@
+"""
+Benchmark del inventario repartido en procesos (shards).
+
+Compara SaleService.confirm_sales en un solo proceso contra
+ShardedSaleService con 1, 2, 4... procesos trabajadores, vendiendo los
+mismos lotes de carritos. Informa carritos por segundo, aceleración
+respecto de un solo proceso y la fracción de carritos repartidos entre
+varios shards (que pasan por el protocolo de dos fases).
+
+La aceleración depende de los núcleos disponibles: con N núcleos se
+espera que escale hasta N trabajadores.
+
+Uso:
+    python benchmarks/bench_sharded_inventory.py --skus 100000 --carts 40000 --lines 3
+    python benchmarks/bench_sharded_inventory.py --workers 1,2,4,8 --batch 1000
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from typing import List
+
+# Agregar la carpeta "src" al PYTHONPATH (igual que en los tests)
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from core.models import Cart, Product
+from core.services import InventoryService, SaleService
+from core.sharding import ShardedSaleService, shard_of
+from infra.memory_repositories import InMemoryProductRepository, InMemorySaleRepository
+from infra.process_shards import start_process_shards
+
+# Stock suficiente para que ninguna venta del benchmark falle por falta de unidades.
+_UNLIMITED_STOCK = 10**12
+
+
+def _catalog(size: int) -> List[Product]:
+    return [
+        Product(
+            code=f"SKU{n:07}",
+            name=f"Producto de ferretería {n}",
+            price=1.0 + n % 500,
+            stock=_UNLIMITED_STOCK,
+            location=f"Pasillo {n % 30}",
+        )
+        for n in range(size)
+    ]
+
+
+def _carts(count: int, skus: int, lines: int, seed: int) -> List[Cart]:
+    rng = random.Random(seed)
+    carts = []
+    for _ in range(count):
+        cart = Cart()
+        for n in rng.sample(range(skus), lines):
+            cart.add_item(f"SKU{n:07}", 1)
+        carts.append(cart)
+    return carts
+
+
+def _batches(carts: List[Cart], size: int) -> List[List[Cart]]:
+    return [carts[start:start + size] for start in range(0, len(carts), size)]
+
+
+def _distributed_fraction(carts: List[Cart], workers: int) -> float:
+    spanning = sum(
+        1
+        for cart in carts
+        if len({shard_of(item.product_code, workers) for item in cart.get_items()}) > 1
+    )
+    return spanning / len(carts)
+
+
+def _run_single_process(catalog: List[Product], batches: List[List[Cart]]) -> float:
+    repo = InMemoryProductRepository()
+    repo.save_many(catalog)
+    service = SaleService(repo, InMemorySaleRepository(), InventoryService(repo))
+    started = time.perf_counter()
+    for batch in batches:
+        service.confirm_sales(batch)
+    return time.perf_counter() - started
+
+
+def _run_sharded(catalog: List[Product], batches: List[List[Cart]], workers: int) -> float:
+    shards = start_process_shards(workers)
+    try:
+        service = ShardedSaleService(shards, InMemorySaleRepository())
+        service.load_products(catalog)
+        started = time.perf_counter()
+        for batch in batches:
+            service.confirm_sales(batch)
+        elapsed = time.perf_counter() - started
+        service.close()
+        return elapsed
+    finally:
+        for shard in shards:
+            shard.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--skus", type=int, default=100_000)
+    parser.add_argument("--carts", type=int, default=40_000)
+    parser.add_argument("--lines", type=int, default=3, help="líneas por carrito")
+    parser.add_argument("--batch", type=int, default=500, help="carritos por lote")
+    parser.add_argument("--workers", help="procesos, ej. 1,2,4 (por defecto hasta la cantidad de núcleos)")
+    parser.add_argument("--seed", type=int, default=1234)
+    args = parser.parse_args()
+
+    cores = os.cpu_count() or 1
+    if args.workers:
+        worker_counts = [int(value) for value in args.workers.split(",")]
+    else:
+        worker_counts = [n for n in (1, 2, 4, 8, 16, 32) if n <= cores] or [1]
+
+    catalog = _catalog(args.skus)
+    batches = _batches(_carts(args.carts, args.skus, args.lines, args.seed), args.batch)
+    print(
+        f"{args.skus:,} SKUs, {args.carts:,} carritos de {args.lines} líneas "
+        f"en lotes de {args.batch} ({cores} núcleos disponibles)\n"
+    )
+
+    base = _run_single_process(catalog, batches)
+    print(f"{'un proceso':<16} {args.carts / base:>10,.0f} carritos/s")
+
+    all_carts = [cart for batch in batches for cart in batch]
+    for workers in worker_counts:
+        elapsed = _run_sharded(catalog, batches, workers)
+        print(
+            f"{f'{workers} shards':<16} {args.carts / elapsed:>10,.0f} carritos/s  "
+            f"x{base / elapsed:4.2f}  "
+            f"({_distributed_fraction(all_carts, workers):.0%} carritos repartidos)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Benchmark de los repositorios SQLite: ventas por segundo con
+SaleService sobre un archivo en disco (modo WAL).
+
+Uso:
+    python benchmarks/bench_sqlite_repositories.py --sales 5000 --threads 4
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Agregar la carpeta "src" al PYTHONPATH (igual que en los tests)
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from core.models import Cart, Product
+from core.services import InventoryService, SaleService
+from infra.sqlite_repositories import (
+    SQLiteConnectionPool,
+    SQLiteProductRepository,
+    SQLiteSaleRepository,
+)
+
+
+def _build_carts(count: int, catalog_size: int, lines: int, seed: int):
+    rng = random.Random(seed)
+    carts = []
+    for _ in range(count):
+        cart = Cart()
+        for _ in range(lines):
+            cart.add_item(f"SKU{rng.randrange(catalog_size):07}", 1)
+        carts.append(cart)
+    return carts
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sales", type=int, default=5000)
+    parser.add_argument("--catalog", type=int, default=10000)
+    parser.add_argument("--lines", type=int, default=5)
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        pool = SQLiteConnectionPool(os.path.join(directory, "bench.db"))
+        product_repo = SQLiteProductRepository(pool)
+        sale_repo = SQLiteSaleRepository(pool)
+
+        started = time.perf_counter()
+        product_repo.save_many(
+            Product(
+                code=f"SKU{n:07}",
+                name=f"Producto {n}",
+                price=1.0 + n % 50,
+                stock=10**9,
+                location=f"Pasillo {n % 20}",
+            )
+            for n in range(args.catalog)
+        )
+        seed_seconds = time.perf_counter() - started
+
+        sale_service = SaleService(product_repo, sale_repo, InventoryService(product_repo))
+        carts = _build_carts(args.sales, args.catalog, args.lines, args.seed)
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.threads) as executor:
+            list(executor.map(sale_service.confirm_sale, carts))
+        elapsed = time.perf_counter() - started
+        pool.close()
+
+    print(f"catálogo: {args.catalog} productos cargados en {seed_seconds:.2f}s")
+    print(
+        f"ventas: {args.sales} x {args.lines} líneas con {args.threads} hilos "
+        f"en {elapsed:.2f}s -> {args.sales / elapsed:,.0f} ventas/s"
+    )
+
+
+if __name__ == "__main__":
+    main()
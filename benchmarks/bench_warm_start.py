@@ -0,0 +1,81 @@
+"""
+Benchmark de arranque en caliente: tiempo desde abrir el snapshot hasta
+confirmar la primera venta, con y sin registro de cambios pendiente.
+
+Uso:
+    python benchmarks/bench_warm_start.py --skus 1000000 --changes 10000
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+# Agregar la carpeta "src" al PYTHONPATH (igual que en los tests)
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from core.models import Cart, Product
+from core.services import InventoryService, SaleService
+from infra.memory_repositories import InMemorySaleRepository
+from infra.snapshots import ProductChangeLog, restore_product_repository, save_product_snapshot
+
+_LOCATIONS = [f"Pasillo {n} - Sección {n % 7}" for n in range(40)]
+
+
+def _products(count: int):
+    for n in range(count):
+        yield Product(
+            code=f"SKU{n:07}",
+            name=f"Producto de ferretería {n}",
+            price=1.0 + n % 500,
+            stock=1000,
+            location=_LOCATIONS[n % len(_LOCATIONS)],
+        )
+
+
+def _first_sale(snapshot: str, change_log, columnar: bool):
+    started = time.perf_counter()
+    product_repo = restore_product_repository(snapshot, change_log=change_log, columnar=columnar)
+    restored = time.perf_counter() - started
+    sale_service = SaleService(product_repo, InMemorySaleRepository(), InventoryService(product_repo))
+    cart = Cart()
+    cart.add_item("SKU0000001", 1)
+    sale_service.confirm_sale(cart)
+    return restored, time.perf_counter() - started
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--skus", type=int, default=1_000_000)
+    parser.add_argument("--changes", type=int, default=10_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        snapshot = os.path.join(directory, "productos.snap")
+        started = time.perf_counter()
+        save_product_snapshot(snapshot, _products(args.skus))
+        print(
+            f"snapshot de {args.skus:,} SKUs: {os.path.getsize(snapshot) / 2**20:.1f} MiB "
+            f"en {time.perf_counter() - started:.1f}s"
+        )
+
+        log = ProductChangeLog(os.path.join(directory, "cambios.jsonl"))
+        log.append(
+            Product(f"SKU{n:07}", f"Producto de ferretería {n}", 2.0, 999, _LOCATIONS[0], 1)
+            for n in range(0, args.skus, max(1, args.skus // max(1, args.changes)))
+        )
+
+        for label, columnar in (("InMemory", False), ("Columnar", True)):
+            for change_log in (None, log):
+                restored, first_sale = _first_sale(snapshot, change_log, columnar)
+                replay = "con registro" if change_log is not None else "sin registro"
+                print(
+                    f"{label:<9} {replay:<13} restauración {restored * 1000:>7.0f} ms  "
+                    f"primera venta a los {first_sale * 1000:>7.0f} ms"
+                )
+        log.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Perfil de memoria y tiempo de SaleService.confirm_sale sobre carritos
+sintéticos: bytes y bloques (objetos) por venta y por etapa
+(tracemalloc), los lugares del código que más memoria dejan y las
+funciones con más tiempo acumulado (cProfile).
+
+Uso:
+    python benchmarks/profile_sales.py --sales 2000 --lines 5
+    python benchmarks/profile_sales.py --sales 2000 --no-cprofile --top 25
+"""
+
+import argparse
+import os
+import random
+import sys
+
+# Agregar la carpeta "src" al PYTHONPATH (igual que en los tests)
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from core.models import Cart, Product
+from core.services import InventoryService, SaleService
+from infra.memory_repositories import InMemoryProductRepository, InMemorySaleRepository
+from infra.profiling import AllocationProfilingSink, profile_sales
+
+# Stock suficiente para que ninguna venta falle por falta de unidades.
+_UNLIMITED_STOCK = 10**12
+
+
+def _build_carts(count: int, catalog_size: int, lines: int, seed: int):
+    rng = random.Random(seed)
+    carts = []
+    for _ in range(count):
+        cart = Cart()
+        for n in rng.sample(range(catalog_size), min(lines, catalog_size)):
+            cart.add_item(f"SKU{n:07}", rng.randint(1, 3))
+        carts.append(cart)
+    return carts
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sales", type=int, default=2000, help="ventas a perfilar")
+    parser.add_argument("--lines", type=int, default=5, help="líneas por carrito")
+    parser.add_argument("--catalog", type=int, default=10_000, help="SKUs del catálogo")
+    parser.add_argument("--top", type=int, default=15, help="filas de cada ranking")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--no-cprofile", action="store_true", help="solo tracemalloc")
+    args = parser.parse_args()
+
+    product_repo = InMemoryProductRepository()
+    product_repo.save_many(
+        Product(f"SKU{n:07}", f"Producto de ferretería {n}", 1.0 + n % 500, _UNLIMITED_STOCK, f"Pasillo {n % 30}")
+        for n in range(args.catalog)
+    )
+    sink = AllocationProfilingSink()
+    inventory = InventoryService(product_repo, metrics=sink)
+    sale_service = SaleService(product_repo, InMemorySaleRepository(), inventory, metrics=sink)
+    carts = _build_carts(args.sales, args.catalog, args.lines, args.seed)
+
+    profile = profile_sales(
+        sale_service.confirm_sale, sink, carts, top=args.top, with_cprofile=not args.no_cprofile
+    )
+
+    print(f"{profile.sales:,} ventas medidas con tracemalloc, {args.lines} líneas por carrito")
+    print(
+        f"memoria neta por venta: {profile.bytes_per_sale():,.0f} B en "
+        f"{profile.blocks_per_sale():,.1f} bloques"
+    )
+    if profile.errors:
+        print(f"errores: {profile.errors}")
+
+    print("\npor etapa (promedio por ejecución)")
+    print(f"{'componente/etapa':<36} {'llamadas':>9} {'neto B':>9} {'bloques':>8} {'pico B':>9}")
+    for (component, stage), totals in sorted(profile.stages.items()):
+        net, blocks, peak = totals.per_call()
+        print(f"{component + '/' + stage:<36} {totals.calls:>9,} {net:>9,.0f} {blocks:>8,.1f} {peak:>9,.0f}")
+
+    print("\nlugares con más memoria retenida")
+    for site in profile.top_sites:
+        print(f"{site.size_bytes:>12,} B {site.count:>9,} bloques  {site.location}")
+
+    if profile.hot_spots:
+        print("\nfunciones con más tiempo acumulado (cProfile)")
+        print(profile.hot_spots)
+
+
+if __name__ == "__main__":
+    main()
@@ -30,7 +30,7 @@ def main():
     product_repo.seed_demo_data()
 
     print("\n📦 Productos de ferretería cargados:")
-    for p in product_repo.list_all():
+    for p in product_repo.iter_products():
         print(f"- {p.code} | {p.name} | ${p.price} | Stock: {p.stock} | {p.location}")
 
     # =======================================================
@@ -69,14 +69,14 @@ def main():
     # 5. Ver stock actualizado
     # =======================================================
     print("\n📉 Stock actualizado después de la venta:")
-    for p in product_repo.list_all():
+    for p in product_repo.iter_products():
         print(f"- {p.code} | {p.name} → Stock: {p.stock}")
 
     # =======================================================
     # 6. Ventas registradas
     # =======================================================
     print("\n📝 Registro de ventas en memoria:")
-    for sale in sale_repo.list_sales():
+    for sale in sale_repo.iter_sales():
         print(sale)
 
     print("\n=========== FIN DE DEMO (Ferretería) ===========\n")
@@ -0,0 +1,67 @@
+from abc import ABC, abstractmethod
+from typing import Dict, Iterable, List, Optional
+from .models import Product, ProductPage, ProductSearchResult, SalePage
+
+
+class AsyncProductRepository(ABC):
+    """
+    Puerto asíncrono para acceso a productos.
+    Mismo contrato que ProductRepository, pero sin bloquear el event loop.
+    """
+
+    @abstractmethod
+    async def find_by_code(self, code: str) -> Optional[Product]:
+        ...
+
+    @abstractmethod
+    async def find_by_codes(self, codes: Iterable[str]) -> Dict[str, Product]:
+        ...
+
+    @abstractmethod
+    async def save(self, product: Product) -> None:
+        ...
+
+    @abstractmethod
+    async def save_many(self, products: Iterable[Product]) -> None:
+        ...
+
+    @abstractmethod
+    async def compare_and_save_many(self, products: Iterable[Product]) -> List[str]:
+        """
+        Guardado condicional por versión, todo o nada (mismo contrato
+        que ProductRepository.compare_and_save_many). Devuelve los
+        códigos en conflicto; lista vacía si se guardaron todos.
+        """
+        ...
+
+    @abstractmethod
+    async def list_all(self) -> List[Product]:
+        ...
+
+    @abstractmethod
+    async def page_products(self, after: Optional[str] = None, limit: int = 500) -> ProductPage:
+        ...
+
+    @abstractmethod
+    async def search(
+        self,
+        text: str,
+        location: Optional[str] = None,
+        offset: int = 0,
+        limit: int = 20,
+    ) -> ProductSearchResult:
+        ...
+
+
+class AsyncSaleRepository(ABC):
+    """
+    Puerto asíncrono para registrar ventas.
+    """
+
+    @abstractmethod
+    async def save_sale(self, data: dict) -> None:
+        ...
+
+    @abstractmethod
+    async def page_sales(self, since: int = 0, limit: int = 500) -> SalePage:
+        ...
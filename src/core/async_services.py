@@ -0,0 +1,130 @@
+import asyncio
+import time
+from typing import Callable, Dict, Optional
+from .errors import ConcurrencyError
+from .models import Cart, Product
+from .pricing import PricingEngine
+from .locks import AsyncKeyedLocks
+from .async_ports import AsyncProductRepository, AsyncSaleRepository
+from .services import (
+    _STOCK_WRITE_ATTEMPTS,
+    Receipt,
+    _build_receipt_lines,
+    _new_sale_id,
+    _price_lines,
+    _retry_delay,
+    _sale_payload,
+    _stock_changed_products,
+    _sum_requested_quantities,
+    _validate_availability,
+    _validate_cart_not_empty,
+)
+
+
+class AsyncSaleService:
+    """
+    Versión asíncrona de SaleService para servidores asyncio.
+
+    Aplica exactamente las mismas reglas de validación que la versión
+    síncrona (se reutilizan las funciones de core.services) y conserva
+    la semántica todo o nada: los productos del carrito quedan
+    bloqueados durante la venta y el descuento se revierte si el
+    registro falla.
+
+    Igual que InventoryService, el stock se guarda con escrituras
+    condicionales por versión: si otra caja (síncrona o de otro
+    proceso) lo modificó, se vuelve a leer, se revalida y se reintenta.
+    La reversión devuelve las cantidades sobre el stock vigente, sin
+    pisar lo que otros vendieron entre medio, y corre también si la
+    venta se cancela mientras se registra.
+
+    Con un `pricing` (PricingEngine) cada línea recibe su descuento con
+    las promociones vigentes en el momento de la venta, como en
+    SaleService.
+    """
+
+    def __init__(
+        self,
+        product_repo: AsyncProductRepository,
+        sale_repo: AsyncSaleRepository,
+        clock: Callable[[], float] = time.time,
+        pricing: Optional[PricingEngine] = None,
+    ) -> None:
+        self._product_repo = product_repo
+        self._sale_repo = sale_repo
+        self._clock = clock
+        self._pricing = pricing
+        self._locks = AsyncKeyedLocks()
+
+    def set_pricing(self, pricing: Optional[PricingEngine]) -> None:
+        """
+        Reemplaza el motor de precios (ver SaleService.set_pricing).
+        """
+        self._pricing = pricing
+
+    async def confirm_sale(self, cart: Cart) -> Receipt:
+        _validate_cart_not_empty(cart)
+
+        items = cart.get_items()
+        requested = _sum_requested_quantities(items)
+
+        async with self._locks.hold(requested.keys()):
+            products = await self._fetch_products(requested)
+            _validate_availability(requested, products)
+
+            timestamp = self._clock()
+            pricing = self._pricing
+            discounts = None
+            if pricing is not None:
+                discounts = _price_lines(items, products, pricing, timestamp)
+            receipt_items = _build_receipt_lines(items, products, discounts)
+            receipt = Receipt(
+                items=receipt_items,
+                grand_total=sum(item.total for item in receipt_items),
+                sale_id=_new_sale_id(),
+                timestamp=timestamp,
+            )
+
+            sold = {code: -quantity for code, quantity in requested.items()}
+            await self._change_stock(sold, products)
+            try:
+                await self._sale_repo.save_sale(_sale_payload(receipt))
+            except BaseException:
+                # También si la venta se cancela (p. ej. wait_for venció):
+                # shield evita que se cancele la reversión misma.
+                await asyncio.shield(self._change_stock(requested))
+                raise
+
+        return receipt
+
+    async def _change_stock(
+        self,
+        changes: Dict[str, int],
+        products: Optional[Dict[str, Product]] = None,
+    ) -> None:
+        """
+        Versión asíncrona de InventoryService._change_stock: guardado
+        condicional con relectura de los productos en conflicto,
+        revalidación y espera exponencial entre intentos.
+        """
+        current = dict(products) if products is not None else (
+            await self._product_repo.find_by_codes(changes.keys())
+        )
+        for attempt in range(_STOCK_WRITE_ATTEMPTS):
+            updated = _stock_changed_products(changes, current)
+            conflicts = await self._product_repo.compare_and_save_many(updated)
+            if not conflicts:
+                return
+            await asyncio.sleep(_retry_delay(attempt))
+            current.update(await self._product_repo.find_by_codes(conflicts))
+        raise ConcurrencyError(
+            "No se pudo actualizar el stock: otra operación lo modifica al mismo tiempo."
+        )
+
+    async def _fetch_products(self, requested: Dict[str, int]) -> Dict[str, Product]:
+        """
+        Consulta todas las líneas del carrito en paralelo.
+        """
+        codes = list(requested)
+        found = await asyncio.gather(*(self._product_repo.find_by_code(c) for c in codes))
+        return {code: product for code, product in zip(codes, found) if product is not None}
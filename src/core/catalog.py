@@ -0,0 +1,243 @@
+import math
+import time
+from dataclasses import dataclass, field
+from itertools import islice
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+from .errors import DomainError, ValidationError
+from .events import StockEventBus
+from .models import Product
+from .ports import ProductRepository
+from .services import (
+    _MAX_NAME_LENGTH,
+    _retry_delay,
+    _sanitize_price,
+    _sanitize_product_code,
+    _sanitize_product_name,
+    _sanitize_stock,
+)
+
+_DEFAULT_IMPORT_BATCH = 1000
+_DEFAULT_MAX_REPORTED_ERRORS = 1000
+# Reintentos de un lote cuando otra operación modifica los mismos productos.
+_IMPORT_WRITE_ATTEMPTS = 5
+
+# Filas de entrada: (número de línea en el archivo, campos de la fila).
+# Una fila ilegible (p. ej. JSON inválido) llega como None y se rechaza.
+CatalogRow = Tuple[int, Optional[Mapping[str, Any]]]
+
+
+@dataclass
+class RowError:
+    """
+    Fila rechazada de una importación.
+    """
+    line: int
+    code: Optional[str]
+    message: str
+
+
+@dataclass
+class ImportReport:
+    """
+    Resultado de una importación. `errors` guarda como máximo los
+    primeros `max_errors` rechazos; `rejected` los cuenta a todos.
+    """
+    created: int = 0
+    updated: int = 0
+    rejected: int = 0
+    errors: List[RowError] = field(default_factory=list)
+
+    @property
+    def imported(self) -> int:
+        return self.created + self.updated
+
+
+# ==========
+# Conversión de campos (texto de CSV o valores de JSON)
+# ==========
+
+
+def _is_blank(value: Any) -> bool:
+    return value is None or (isinstance(value, str) and not value.strip())
+
+
+def _parse_price(value: Any) -> float:
+    if isinstance(value, str):
+        try:
+            value = float(value.strip())
+        except ValueError:
+            raise ValidationError("El precio debe ser un número.") from None
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value):
+        raise ValidationError("El precio debe ser un número.")
+    return _sanitize_price(float(value))
+
+
+def _parse_stock(value: Any) -> int:
+    if isinstance(value, str):
+        try:
+            value = int(value.strip())
+        except ValueError:
+            raise ValidationError("El stock debe ser un número entero.") from None
+    return _sanitize_stock(value)
+
+
+def _parse_location(value: Any) -> str:
+    if not isinstance(value, str):
+        raise ValidationError("La ubicación debe ser texto.")
+    value = value.strip()
+    if len(value) > _MAX_NAME_LENGTH:
+        raise ValidationError("La ubicación es demasiado larga.")
+    return value
+
+
+@dataclass
+class _ParsedRow:
+    line: int
+    code: str
+    name: str
+    price: float
+    stock: Optional[int]
+    location: Optional[str]
+
+
+def _parse_row(line: int, row: Mapping[str, Any]) -> _ParsedRow:
+    """
+    Aplica a una fila las mismas reglas de código, nombre y precio que
+    usan los servicios. Stock y ubicación pueden faltar (p. ej. en una
+    lista de precios del proveedor): se conservan los del producto.
+    """
+    if not isinstance(row, Mapping):
+        raise ValidationError("La fila no tiene un formato válido.")
+    stock = row.get("stock")
+    location = row.get("location")
+    return _ParsedRow(
+        line=line,
+        code=_sanitize_product_code(row.get("code")),  # type: ignore[arg-type]
+        name=_sanitize_product_name(row.get("name")),  # type: ignore[arg-type]
+        price=_parse_price(row.get("price")),
+        stock=None if _is_blank(stock) else _parse_stock(stock),
+        location=None if _is_blank(location) else _parse_location(location),
+    )
+
+
+def _merged(parsed: _ParsedRow, current: Optional[Product]) -> Product:
+    if current is None:
+        if parsed.stock is None or parsed.location is None:
+            raise ValidationError("Un producto nuevo necesita stock y ubicación.")
+        return Product(
+            code=parsed.code,
+            name=parsed.name,
+            price=parsed.price,
+            stock=parsed.stock,
+            location=parsed.location,
+        )
+    return Product(
+        code=current.code,
+        name=parsed.name,
+        price=parsed.price,
+        stock=current.stock if parsed.stock is None else parsed.stock,
+        location=current.location if parsed.location is None else parsed.location,
+        version=current.version,
+    )
+
+
+# ==========
+# Servicio
+# ==========
+
+
+class CatalogImportService:
+    """
+    Importación masiva del catálogo (p. ej. la lista de precios nocturna
+    del proveedor) en lotes de tamaño fijo:
+
+    - La memoria no depende del tamaño del archivo: las filas se leen
+      de a un lote y solo se guarda un número acotado de errores.
+    - Cada fila pasa por las reglas de core.services; una fila inválida
+      se informa (con su número de línea) y no detiene la importación.
+    - Por lote: una consulta (find_by_codes) y una escritura por lotes
+      (save_many para los productos nuevos, compare_and_save_many para
+      los existentes, así no se pisa una venta que ocurra mientras tanto).
+
+    Con un `events` (StockEventBus) se publican los cambios de stock de
+    las actualizaciones (p. ej. una reposición que supera el umbral de
+    stock bajo). Los productos nuevos van por save_many: los publica
+    StockEventProductRepository si el repositorio está envuelto.
+    """
+
+    def __init__(self, product_repo: ProductRepository, events: Optional[StockEventBus] = None) -> None:
+        self._product_repo = product_repo
+        self._events = events
+
+    def import_rows(
+        self,
+        rows: Iterable[CatalogRow],
+        batch_size: int = _DEFAULT_IMPORT_BATCH,
+        max_errors: int = _DEFAULT_MAX_REPORTED_ERRORS,
+    ) -> ImportReport:
+        report = ImportReport()
+        iterator = iter(rows)
+        while True:
+            batch = list(islice(iterator, batch_size))
+            if not batch:
+                return report
+            self._import_batch(batch, report, max_errors)
+
+    def _import_batch(self, batch: List[CatalogRow], report: ImportReport, max_errors: int) -> None:
+        parsed: Dict[str, _ParsedRow] = {}
+        for line, row in batch:
+            try:
+                row_data = _parse_row(line, row)
+            except DomainError as exc:
+                _reject(report, max_errors, line, _row_code(row), str(exc))
+                continue
+            # Si un código se repite dentro del lote, gana la última fila.
+            parsed[row_data.code] = row_data
+
+        pending = parsed
+        for attempt in range(_IMPORT_WRITE_ATTEMPTS):
+            current = self._product_repo.find_by_codes(pending.keys())
+            new_products: List[Product] = []
+            updates: List[Product] = []
+            for code, row_data in pending.items():
+                try:
+                    product = _merged(row_data, current.get(code))
+                except DomainError as exc:
+                    _reject(report, max_errors, row_data.line, code, str(exc))
+                    continue
+                (updates if code in current else new_products).append(product)
+
+            if new_products:
+                self._product_repo.save_many(new_products)
+                report.created += len(new_products)
+            conflicts = self._product_repo.compare_and_save_many(updates) if updates else []
+            if not conflicts:
+                report.updated += len(updates)
+                if self._events is not None:
+                    self._events.publish((p.code, current[p.code].stock, p.stock) for p in updates)
+                return
+            # Todo o nada: se reintentan las actualizaciones del lote con
+            # los productos releídos.
+            pending = {product.code: parsed[product.code] for product in updates}
+            time.sleep(_retry_delay(attempt))
+
+        for row_data in pending.values():
+            _reject(
+                report,
+                max_errors,
+                row_data.line,
+                row_data.code,
+                "El producto se modificó durante la importación; vuelva a intentarlo.",
+            )
+
+
+def _row_code(row: Any) -> Optional[str]:
+    code = row.get("code") if isinstance(row, Mapping) else None
+    return code.strip() if isinstance(code, str) else None
+
+
+def _reject(report: ImportReport, max_errors: int, line: int, code: Optional[str], message: str) -> None:
+    report.rejected += 1
+    if len(report.errors) < max_errors:
+        report.errors.append(RowError(line=line, code=code, message=message))
+
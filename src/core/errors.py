@@ -10,3 +10,11 @@ class ValidationError(DomainError):
     Error específico de validación de datos de entrada.
     """
     pass
+
+
+class ConcurrencyError(DomainError):
+    """
+    Otra escritura modificó los mismos datos y la operación no pudo
+    completarse tras los reintentos.
+    """
+    pass
@@ -0,0 +1,331 @@
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Callable, Deque, Iterable, List, Optional, Tuple
+
+_DEFAULT_CAPACITY = 10_000
+_DEFAULT_BATCH = 500
+_DEFAULT_LOW_STOCK_THRESHOLD = 5
+
+# Qué hace la publicación cuando la cola de un suscriptor está llena.
+BLOCK = "block"
+DROP_OLDEST = "drop_oldest"
+
+# Cruces del umbral de stock bajo.
+CROSSED_LOW = "low"
+CROSSED_RESTOCKED = "restocked"
+
+
+@dataclass(frozen=True)
+class StockChange:
+    """
+    Cambio de stock de un producto. `sequence` crece de a uno en cada
+    evento del bus: un salto entre dos eventos recibidos indica que se
+    descartaron eventos intermedios.
+
+    `crossed` es CROSSED_LOW si el stock bajó hasta el umbral (o por
+    debajo), CROSSED_RESTOCKED si volvió a superarlo, o None si quedó
+    del mismo lado.
+    """
+    sequence: int
+    code: str
+    old_stock: int
+    new_stock: int
+    threshold: int
+    crossed: Optional[str]
+    timestamp: float
+
+    @property
+    def is_low(self) -> bool:
+        return self.new_stock <= self.threshold
+
+
+def _crossing(old_stock: int, new_stock: int, threshold: int) -> Optional[str]:
+    if old_stock > threshold >= new_stock:
+        return CROSSED_LOW
+    if new_stock > threshold >= old_stock:
+        return CROSSED_RESTOCKED
+    return None
+
+
+# ==========
+# Suscripciones
+# ==========
+
+
+class StockSubscription:
+    """
+    Cola acotada de eventos de un suscriptor (ver StockEventBus.subscribe).
+
+    `poll` entrega los eventos en lotes. Si la cola se llena:
+
+    - BLOCK: cada publicación encola sus eventos y luego espera, como
+      mucho `block_timeout` segundos en total, a que el suscriptor
+      consuma hasta volver a `capacity` (contrapresión sobre las
+      ventas). Si vence la espera, se descartan los eventos más viejos
+      que sobran.
+    - DROP_OLDEST: se descartan los eventos más viejos sin esperar.
+
+    `dropped` cuenta los descartados: un consumidor que se atrasó puede
+    detectarlo y volver a leer el catálogo completo una vez.
+    """
+
+    def __init__(self, bus: "StockEventBus", capacity: int, overflow: str, block_timeout: float) -> None:
+        if capacity <= 0:
+            raise ValueError("capacity debe ser mayor a cero.")
+        if overflow not in (BLOCK, DROP_OLDEST):
+            raise ValueError(f"overflow debe ser {BLOCK!r} o {DROP_OLDEST!r}.")
+        self._bus = bus
+        self._capacity = capacity
+        self._overflow = overflow
+        self._block_timeout = block_timeout
+        self._lock = threading.Lock()
+        self._not_empty = threading.Condition(self._lock)
+        self._not_full = threading.Condition(self._lock)
+        self._events: Deque[StockChange] = deque()
+        self._closed = False
+        self.dropped = 0
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._events)
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def poll(self, max_events: int = _DEFAULT_BATCH, timeout: Optional[float] = 0.0) -> List[StockChange]:
+        """
+        Hasta `max_events` eventos en orden de publicación. Si no hay
+        ninguno, espera hasta `timeout` segundos (None = sin límite,
+        0 = no espera). Devuelve una lista vacía si venció la espera o
+        la suscripción está cerrada y vacía.
+        """
+        if max_events <= 0:
+            raise ValueError("max_events debe ser mayor a cero.")
+        with self._lock:
+            if not self._events and not self._closed and timeout != 0:
+                self._not_empty.wait_for(lambda: self._events or self._closed, timeout)
+            batch = [self._events.popleft() for _ in range(min(max_events, len(self._events)))]
+            if batch:
+                self._not_full.notify_all()
+            return batch
+
+    def close(self) -> None:
+        """
+        Deja de recibir eventos; los ya encolados se pueden seguir
+        leyendo con poll.
+        """
+        self._bus._unsubscribe(self)
+        with self._lock:
+            self._closed = True
+            self._not_empty.notify_all()
+            self._not_full.notify_all()
+
+    def __enter__(self) -> "StockSubscription":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _append(self, events: List[StockChange]) -> bool:
+        """
+        Encola sin esperar (con el lock de publicación del bus tomado,
+        así el orden de `sequence` se respeta). Devuelve True si la cola
+        quedó por encima de `capacity` y hay que esperar con _make_room.
+        """
+        with self._lock:
+            if self._closed:
+                return False
+            self._events.extend(events)
+            self._not_empty.notify_all()
+            if self._overflow == DROP_OLDEST:
+                self._trim()
+                return False
+            return len(self._events) > self._capacity
+
+    def _make_room(self, deadline: float) -> None:
+        """
+        Espera hasta `deadline` (time.monotonic) a que el consumidor
+        baje la cola a `capacity`; si no llega, descarta los más viejos.
+        """
+        with self._lock:
+            while len(self._events) > self._capacity and not self._closed:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._not_full.wait(remaining)
+            self._trim()
+
+    def _trim(self) -> None:
+        excess = len(self._events) - self._capacity
+        for _ in range(max(excess, 0)):
+            self._events.popleft()
+        if excess > 0:
+            self.dropped += excess
+
+
+# ==========
+# Bus de eventos
+# ==========
+
+
+class StockEventBus:
+    """
+    Bus en proceso de cambios de stock.
+
+    Los publicadores (InventoryService y StockEventProductRepository)
+    informan el stock anterior y el nuevo de cada producto; el bus
+    arma los StockChange (con el cruce del umbral de stock bajo) y los
+    copia a la cola acotada de cada suscripción. Sin suscriptores,
+    publicar no arma ningún evento.
+
+    - `low_stock_threshold`: stock a partir del cual (inclusive) un
+      producto se considera bajo. `threshold_for(código)` permite un
+      umbral por producto; si devuelve None se usa el general.
+    - Solo se publican los productos cuyo stock cambió.
+    """
+
+    def __init__(
+        self,
+        low_stock_threshold: int = _DEFAULT_LOW_STOCK_THRESHOLD,
+        threshold_for: Optional[Callable[[str], Optional[int]]] = None,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self._threshold = low_stock_threshold
+        self._threshold_for = threshold_for
+        self._clock = clock
+        self._lock = threading.Lock()
+        # Un lote se numera y se encola entero antes que el siguiente:
+        # cada suscripción recibe los eventos en orden de `sequence`.
+        self._publish_lock = threading.Lock()
+        self._subscriptions: Tuple[StockSubscription, ...] = ()
+        self._sequence = 0
+
+    def subscribe(
+        self,
+        capacity: int = _DEFAULT_CAPACITY,
+        overflow: str = BLOCK,
+        block_timeout: float = 0.1,
+    ) -> StockSubscription:
+        """
+        Nueva suscripción que recibe los eventos publicados desde ahora.
+        """
+        subscription = StockSubscription(self, capacity, overflow, block_timeout)
+        with self._lock:
+            self._subscriptions = self._subscriptions + (subscription,)
+        return subscription
+
+    @property
+    def has_subscribers(self) -> bool:
+        return bool(self._subscriptions)
+
+    def start_consumer(
+        self,
+        handler: Callable[[List[StockChange]], None],
+        max_batch: int = _DEFAULT_BATCH,
+        capacity: int = _DEFAULT_CAPACITY,
+        overflow: str = BLOCK,
+        block_timeout: float = 0.1,
+    ) -> "StockEventConsumer":
+        """
+        Suscribe `handler` y lo llama desde un hilo propio con lotes de
+        hasta `max_batch` eventos.
+        """
+        return StockEventConsumer(self.subscribe(capacity, overflow, block_timeout), handler, max_batch)
+
+    def publish(self, changes: Iterable[Tuple[str, int, int]]) -> None:
+        """
+        Publica cambios (código, stock anterior, stock nuevo). Con
+        suscripciones en BLOCK puede esperar, como mucho su
+        `block_timeout` por llamada, a que un consumidor atrasado haga
+        lugar. La espera no frena a otros publicadores.
+        """
+        subscriptions = self._subscriptions
+        if not subscriptions:
+            return
+        changes = [(code, old, new) for code, old, new in changes if old != new]
+        if not changes:
+            return
+        timestamp = self._clock()
+        thresholds = [self._threshold_of(code) for code, _, _ in changes]
+        with self._publish_lock:
+            first = self._sequence + 1
+            self._sequence += len(changes)
+            events = [
+                StockChange(
+                    sequence=first + offset,
+                    code=code,
+                    old_stock=old_stock,
+                    new_stock=new_stock,
+                    threshold=threshold,
+                    crossed=_crossing(old_stock, new_stock, threshold),
+                    timestamp=timestamp,
+                )
+                for offset, ((code, old_stock, new_stock), threshold) in enumerate(zip(changes, thresholds))
+            ]
+            full = [s for s in self._subscriptions if s._append(events)]
+        if full:
+            started = time.monotonic()
+            for subscription in full:
+                subscription._make_room(started + subscription._block_timeout)
+
+    def _threshold_of(self, code: str) -> int:
+        if self._threshold_for is not None:
+            threshold = self._threshold_for(code)
+            if threshold is not None:
+                return threshold
+        return self._threshold
+
+    def _unsubscribe(self, subscription: StockSubscription) -> None:
+        with self._lock:
+            self._subscriptions = tuple(s for s in self._subscriptions if s is not subscription)
+
+
+class StockEventConsumer:
+    """
+    Hilo que entrega los eventos de una suscripción a `handler` en
+    lotes. Si `handler` falla, el error queda en `last_error`, se
+    cuenta en `failed_batches` y el consumo sigue con el lote siguiente.
+    `stop()` cierra la suscripción y entrega lo que quedaba encolado.
+    """
+
+    def __init__(
+        self,
+        subscription: StockSubscription,
+        handler: Callable[[List[StockChange]], None],
+        max_batch: int = _DEFAULT_BATCH,
+    ) -> None:
+        self.subscription = subscription
+        self._handler = handler
+        self._max_batch = max_batch
+        self.batches = 0
+        self.failed_batches = 0
+        self.last_error: Optional[BaseException] = None
+        self._thread = threading.Thread(target=self._run, name="stock-events", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        self.subscription.close()
+        self._thread.join(timeout)
+
+    def __enter__(self) -> "StockEventConsumer":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def _run(self) -> None:
+        while True:
+            batch = self.subscription.poll(self._max_batch, timeout=None)
+            if not batch:
+                if self.subscription.closed:
+                    return
+                continue
+            try:
+                self._handler(batch)
+            except Exception as exc:
+                self.failed_batches += 1
+                self.last_error = exc
+            self.batches += 1
@@ -0,0 +1,104 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+from .errors import ValidationError
+
+_DEFAULT_MAX_KEYS = 100_000
+# Una caja reintenta dentro de segundos o minutos, no horas.
+_DEFAULT_TTL_SECONDS = 15 * 60
+_MAX_KEY_LENGTH = 100
+
+
+def _sanitize_idempotency_key(key: str) -> str:
+    if not isinstance(key, str):
+        raise ValidationError("La clave de idempotencia debe ser texto.")
+    key = key.strip()
+    if not key:
+        raise ValidationError("La clave de idempotencia no puede estar vacía.")
+    if len(key) > _MAX_KEY_LENGTH:
+        raise ValidationError("La clave de idempotencia es demasiado larga.")
+    return key
+
+
+class IdempotencyIndex:
+    """
+    Índice de operaciones recientes por clave de idempotencia.
+
+    - `begin(clave)` devuelve el resultado guardado si la operación ya
+      terminó (O(1)); si no, reserva la clave para quien llama y
+      devuelve None. Una segunda llamada con la misma clave mientras la
+      primera sigue en curso espera a que termine.
+    - `complete(clave, resultado)` guarda el resultado; `abandon(clave)`
+      libera la clave si la operación falló (el reintento la ejecuta).
+    - Memoria acotada: como máximo `max_keys` resultados, cada uno por
+      `ttl` segundos. Como todos viven lo mismo, el orden de inserción
+      es el orden de vencimiento y la expulsión es O(1) por clave.
+
+    `fingerprint` identifica el contenido de la operación: reutilizar
+    una clave para otra operación es un error de validación.
+    Los resultados no pueden ser None.
+    """
+
+    def __init__(
+        self,
+        max_keys: int = _DEFAULT_MAX_KEYS,
+        ttl: float = _DEFAULT_TTL_SECONDS,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if max_keys <= 0:
+            raise ValueError("max_keys debe ser mayor a cero.")
+        self._max_keys = max_keys
+        self._ttl = ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._finished = threading.Condition(self._lock)
+        # clave -> (vence_en, fingerprint, resultado), en orden de vencimiento.
+        self._done: "OrderedDict[str, Tuple[float, Hashable, Any]]" = OrderedDict()
+        # Claves en curso -> fingerprint (tantas como operaciones simultáneas).
+        self._in_flight: Dict[str, Hashable] = {}
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._done)
+
+    def begin(self, key: str, fingerprint: Hashable = None) -> Optional[Any]:
+        with self._lock:
+            while True:
+                self._evict_expired()
+                entry = self._done.get(key)
+                if entry is not None:
+                    _check_fingerprint(entry[1], fingerprint)
+                    return entry[2]
+                if key not in self._in_flight:
+                    self._in_flight[key] = fingerprint
+                    return None
+                _check_fingerprint(self._in_flight[key], fingerprint)
+                self._finished.wait()
+
+    def complete(self, key: str, result: Any) -> None:
+        with self._lock:
+            fingerprint = self._in_flight.pop(key, None)
+            self._done[key] = (self._clock() + self._ttl, fingerprint, result)
+            self._done.move_to_end(key)
+            while len(self._done) > self._max_keys:
+                self._done.popitem(last=False)
+            self._finished.notify_all()
+
+    def abandon(self, key: str) -> None:
+        with self._lock:
+            self._in_flight.pop(key, None)
+            self._finished.notify_all()
+
+    def _evict_expired(self) -> None:
+        now = self._clock()
+        while self._done:
+            expires_at = next(iter(self._done.values()))[0]
+            if expires_at > now:
+                return
+            self._done.popitem(last=False)
+
+
+def _check_fingerprint(stored: Hashable, given: Hashable) -> None:
+    if stored != given:
+        raise ValidationError("La clave de idempotencia ya se usó para otra operación.")
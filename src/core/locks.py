@@ -0,0 +1,113 @@
+import asyncio
+import threading
+from contextlib import asynccontextmanager, contextmanager
+from typing import AsyncIterator, Dict, Iterable, Iterator, List, Tuple
+
+
+class _Entry:
+    """
+    Lock de una clave y cuántos lo tienen o lo esperan. Cuando nadie
+    lo usa se quita del registro: la memoria depende de las ventas en
+    curso, no de todos los códigos que se vieron alguna vez.
+    """
+
+    __slots__ = ("lock", "users")
+
+    def __init__(self, lock) -> None:
+        self.lock = lock
+        self.users = 0
+
+
+class KeyedLocks:
+    """
+    Registro de locks por clave (código de producto).
+
+    Permite que ventas de productos distintos avancen en paralelo.
+    Las claves se bloquean siempre en orden ascendente, por lo que
+    dos ventas con productos en común nunca quedan esperándose
+    mutuamente (sin deadlocks). Solo existen locks de las claves
+    bloqueadas o esperadas en este momento.
+    """
+
+    def __init__(self) -> None:
+        self._guard = threading.Lock()
+        self._locks: Dict[str, _Entry] = {}
+
+    def __len__(self) -> int:
+        return len(self._locks)
+
+    def _join(self, key: str) -> _Entry:
+        with self._guard:
+            entry = self._locks.get(key)
+            if entry is None:
+                entry = self._locks[key] = _Entry(threading.Lock())
+            entry.users += 1
+            return entry
+
+    def _leave(self, key: str, entry: _Entry) -> None:
+        with self._guard:
+            entry.users -= 1
+            if not entry.users:
+                del self._locks[key]
+
+    @contextmanager
+    def hold(self, keys: Iterable[str]) -> Iterator[None]:
+        """
+        Bloquea todas las claves indicadas durante el bloque `with`.
+        """
+        acquired: List[Tuple[str, _Entry]] = []
+        try:
+            for key in sorted(set(keys)):
+                entry = self._join(key)
+                try:
+                    entry.lock.acquire()
+                except BaseException:
+                    self._leave(key, entry)
+                    raise
+                acquired.append((key, entry))
+            yield
+        finally:
+            for key, entry in reversed(acquired):
+                entry.lock.release()
+                self._leave(key, entry)
+
+
+class AsyncKeyedLocks:
+    """
+    Equivalente de KeyedLocks para corrutinas de un mismo event loop:
+    bloquea sin detener el loop mientras espera. Como todo corre en el
+    mismo hilo, el registro no necesita un lock propio.
+    """
+
+    def __init__(self) -> None:
+        self._locks: Dict[str, _Entry] = {}
+
+    def __len__(self) -> int:
+        return len(self._locks)
+
+    def _leave(self, key: str, entry: _Entry) -> None:
+        entry.users -= 1
+        if not entry.users:
+            del self._locks[key]
+
+    @asynccontextmanager
+    async def hold(self, keys: Iterable[str]) -> AsyncIterator[None]:
+        acquired: List[Tuple[str, _Entry]] = []
+        try:
+            for key in sorted(set(keys)):
+                entry = self._locks.get(key)
+                if entry is None:
+                    entry = self._locks[key] = _Entry(asyncio.Lock())
+                entry.users += 1
+                try:
+                    await entry.lock.acquire()
+                except BaseException:
+                    # Cancelada mientras esperaba.
+                    self._leave(key, entry)
+                    raise
+                acquired.append((key, entry))
+            yield
+        finally:
+            for key, entry in reversed(acquired):
+                entry.lock.release()
+                self._leave(key, entry)
@@ -0,0 +1,119 @@
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager, nullcontext
+from functools import wraps
+from typing import Any, Callable, ContextManager, Iterator, Optional, TypeVar
+from .errors import DomainError
+
+
+class MetricsSink(ABC):
+    """
+    Puerto (interfaz) para la instrumentación de los servicios.
+
+    Los servicios informan la duración de cada etapa, las llamadas a
+    repositorios y los errores de dominio. Sin sink configurado no se
+    mide nada (costo prácticamente nulo).
+    """
+
+    @abstractmethod
+    def observe_stage(self, component: str, stage: str, seconds: float) -> None:
+        ...
+
+    @abstractmethod
+    def count_repository_call(self, component: str, repository: str, operation: str) -> None:
+        ...
+
+    @abstractmethod
+    def count_error(self, component: str, error_type: str) -> None:
+        ...
+
+    @contextmanager
+    def stage(self, component: str, stage: str) -> Iterator[None]:
+        """
+        Mide la duración del bloque `with` y la informa con observe_stage
+        (también si el bloque termina con una excepción).
+        """
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe_stage(component, stage, time.perf_counter() - started)
+
+
+_NO_STAGE = nullcontext()
+
+
+def measure_stage(sink: Optional[MetricsSink], component: str, stage: str) -> ContextManager[None]:
+    """
+    Devuelve el medidor de la etapa, o un contexto vacío si no hay sink.
+    """
+    if sink is None:
+        return _NO_STAGE
+    return sink.stage(component, stage)
+
+
+_F = TypeVar("_F", bound=Callable[..., Any])
+
+
+def instrumented(operation: str) -> Callable[[_F], _F]:
+    """
+    Decorador para métodos públicos de servicios con atributos
+    `_metrics` y `_component`: mide la operación completa y cuenta
+    los DomainError / ValidationError por tipo. Sin sink, solo agrega
+    una comprobación antes de llamar al método original.
+    """
+
+    def decorator(method: _F) -> _F:
+        @wraps(method)
+        def wrapper(self, *args, **kwargs):
+            sink = self._metrics
+            if sink is None:
+                return method(self, *args, **kwargs)
+            try:
+                with sink.stage(self._component, operation):
+                    return method(self, *args, **kwargs)
+            except DomainError as exc:
+                sink.count_error(self._component, type(exc).__name__)
+                raise
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorator
+
+
+class CountingRepository:
+    """
+    Envoltorio de un repositorio que informa cada llamada al sink.
+    Solo se usa cuando hay un sink configurado.
+    """
+
+    def __init__(self, inner: Any, sink: MetricsSink, component: str, repository: str) -> None:
+        self._inner = inner
+        self._sink = sink
+        self._component = component
+        self._repository = repository
+
+    def __getattr__(self, name: str) -> Any:
+        attribute = getattr(self._inner, name)
+        if not callable(attribute):
+            return attribute
+
+        def counted(*args, **kwargs):
+            self._sink.count_repository_call(self._component, self._repository, name)
+            return attribute(*args, **kwargs)
+
+        return counted
+
+
+def count_repository_calls(
+    repository: Any,
+    sink: Optional[MetricsSink],
+    component: str,
+    name: str,
+) -> Any:
+    """
+    Envuelve el repositorio solo si hay sink; si no, lo devuelve tal cual.
+    """
+    if sink is None:
+        return repository
+    return CountingRepository(repository, sink, component, name)
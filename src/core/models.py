@@ -1,17 +1,54 @@
 from dataclasses import dataclass
-from typing import Dict, List
+from typing import Dict, List, Optional
 
 
 @dataclass
 class Product:
     """
     Representa un producto del inventario.
+    `version` aumenta con cada guardado condicional
+    (ver ProductRepository.compare_and_save_many).
     """
     code: str
     name: str
     price: float
     stock: int
     location: str
+    version: int = 0
+
+
+@dataclass
+class ProductSearchResult:
+    """
+    Página de resultados de una búsqueda de productos.
+    `total` es la cantidad de coincidencias sin paginar.
+    """
+    items: List[Product]
+    total: int
+
+
+@dataclass
+class ProductPage:
+    """
+    Página de un recorrido del catálogo ordenado por código.
+    `next_token` se pasa como `after` para pedir la página siguiente;
+    es None cuando ya no quedan productos.
+    """
+    items: List[Product]
+    next_token: Optional[str]
+
+
+@dataclass
+class SalePage:
+    """
+    Página del historial de ventas en orden de registro.
+    `next_token` se pasa como `since` para continuar justo después de
+    la última venta entregada (también sirve para retomar más tarde y
+    recibir solo las ventas nuevas). Las páginas vacías indican que,
+    por ahora, no hay más ventas.
+    """
+    items: List[dict]
+    next_token: int
 
 
 @dataclass
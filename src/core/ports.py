@@ -1,6 +1,8 @@
 from abc import ABC, abstractmethod
-from typing import Optional, List
-from .models import Product
+from typing import Dict, Iterable, Iterator, Optional, List
+from .models import Product, ProductPage, ProductSearchResult, SalePage
+
+_DEFAULT_BATCH_SIZE = 500
 
 
 class ProductRepository(ABC):
@@ -13,14 +15,87 @@ class ProductRepository(ABC):
     def find_by_code(self, code: str) -> Optional[Product]:
         ...
 
+    @abstractmethod
+    def find_by_codes(self, codes: Iterable[str]) -> Dict[str, Product]:
+        """
+        Busca varios productos en una sola operación.
+        Devuelve un diccionario código -> producto; los códigos
+        inexistentes simplemente no aparecen en el resultado.
+        """
+        ...
+
     @abstractmethod
     def save(self, product: Product) -> None:
         ...
 
+    @abstractmethod
+    def save_many(self, products: Iterable[Product]) -> None:
+        """
+        Guarda varios productos en una sola operación.
+        """
+        ...
+
+    @abstractmethod
+    def compare_and_save_many(self, products: Iterable[Product]) -> List[str]:
+        """
+        Guardado condicional (compare-and-set) de varios productos, todo o nada.
+
+        Cada producto trae en `version` la versión con la que se leyó y se
+        guarda con `version + 1` solo si la versión almacenada sigue siendo
+        esa. Si algún producto no coincide (otra caja o proceso lo modificó,
+        o ya no existe) no se guarda ninguno y se devuelven sus códigos;
+        una lista vacía indica que se guardaron todos.
+
+        A diferencia de save / save_many, que escriben la versión recibida
+        tal cual, nunca pisa una escritura concurrente.
+        """
+        ...
+
     @abstractmethod
     def list_all(self) -> List[Product]:
         ...
 
+    @abstractmethod
+    def page_products(
+        self,
+        after: Optional[str] = None,
+        limit: int = _DEFAULT_BATCH_SIZE,
+    ) -> ProductPage:
+        """
+        Devuelve hasta `limit` productos con código mayor que `after`,
+        ordenados por código. Como el token es el último código entregado,
+        la paginación es estable aunque se agreguen productos entre páginas.
+        """
+        ...
+
+    def iter_products(self, batch_size: int = _DEFAULT_BATCH_SIZE) -> Iterator[Product]:
+        """
+        Recorre el catálogo completo página por página, con memoria
+        constante (a diferencia de list_all, que copia todo).
+        """
+        token: Optional[str] = None
+        while True:
+            page = self.page_products(after=token, limit=batch_size)
+            yield from page.items
+            if page.next_token is None:
+                return
+            token = page.next_token
+
+    @abstractmethod
+    def search(
+        self,
+        text: str,
+        location: Optional[str] = None,
+        offset: int = 0,
+        limit: int = 20,
+    ) -> ProductSearchResult:
+        """
+        Busca productos cuyo nombre contenga palabras que empiecen con
+        cada palabra de `text` (sin distinguir mayúsculas ni acentos),
+        opcionalmente solo en una ubicación. Resultados ordenados por código.
+        """
+        ...
+
 
 class SaleRepository(ABC):
     """
@@ -29,3 +104,35 @@ class SaleRepository(ABC):
     @abstractmethod
     def save_sale(self, data: dict) -> None:
         ...
+
+    @abstractmethod
+    def save_sales(self, sales: List[dict]) -> None:
+        """
+        Registra varias ventas en una sola operación (todas o ninguna,
+        si el almacenamiento lo permite).
+        """
+        ...
+
+    @abstractmethod
+    def page_sales(self, since: int = 0, limit: int = _DEFAULT_BATCH_SIZE) -> SalePage:
+        """
+        Devuelve hasta `limit` ventas registradas después del token `since`
+        (0 = desde el inicio), en orden de registro.
+        """
+        ...
+
+    def iter_sales(
+        self,
+        since: int = 0,
+        batch_size: int = _DEFAULT_BATCH_SIZE,
+    ) -> Iterator[dict]:
+        """
+        Recorre el historial desde `since` página por página,
+        con memoria constante.
+        """
+        while True:
+            page = self.page_sales(since=since, limit=batch_size)
+            if not page.items:
+                return
+            yield from page.items
+            since = page.next_token
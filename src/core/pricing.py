@@ -0,0 +1,293 @@
+import math
+import time
+from bisect import bisect_right
+from collections import Counter
+from dataclasses import dataclass
+from typing import Callable, Dict, Hashable, Iterable, List, Optional, Tuple, Union
+from .errors import ValidationError
+from .models import Product
+
+# ==========
+# Reglas de promoción
+# ==========
+# Cada regla aplica a un código de producto, a una ubicación (la
+# sección de la ferretería hace de categoría) o, sin ninguno de los
+# dos, a toda la tienda. `valid_from` / `valid_until` (segundos desde
+# epoch) limitan cuándo está activa.
+
+
+@dataclass(frozen=True)
+class VolumeDiscount:
+    """
+    Porcentaje de descuento al llevar al menos `min_quantity` unidades
+    del producto (p. ej. 10% desde 100 tornillos).
+    """
+    rule_id: str
+    min_quantity: int
+    percent: float
+    product_code: Optional[str] = None
+    location: Optional[str] = None
+    valid_from: Optional[float] = None
+    valid_until: Optional[float] = None
+
+
+@dataclass(frozen=True)
+class PercentOff:
+    """
+    Porcentaje de descuento sin condición de cantidad.
+    """
+    rule_id: str
+    percent: float
+    product_code: Optional[str] = None
+    location: Optional[str] = None
+    valid_from: Optional[float] = None
+    valid_until: Optional[float] = None
+
+
+@dataclass(frozen=True)
+class BundleDiscount:
+    """
+    Porcentaje de descuento sobre cada combo completo: una unidad de
+    cada uno de `product_codes` (p. ej. taladro + juego de brocas; un
+    código repetido pide más unidades de ese producto por combo).
+    """
+    rule_id: str
+    product_codes: Tuple[str, ...]
+    percent: float
+    valid_from: Optional[float] = None
+    valid_until: Optional[float] = None
+
+
+PricingRule = Union[VolumeDiscount, PercentOff, BundleDiscount]
+
+
+@dataclass(frozen=True)
+class LineDiscount:
+    """
+    Descuento elegido para una línea del carrito.
+    """
+    amount: float
+    rule_id: str
+
+
+# Claves de los índices: por código, por ubicación o de toda la tienda.
+_STORE_WIDE: Hashable = None
+
+
+def _scope_key(rule: Union[VolumeDiscount, PercentOff]) -> Hashable:
+    if rule.product_code is not None and rule.location is not None:
+        raise ValidationError(
+            f"La regla {rule.rule_id} debe aplicar a un producto o a una ubicación, no a ambos."
+        )
+    if rule.product_code is not None:
+        return ("code", rule.product_code)
+    if rule.location is not None:
+        return ("location", rule.location)
+    return _STORE_WIDE
+
+
+def _validate_percent(rule: PricingRule) -> None:
+    if isinstance(rule.percent, bool) or not 0 < rule.percent <= 100:
+        raise ValidationError(f"El porcentaje de la regla {rule.rule_id} debe estar entre 0 y 100.")
+
+
+def _is_active(rule: PricingRule, now: float) -> bool:
+    if rule.valid_from is not None and now < rule.valid_from:
+        return False
+    return rule.valid_until is None or now < rule.valid_until
+
+
+class _VolumeTiers:
+    """
+    Escalones de una clave, ordenados por cantidad mínima, con el mejor
+    porcentaje alcanzable desde cada escalón (búsqueda con bisect).
+    """
+
+    __slots__ = ("minimums", "best")
+
+    def __init__(self, rules: List[VolumeDiscount]) -> None:
+        rules = sorted(rules, key=lambda rule: rule.min_quantity)
+        self.minimums = [rule.min_quantity for rule in rules]
+        self.best: List[Tuple[float, str]] = []
+        for rule in rules:
+            if not self.best or rule.percent > self.best[-1][0]:
+                self.best.append((rule.percent, rule.rule_id))
+            else:
+                self.best.append(self.best[-1])
+
+    def for_quantity(self, quantity: int) -> Optional[Tuple[float, str]]:
+        position = bisect_right(self.minimums, quantity)
+        return self.best[position - 1] if position else None
+
+
+# ==========
+# Motor de precios
+# ==========
+
+
+class _CompiledRules:
+    """
+    Índices de las reglas activas en [active_from, active_until): en
+    ese intervalo no empieza ni vence ninguna regla.
+    """
+
+    __slots__ = ("volume", "percent", "bundles", "rule_count", "active_from", "active_until")
+
+    def __init__(self, rules: List[PricingRule], now: float) -> None:
+        volume: Dict[Hashable, List[VolumeDiscount]] = {}
+        self.percent: Dict[Hashable, Tuple[float, str]] = {}
+        self.bundles: Dict[str, List[BundleDiscount]] = {}
+        self.rule_count = 0
+        self.active_from = -math.inf
+        self.active_until = math.inf
+
+        for rule in rules:
+            for boundary in (rule.valid_from, rule.valid_until):
+                if boundary is None:
+                    continue
+                if boundary <= now:
+                    self.active_from = max(self.active_from, boundary)
+                else:
+                    self.active_until = min(self.active_until, boundary)
+            if not _is_active(rule, now):
+                continue
+            self.rule_count += 1
+
+            if isinstance(rule, BundleDiscount):
+                for code in set(rule.product_codes):
+                    self.bundles.setdefault(code, []).append(rule)
+            elif isinstance(rule, VolumeDiscount):
+                volume.setdefault(_scope_key(rule), []).append(rule)
+            else:
+                key = _scope_key(rule)
+                current = self.percent.get(key)
+                if current is None or rule.percent > current[0]:
+                    self.percent[key] = (rule.percent, rule.rule_id)
+
+        self.volume = {key: _VolumeTiers(rules) for key, rules in volume.items()}
+
+
+class PricingEngine:
+    """
+    Reglas activas compiladas en índices, para valorizar un carrito en
+    una sola pasada sin recorrer todas las reglas por línea.
+
+    - Volumen y porcentaje: un índice por clave (código, ubicación,
+      tienda). Cada línea consulta solo sus tres claves.
+    - Combos: índice código -> combos que lo incluyen. Solo se evalúan
+      los combos que tocan algún producto del carrito.
+
+    Los descuentos no se acumulan: cada línea recibe el mayor de los
+    que le aplican. Los índices se compilan para el intervalo en que
+    no cambia el conjunto de reglas activas; una venta fuera de ese
+    intervalo (empezó o venció una promoción) los recompila. Si cambian
+    las promociones, se crea un motor nuevo (ver SaleService.set_pricing).
+    """
+
+    def __init__(
+        self,
+        rules: Iterable[PricingRule],
+        now: Optional[float] = None,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self._clock = clock
+        self._rules: List[PricingRule] = []
+        for rule in rules:
+            _validate_percent(rule)
+            if isinstance(rule, BundleDiscount):
+                if len(set(rule.product_codes)) < 2:
+                    raise ValidationError(f"El combo {rule.rule_id} necesita al menos dos productos.")
+            else:
+                _scope_key(rule)
+                if isinstance(rule, VolumeDiscount):
+                    if isinstance(rule.min_quantity, bool) or rule.min_quantity < 1:
+                        raise ValidationError(
+                            f"La cantidad mínima de la regla {rule.rule_id} debe ser positiva."
+                        )
+            self._rules.append(rule)
+        self._compiled = _CompiledRules(self._rules, clock() if now is None else now)
+
+    @property
+    def rule_count(self) -> int:
+        """
+        Reglas activas en la última compilación.
+        """
+        return self._compiled.rule_count
+
+    def _rules_at(self, now: float) -> _CompiledRules:
+        compiled = self._compiled
+        if not compiled.active_from <= now < compiled.active_until:
+            compiled = self._compiled = _CompiledRules(self._rules, now)
+        return compiled
+
+    def discounts(
+        self, lines: List[Tuple[Product, int]], now: Optional[float] = None
+    ) -> List[Optional[LineDiscount]]:
+        """
+        Descuento de cada línea (producto, cantidad) del carrito, o
+        None si no le aplica ninguno, con las reglas activas en `now`
+        (por defecto, el reloj del motor). Las cantidades de un mismo
+        código en varias líneas se suman para los escalones de volumen.
+        """
+        rules = self._rules_at(self._clock() if now is None else now)
+        quantities: Dict[str, int] = {}
+        for product, quantity in lines:
+            quantities[product.code] = quantities.get(product.code, 0) + quantity
+
+        # Unidades con descuento de combo que le quedan a cada código.
+        bundle_units = _bundle_units(rules.bundles, quantities) if rules.bundles else {}
+
+        result: List[Optional[LineDiscount]] = []
+        for product, quantity in lines:
+            gross = product.price * quantity
+            best_percent = 0.0
+            best_rule: Optional[str] = None
+            for key in (("code", product.code), ("location", product.location), _STORE_WIDE):
+                tiers = rules.volume.get(key)
+                if tiers is not None:
+                    tier = tiers.for_quantity(quantities[product.code])
+                    if tier is not None and tier[0] > best_percent:
+                        best_percent, best_rule = tier
+                flat = rules.percent.get(key)
+                if flat is not None and flat[0] > best_percent:
+                    best_percent, best_rule = flat
+            best_amount = gross * best_percent / 100
+
+            for offer in bundle_units.get(product.code, ()):
+                units = min(offer[1], quantity)
+                amount = product.price * units * offer[0] / 100
+                if amount > best_amount:
+                    best_amount, best_rule = amount, offer[2]
+            if bundle_units.get(product.code):
+                # Las unidades de combo usadas en esta línea no se repiten
+                # en otra línea del mismo código.
+                bundle_units[product.code] = [
+                    [percent, units - min(units, quantity), rule_id]
+                    for percent, units, rule_id in bundle_units[product.code]
+                ]
+
+            if best_rule is None or best_amount <= 0:
+                result.append(None)
+            else:
+                result.append(LineDiscount(amount=round(best_amount, 2), rule_id=best_rule))
+        return result
+
+
+
+def _bundle_units(
+    bundles: Dict[str, List[BundleDiscount]], quantities: Dict[str, int]
+) -> Dict[str, List[list]]:
+    offers: Dict[str, List[list]] = {}
+    seen = set()
+    for code in quantities:
+        for bundle in bundles.get(code, ()):
+            if bundle in seen:
+                continue
+            seen.add(bundle)
+            per_set = Counter(bundle.product_codes)
+            sets = min(quantities.get(member, 0) // count for member, count in per_set.items())
+            if sets <= 0:
+                continue
+            for member, count in per_set.items():
+                offers.setdefault(member, []).append([bundle.percent, sets * count, bundle.rule_id])
+    return offers
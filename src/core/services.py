@@ -1,8 +1,17 @@
-from dataclasses import dataclass
-from typing import List
-from .models import Product, Cart, CartItem
+import random
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass, replace
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Set
+from .models import Product, ProductSearchResult, Cart, CartItem
+from .locks import KeyedLocks
+from .metrics import MetricsSink, count_repository_calls, instrumented, measure_stage
 from .ports import ProductRepository, SaleRepository
-from .errors import DomainError, ValidationError
+from .errors import ConcurrencyError, DomainError, ValidationError
+from .events import StockEventBus
+from .idempotency import IdempotencyIndex, _sanitize_idempotency_key
+from .pricing import LineDiscount, PricingEngine
 
 
 # ==========
@@ -11,6 +20,14 @@ from .errors import DomainError, ValidationError
 
 _MAX_CODE_LENGTH = 50
 _MAX_NAME_LENGTH = 100
+_MAX_SEARCH_PAGE_SIZE = 100
+
+# Reintentos de los guardados condicionales de stock: espera exponencial
+# (1 ms, 2 ms, 4 ms... hasta 50 ms) con jitter completo, para que las
+# cajas que chocaron no vuelvan a intentar todas a la vez.
+_STOCK_WRITE_ATTEMPTS = 8
+_STOCK_RETRY_BASE_DELAY = 0.001
+_STOCK_RETRY_MAX_DELAY = 0.05
 
 
 def _sanitize_product_code(code: str) -> str:
@@ -40,23 +57,264 @@ def _sanitize_price(price: float) -> float:
     return price
 
 
+def _sanitize_product_name(name: str) -> str:
+    if not isinstance(name, str):
+        raise ValidationError("El nombre del producto debe ser texto.")
+    name = name.strip()
+    if not name:
+        raise ValidationError("El nombre del producto no puede estar vacío.")
+    if len(name) > _MAX_NAME_LENGTH:
+        raise ValidationError("El nombre del producto es demasiado largo.")
+    return name
+
+
+def _sanitize_stock(stock: int) -> int:
+    if not isinstance(stock, int) or isinstance(stock, bool):
+        raise ValidationError("El stock debe ser un número entero.")
+    if stock < 0:
+        raise ValidationError("El stock no puede ser negativo.")
+    return stock
+
+
+def _sanitize_search_text(text: str) -> str:
+    if not isinstance(text, str):
+        raise ValidationError("El texto de búsqueda debe ser texto.")
+    text = text.strip()
+    if len(text) > _MAX_NAME_LENGTH:
+        raise ValidationError("El texto de búsqueda es demasiado largo.")
+    return text
+
+
+def _sanitize_page(offset: int, limit: int) -> None:
+    if not isinstance(offset, int) or offset < 0:
+        raise ValidationError("El desplazamiento de la página no puede ser negativo.")
+    if not isinstance(limit, int) or not 0 < limit <= _MAX_SEARCH_PAGE_SIZE:
+        raise ValidationError(
+            f"El tamaño de página debe estar entre 1 y {_MAX_SEARCH_PAGE_SIZE}."
+        )
+
+
+def _validate_cart_not_empty(cart: Cart) -> None:
+    if cart.is_empty():
+        raise DomainError("El carrito está vacío. No se puede confirmar la venta.")
+
+
+def _sum_requested_quantities(items: List[CartItem]) -> Dict[str, int]:
+    """
+    Sanitiza las líneas del carrito y acumula la cantidad pedida
+    por código (dos líneas con el mismo código limpio se suman).
+    """
+    requested: Dict[str, int] = {}
+    for item in items:
+        code = _sanitize_product_code(item.product_code)
+        quantity = _sanitize_quantity(item.quantity)
+        requested[code] = requested.get(code, 0) + quantity
+    return requested
+
+
+def _validate_availability(
+    requested: Dict[str, int],
+    products: Dict[str, Product],
+    stock_left: Optional[Dict[str, int]] = None,
+) -> None:
+    """
+    Reglas de disponibilidad para un carrito ya sanitizado: cada
+    producto debe existir, tener precio válido y stock suficiente.
+    Con `stock_left` se compara contra ese stock (lo que queda tras
+    otros carritos del mismo lote) en lugar de `product.stock`.
+    """
+    for code, quantity in requested.items():
+        product = products.get(code)
+        if product is None:
+            raise DomainError("El producto solicitado no existe en el inventario.")
+
+        product.price = _sanitize_price(product.price)
+
+        available = product.stock if stock_left is None else stock_left[code]
+        if available < quantity:
+            raise DomainError("Stock insuficiente para la cantidad solicitada.")
+
+
+def _stock_changed_products(
+    changes: Dict[str, int],
+    products: Dict[str, Product],
+) -> List[Product]:
+    """
+    Calcula copias de los productos con su variación de stock aplicada
+    (negativa = descuento). Valida todas las líneas antes de devolver nada.
+    """
+    updated: List[Product] = []
+    for code, change in changes.items():
+        product = products.get(code)
+        if product is None:
+            raise DomainError("El producto no existe al intentar descontar stock.")
+        new_stock = product.stock + change
+        if new_stock < 0:
+            raise DomainError("La operación dejaría el stock en negativo.")
+        updated.append(replace(product, stock=new_stock))
+    return updated
+
+
+def _retry_delay(attempt: int) -> float:
+    """
+    Espera antes del reintento `attempt` (0, 1, 2...): exponencial
+    con tope y jitter completo.
+    """
+    ceiling = min(_STOCK_RETRY_MAX_DELAY, _STOCK_RETRY_BASE_DELAY * 2 ** attempt)
+    return random.uniform(0, ceiling)
+
+
 # ==========
 # Objetos de recibo
 # ==========
 
 @dataclass
 class ReceiptItem:
+    """
+    Línea del recibo. `total` ya descuenta `discount`; `promotion` es
+    la regla de precios que lo originó (ver core.pricing).
+    """
     product_code: str
     name: str
     quantity: int
     unit_price: float
     total: float
+    discount: float = 0.0
+    promotion: Optional[str] = None
 
 
 @dataclass
 class Receipt:
+    """
+    Recibo de una venta. `sale_id` y `timestamp` (segundos desde epoch)
+    se asignan al registrarla.
+    """
     items: List[ReceiptItem]
     grand_total: float
+    sale_id: Optional[str] = None
+    timestamp: Optional[float] = None
+
+
+def _new_sale_id() -> str:
+    # Aleatorio: cajas y procesos distintos no necesitan coordinarse.
+    return uuid.uuid4().hex
+
+
+@dataclass
+class SaleOutcome:
+    """
+    Resultado de un carrito dentro de confirm_sales:
+    trae el recibo si se vendió, o el error que lo rechazó.
+    """
+    receipt: Optional[Receipt] = None
+    error: Optional[DomainError] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def _sanitize_name_for_receipt(name: str) -> str:
+    """
+    Sanitiza el nombre del producto que se mostrará en el recibo.
+    (Defensa adicional ante nombres muy largos o con espacios raros)
+    """
+    if not isinstance(name, str):
+        return "Producto sin nombre"
+    clean = name.strip()
+    if not clean:
+        return "Producto sin nombre"
+    return clean[:_MAX_NAME_LENGTH]
+
+
+def _price_lines(
+    items: List[CartItem],
+    products: Dict[str, Product],
+    pricing: PricingEngine,
+    now: Optional[float] = None,
+) -> List[Optional[LineDiscount]]:
+    """
+    Descuento de cada línea del carrito según el motor de precios, con
+    las promociones vigentes en `now` (el momento de la venta).
+    """
+    lines = [
+        (products[_sanitize_product_code(item.product_code)], item.quantity)
+        for item in items
+    ]
+    return pricing.discounts(lines, now)
+
+
+def _build_receipt_lines(
+    items: List[CartItem],
+    products: Dict[str, Product],
+    discounts: Optional[List[Optional[LineDiscount]]] = None,
+) -> List[ReceiptItem]:
+    """
+    Una línea de recibo por cada línea del carrito, con los precios
+    de los productos ya validados y, si se indican, los descuentos
+    de cada línea (ver _price_lines).
+    """
+    receipt_items: List[ReceiptItem] = []
+
+    for position, item in enumerate(items):
+        product = products[_sanitize_product_code(item.product_code)]
+
+        line_total = product.price * item.quantity
+        discount = discounts[position] if discounts is not None else None
+        if discount is None:
+            receipt_items.append(
+                ReceiptItem(
+                    product_code=product.code,
+                    name=_sanitize_name_for_receipt(product.name),
+                    quantity=item.quantity,
+                    unit_price=product.price,
+                    total=line_total,
+                )
+            )
+            continue
+        receipt_items.append(
+            ReceiptItem(
+                product_code=product.code,
+                name=_sanitize_name_for_receipt(product.name),
+                quantity=item.quantity,
+                unit_price=product.price,
+                total=line_total - discount.amount,
+                discount=discount.amount,
+                promotion=discount.rule_id,
+            )
+        )
+
+    return receipt_items
+
+
+def _sale_payload(receipt: Receipt) -> dict:
+    """
+    Registro de venta que se entrega al SaleRepository.
+    """
+    payload = {
+        "items": [_sale_line(i) for i in receipt.items],
+        "grand_total": receipt.grand_total,
+    }
+    if receipt.sale_id is not None:
+        payload["sale_id"] = receipt.sale_id
+    if receipt.timestamp is not None:
+        payload["timestamp"] = receipt.timestamp
+    return payload
+
+
+def _sale_line(item: ReceiptItem) -> dict:
+    line = {
+        "product_code": item.product_code,
+        "name": item.name,
+        "quantity": item.quantity,
+        "unit_price": item.unit_price,
+        "total": item.total,
+    }
+    # Las líneas sin promoción conservan el formato de siempre.
+    if item.promotion is not None:
+        line["discount"] = item.discount
+        line["promotion"] = item.promotion
+    return line
 
 
 # ==========
@@ -67,11 +325,45 @@ class Receipt:
 class InventoryService:
     """
     Lógica de inventario: validación y descuento de stock.
+
+    Las escrituras de stock se serializan por código de producto,
+    de modo que varias cajas pueden vender en paralelo desde el
+    mismo proceso sin pisarse entre sí. Entre procesos distintos que
+    comparten el almacenamiento, el stock se guarda con escrituras
+    condicionales por versión (compare_and_save_many): si otro proceso
+    modificó el producto, se vuelve a leer y se reintenta con espera
+    exponencial, sin lock global y sin vender de más.
+
+    Con un `metrics` (MetricsSink) se miden las operaciones, las
+    llamadas al repositorio y los errores de dominio.
+
+    Con un `events` (StockEventBus) cada cambio de stock guardado se
+    publica con el stock anterior y el nuevo, mientras los códigos
+    siguen bloqueados (los eventos de un mismo producto llegan en orden).
     """
 
-    def __init__(self, product_repo: ProductRepository) -> None:
-        self._product_repo = product_repo
+    def __init__(
+        self,
+        product_repo: ProductRepository,
+        metrics: Optional[MetricsSink] = None,
+        events: Optional[StockEventBus] = None,
+    ) -> None:
+        self._metrics = metrics
+        self._events = events
+        self._component = "inventory"
+        self._product_repo = count_repository_calls(product_repo, metrics, "inventory", "product")
+        self._locks = KeyedLocks()
+
+    @contextmanager
+    def lock_products(self, codes: Iterable[str]) -> Iterator[None]:
+        """
+        Bloquea los códigos indicados (ya sanitizados) mientras dura
+        el bloque `with`. Los locks se toman en orden de código.
+        """
+        with self._locks.hold(codes):
+            yield
 
+    @instrumented("check_availability")
     def check_availability(self, product_code: str, quantity: int) -> Product:
         """
         Verifica que el producto exista, que el código sea válido,
@@ -91,6 +383,7 @@ class InventoryService:
 
         return product
 
+    @instrumented("discount_stock")
     def discount_stock(self, item: CartItem) -> None:
         """
         Descuenta del stock la cantidad vendida. Vuelve a validar
@@ -99,22 +392,153 @@ class InventoryService:
         product_code = _sanitize_product_code(item.product_code)
         clean_quantity = _sanitize_quantity(item.quantity)
 
-        product = self._product_repo.find_by_code(product_code)
-        if product is None:
-            raise DomainError("El producto no existe al intentar descontar stock.")
+        with self._locks.hold([product_code]):
+            self._change_stock({product_code: -clean_quantity})
 
-        new_stock = product.stock - clean_quantity
-        if new_stock < 0:
-            raise DomainError("La operación dejaría el stock en negativo.")
+    @instrumented("search_products")
+    def search_products(
+        self,
+        text: str,
+        location: Optional[str] = None,
+        offset: int = 0,
+        limit: int = 20,
+    ) -> ProductSearchResult:
+        """
+        Búsqueda del cajero por parte del nombre ("torn 1/4"),
+        opcionalmente filtrada por ubicación y paginada.
+        """
+        clean_text = _sanitize_search_text(text)
+        clean_location = _sanitize_search_text(location) if location is not None else None
+        _sanitize_page(offset, limit)
+        return self._product_repo.search(clean_text, clean_location, offset, limit)
+
+    @instrumented("check_items_availability")
+    def check_items_availability(self, items: List[CartItem]) -> Dict[str, Product]:
+        """
+        Versión por lotes de check_availability: consulta todos los
+        productos del carrito con una sola llamada al repositorio.
+        Devuelve un diccionario código limpio -> producto.
+        """
+        requested = _sum_requested_quantities(items)
+        products = self._product_repo.find_by_codes(requested.keys())
+        _validate_availability(requested, products)
+        return products
+
+    @instrumented("discount_items_stock")
+    def discount_items_stock(
+        self,
+        items: List[CartItem],
+        products: Dict[str, Product],
+    ) -> Dict[str, Product]:
+        """
+        Versión por lotes de discount_stock sobre productos ya consultados.
+        Valida todas las líneas antes de modificar nada y guarda
+        los productos con una sola llamada al repositorio (si no hubo
+        conflictos con otro proceso).
+
+        Los productos recibidos no se modifican: se guardan copias con
+        el nuevo stock, que es lo que se devuelve.
+        El llamador debe tener bloqueados los códigos (lock_products).
+        """
+        requested = _sum_requested_quantities(items)
+        return self._change_stock(
+            {code: -quantity for code, quantity in requested.items()}, products
+        )
+
+    def find_products(self, codes: Iterable[str]) -> Dict[str, Product]:
+        """
+        Consulta varios productos (códigos ya sanitizados) con una sola
+        llamada al repositorio, sin validar stock.
+        """
+        return self._product_repo.find_by_codes(codes)
+
+    @instrumented("set_stock_levels")
+    def set_stock_levels(
+        self,
+        products: Dict[str, Product],
+        stock_levels: Dict[str, int],
+    ) -> None:
+        """
+        Guarda en una sola llamada el nuevo stock de varios productos.
+        Lo que se aplica es la diferencia respecto de los productos
+        recibidos, de modo que si otro proceso cambió el stock mientras
+        tanto su cambio se conserva. Igual que discount_items_stock,
+        guarda copias y no modifica los productos recibidos.
+        El llamador debe tener bloqueados los códigos.
+        """
+        changes: Dict[str, int] = {}
+        for code, stock in stock_levels.items():
+            if stock < 0:
+                raise DomainError("La operación dejaría el stock en negativo.")
+            changes[code] = stock - products[code].stock
+        self._change_stock(changes, products)
+
+    @instrumented("release_stock")
+    def release_stock(self, quantities: Dict[str, int]) -> None:
+        """
+        Devuelve al stock cantidades ya descontadas (códigos sanitizados).
+        Se usa para deshacer un descuento cuando la venta no pudo
+        completarse; suma sobre el stock actual, así no pisa lo que otro
+        proceso haya vendido entre medio. El llamador debe tener
+        bloqueados los códigos.
+        """
+        self._change_stock(quantities)
 
-        product.stock = new_stock
-        self._product_repo.save(product)
+    def restore_products(self, products: Iterable[Product]) -> None:
+        """
+        Vuelve a guardar tal cual el estado previo de los productos
+        (guardado incondicional: solo es seguro si ningún otro proceso
+        escribe el mismo almacenamiento; en ese caso usar release_stock).
+        El llamador debe tener bloqueados los códigos.
+        """
+        self._product_repo.save_many(products)
+
+    def _change_stock(
+        self,
+        changes: Dict[str, int],
+        products: Optional[Dict[str, Product]] = None,
+    ) -> Dict[str, Product]:
+        """
+        Aplica variaciones de stock con un guardado condicional por versión.
+        Si otro proceso modificó alguno de los productos, vuelve a leer
+        solo esos, revalida (el stock nunca queda negativo) y reintenta
+        con espera exponencial. Devuelve los productos guardados.
+        """
+        current = dict(products) if products is not None else (
+            self._product_repo.find_by_codes(changes.keys())
+        )
+        for attempt in range(_STOCK_WRITE_ATTEMPTS):
+            updated = _stock_changed_products(changes, current)
+            conflicts = self._product_repo.compare_and_save_many(updated)
+            if not conflicts:
+                if self._events is not None:
+                    self._events.publish((p.code, current[p.code].stock, p.stock) for p in updated)
+                return {p.code: replace(p, version=p.version + 1) for p in updated}
+            time.sleep(_retry_delay(attempt))
+            current.update(self._product_repo.find_by_codes(conflicts))
+        raise ConcurrencyError(
+            "No se pudo actualizar el stock: otra operación lo modifica al mismo tiempo."
+        )
 
 
 class SaleService:
     """
     Lógica de venta: valida el carrito, descuenta stock,
     registra la venta y genera un recibo.
+
+    Con un `metrics` (MetricsSink) se mide cada etapa de la venta
+    (validation, pricing, build_receipt_items, apply_stock_discount,
+    register_sale), las llamadas al repositorio de ventas y los
+    errores de dominio.
+
+    Las ventas confirmadas con `idempotency_key` se recuerdan en un
+    IdempotencyIndex (uno propio si no se pasa `idempotency_index`).
+
+    Con un `pricing` (PricingEngine) cada línea recibe su descuento en
+    una etapa propia (pricing) entre la validación y el recibo.
+
+    Cada venta registrada lleva un `sale_id` único y el `timestamp` de
+    `clock` (por defecto, time.time).
     """
 
     def __init__(
@@ -122,93 +546,224 @@ class SaleService:
         product_repo: ProductRepository,
         sale_repo: SaleRepository,
         inventory_service: InventoryService,
+        metrics: Optional[MetricsSink] = None,
+        idempotency_index: Optional[IdempotencyIndex] = None,
+        pricing: Optional[PricingEngine] = None,
+        clock: Callable[[], float] = time.time,
     ) -> None:
+        self._metrics = metrics
+        self._component = "sale"
         self._product_repo = product_repo
-        self._sale_repo = sale_repo
+        self._sale_repo = count_repository_calls(sale_repo, metrics, "sale", "sale")
         self._inventory_service = inventory_service
+        self._idempotency = idempotency_index if idempotency_index is not None else IdempotencyIndex()
+        self._pricing = pricing
+        self._clock = clock
 
-    def confirm_sale(self, cart: Cart) -> Receipt:
+    def set_pricing(self, pricing: Optional[PricingEngine]) -> None:
         """
-        Punto de entrada principal del módulo Core para confirmar una venta.
+        Reemplaza el motor de precios (p. ej. al cambiar las promociones).
+        Las ventas en curso terminan con el motor que tomaron al empezar.
         """
-        self._validate_cart_not_empty(cart)
+        self._pricing = pricing
 
-        receipt_items = self._build_receipt_items(cart)
-        grand_total = sum(item.total for item in receipt_items)
+    @instrumented("confirm_sale")
+    def confirm_sale(self, cart: Cart, idempotency_key: Optional[str] = None) -> Receipt:
+        """
+        Punto de entrada principal del módulo Core para confirmar una venta.
 
-        self._apply_stock_discount(cart)
-        self._register_sale(receipt_items, grand_total)
+        La venta es todo o nada: los productos del carrito quedan
+        bloqueados desde la validación hasta el registro, y si algo
+        falla después de descontar stock, el descuento se revierte.
 
-        return Receipt(items=receipt_items, grand_total=grand_total)
+        Con `idempotency_key` (p. ej. un UUID que la caja genera por
+        venta y repite en sus reintentos), una venta ya confirmada con
+        esa clave devuelve el mismo recibo sin tocar el inventario. Si
+        la primera sigue en curso, el reintento la espera. Usar la
+        misma clave con otro carrito es un ValidationError.
+        """
+        _validate_cart_not_empty(cart)
+
+        # Una sola lectura del carrito y una sola consulta al repositorio:
+        # las llamadas por venta no dependen de la cantidad de líneas.
+        items = cart.get_items()
+        requested = _sum_requested_quantities(items)
+
+        if idempotency_key is None:
+            return self._confirm_sale(items, requested)
+
+        key = _sanitize_idempotency_key(idempotency_key)
+        stored = self._idempotency.begin(key, fingerprint=tuple(sorted(requested.items())))
+        if stored is not None:
+            return stored
+        try:
+            receipt = self._confirm_sale(items, requested)
+        except BaseException:
+            # La venta no ocurrió: un reintento con la misma clave la ejecuta.
+            self._idempotency.abandon(key)
+            raise
+        self._idempotency.complete(key, receipt)
+        return receipt
+
+    def _confirm_sale(self, items: List[CartItem], requested: Dict[str, int]) -> Receipt:
+        metrics = self._metrics
+        with self._inventory_service.lock_products(requested.keys()):
+            with measure_stage(metrics, "sale", "validation"):
+                products = self._inventory_service.check_items_availability(items)
+
+            timestamp = self._clock()
+            discounts = self._price_items(items, products, timestamp)
+
+            with measure_stage(metrics, "sale", "build_receipt_items"):
+                receipt_items = self._build_receipt_items(items, products, discounts)
+                receipt = self._new_receipt(receipt_items, timestamp)
+
+            # El descuento es todo o nada: si falla, no hay nada que revertir.
+            with measure_stage(metrics, "sale", "apply_stock_discount"):
+                self._apply_stock_discount(items, products)
+            try:
+                with measure_stage(metrics, "sale", "register_sale"):
+                    self._register_sale(receipt)
+            except Exception:
+                self._inventory_service.release_stock(requested)
+                raise
+
+        return receipt
 
     # ----- Métodos privados (Clean Code: funciones cortas) -----
 
-    @staticmethod
-    def _validate_cart_not_empty(cart: Cart) -> None:
-        if cart.is_empty():
-            raise DomainError("El carrito está vacío. No se puede confirmar la venta.")
-
-    def _build_receipt_items(self, cart: Cart) -> List[ReceiptItem]:
+    @instrumented("confirm_sales")
+    def confirm_sales(
+        self, carts: List[Cart], timestamp: Optional[float] = None
+    ) -> List[SaleOutcome]:
         """
-        Valida disponibilidad de cada ítem del carrito y construye
-        las líneas del recibo.
+        Confirma un lote de carritos (p. ej. los que una caja guardó
+        mientras estaba sin conexión) tocando el inventario una sola vez.
+        Con `timestamp`, todas las ventas del lote llevan ese momento
+        (y se valorizan con las promociones vigentes en él); si no, cada
+        una toma el de `clock`.
+
+        - Todos los productos del lote se consultan con una sola llamada,
+          el stock se guarda con una sola llamada y las ventas se
+          registran con un solo save_sales.
+        - Los carritos se atienden en el orden recibido: si el stock no
+          alcanza, gana el que llegó antes. Un carrito que no alcanza se
+          rechaza completo (sin ventas parciales), y los siguientes que
+          sí alcancen con lo que queda se venden igual.
+        - Devuelve un SaleOutcome por carrito, en el mismo orden.
+
+        Si falla la escritura del lote (repositorio caído), se revierte
+        el stock y se propaga el error: no se vende ningún carrito.
+        Lo mismo si otro proceso vendió entre medio y el stock ya no
+        alcanza para el lote (DomainError) o si los conflictos persisten
+        tras los reintentos (ConcurrencyError).
         """
-        receipt_items: List[ReceiptItem] = []
-
-        for item in cart.get_items():
-            product = self._inventory_service.check_availability(
-                item.product_code,
-                item.quantity,
-            )
-
-            line_total = product.price * item.quantity
-            receipt_items.append(
-                ReceiptItem(
-                    product_code=product.code,
-                    name=self._sanitize_name_for_receipt(product.name),
-                    quantity=item.quantity,
-                    unit_price=product.price,
-                    total=line_total,
-                )
-            )
+        metrics = self._metrics
+        outcomes: List[Optional[SaleOutcome]] = [None] * len(carts)
+
+        prepared = []
+        for position, cart in enumerate(carts):
+            try:
+                _validate_cart_not_empty(cart)
+                items = cart.get_items()
+                prepared.append((position, items, _sum_requested_quantities(items)))
+            except DomainError as exc:
+                outcomes[position] = SaleOutcome(error=exc)
+
+        codes = {code for _, _, requested in prepared for code in requested}
+
+        with self._inventory_service.lock_products(codes):
+            with measure_stage(metrics, "sale", "validation"):
+                products = self._inventory_service.find_products(codes)
+                stock_left = {code: product.stock for code, product in products.items()}
+
+            accepted: List[Receipt] = []
+            sold_codes: Set[str] = set()
+            for position, items, requested in prepared:
+                try:
+                    _validate_availability(requested, products, stock_left)
+                except DomainError as exc:
+                    outcomes[position] = SaleOutcome(error=exc)
+                    continue
+                for code, quantity in requested.items():
+                    stock_left[code] -= quantity
+                sold_codes.update(requested)
+
+                sold_at = self._clock() if timestamp is None else timestamp
+                discounts = self._price_items(items, products, sold_at)
+                with measure_stage(metrics, "sale", "build_receipt_items"):
+                    receipt = self._new_receipt(
+                        self._build_receipt_items(items, products, discounts), sold_at
+                    )
+                outcomes[position] = SaleOutcome(receipt=receipt)
+                accepted.append(receipt)
+
+            if accepted:
+                with measure_stage(metrics, "sale", "apply_stock_discount"):
+                    self._inventory_service.set_stock_levels(
+                        products, {code: stock_left[code] for code in sold_codes}
+                    )
+                try:
+                    with measure_stage(metrics, "sale", "register_sale"):
+                        self._sale_repo.save_sales(
+                            [_sale_payload(r) for r in accepted]
+                        )
+                except Exception:
+                    self._inventory_service.release_stock(
+                        {code: products[code].stock - stock_left[code] for code in sold_codes}
+                    )
+                    raise
+
+        return outcomes  # type: ignore[return-value]
+
+    def _price_items(
+        self,
+        items: List[CartItem],
+        products: Dict[str, Product],
+        now: float,
+    ) -> Optional[List[Optional[LineDiscount]]]:
+        """
+        Descuentos de cada línea con las promociones vigentes en `now`,
+        o None si no hay motor de precios.
+        """
+        pricing = self._pricing
+        if pricing is None:
+            return None
+        with measure_stage(self._metrics, "sale", "pricing"):
+            return _price_lines(items, products, pricing, now)
 
-        return receipt_items
+    def _build_receipt_items(
+        self,
+        items: List[CartItem],
+        products: Dict[str, Product],
+        discounts: Optional[List[Optional[LineDiscount]]] = None,
+    ) -> List[ReceiptItem]:
+        """
+        Construye las líneas del recibo a partir de los productos
+        ya validados por el servicio de inventario.
+        """
+        return _build_receipt_lines(items, products, discounts)
 
-    def _apply_stock_discount(self, cart: Cart) -> None:
+    def _apply_stock_discount(
+        self,
+        items: List[CartItem],
+        products: Dict[str, Product],
+    ) -> None:
         """
         Descuenta del inventario todas las cantidades del carrito.
         """
-        for item in cart.get_items():
-            self._inventory_service.discount_stock(item)
+        self._inventory_service.discount_items_stock(items, products)
+
+    def _new_receipt(self, receipt_items: List[ReceiptItem], timestamp: float) -> Receipt:
+        return Receipt(
+            items=receipt_items,
+            grand_total=sum(item.total for item in receipt_items),
+            sale_id=_new_sale_id(),
+            timestamp=timestamp,
+        )
 
-    def _register_sale(self, receipt_items: List[ReceiptItem], grand_total: float) -> None:
+    def _register_sale(self, receipt: Receipt) -> None:
         """
         Registra la venta en el repositorio de ventas.
         """
-        sale_payload = {
-            "items": [
-                {
-                    "product_code": i.product_code,
-                    "name": i.name,
-                    "quantity": i.quantity,
-                    "unit_price": i.unit_price,
-                    "total": i.total,
-                }
-                for i in receipt_items
-            ],
-            "grand_total": grand_total,
-        }
-        self._sale_repo.save_sale(sale_payload)
-
-    @staticmethod
-    def _sanitize_name_for_receipt(name: str) -> str:
-        """
-        Sanitiza el nombre del producto que se mostrará en el recibo.
-        (Defensa adicional ante nombres muy largos o con espacios raros)
-        """
-        if not isinstance(name, str):
-            return "Producto sin nombre"
-        clean = name.strip()
-        if not clean:
-            return "Producto sin nombre"
-        return clean[:_MAX_NAME_LENGTH]
+        self._sale_repo.save_sale(_sale_payload(receipt))
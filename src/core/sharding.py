@@ -0,0 +1,527 @@
+import threading
+import time
+import uuid
+import zlib
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from itertools import count
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from .errors import DomainError
+from .models import Cart, CartItem, Product, SalePage
+from .pricing import PricingEngine
+from .ports import ProductRepository, SaleRepository
+from .services import (
+    InventoryService,
+    Receipt,
+    ReceiptItem,
+    SaleOutcome,
+    SaleService,
+    _build_receipt_lines,
+    _new_sale_id,
+    _price_lines,
+    _sale_payload,
+    _sanitize_product_code,
+    _sum_requested_quantities,
+    _validate_cart_not_empty,
+)
+
+
+def shard_of(code: str, shard_count: int) -> int:
+    """
+    Shard dueño de un código (ya sanitizado). Usa crc32 y no hash(),
+    que cambia entre procesos y ejecuciones.
+    """
+    return zlib.crc32(code.encode("utf-8")) % shard_count
+
+
+@dataclass
+class ShardOperation:
+    """
+    Operación sobre un shard. Sin `txid`, vende el carrito completo
+    (todas sus líneas viven en ese shard). Con `txid`, es la fase de
+    preparación de una venta repartida entre varios shards: descuenta
+    y reserva el stock hasta que llegue el commit o el abort.
+    `timestamp` es el momento de la venta, con el que se valorizan las
+    líneas (sin él, el reloj del shard).
+    """
+    cart: Cart
+    txid: Optional[str] = None
+    timestamp: Optional[float] = None
+
+
+class InventoryShard(ABC):
+    """
+    Puerto (interfaz) de un shard de inventario: dueño exclusivo de
+    los productos cuyo código le corresponde según shard_of.
+    """
+
+    @abstractmethod
+    def load(self, products: List[Product]) -> None:
+        ...
+
+    @abstractmethod
+    def find_by_codes(self, codes: List[str]) -> Dict[str, Product]:
+        ...
+
+    @abstractmethod
+    def execute(self, operations: List[ShardOperation]) -> List[SaleOutcome]:
+        """
+        Ejecuta las operaciones en orden y devuelve un SaleOutcome por
+        cada una (en las preparaciones, el recibo trae solo las líneas
+        de este shard).
+        """
+        ...
+
+    @abstractmethod
+    def finish(self, commit: List[str], abort: List[str]) -> None:
+        """
+        Segunda fase: confirma o deshace las reservas preparadas.
+        """
+        ...
+
+    @abstractmethod
+    def release(self, quantities: Dict[str, int]) -> None:
+        """
+        Devuelve stock de ventas completas que no pudieron registrarse.
+        """
+        ...
+
+
+class _UnrecordedSales(SaleRepository):
+    """
+    Repositorio de ventas vacío para el SaleService de cada shard:
+    las ventas las registra el coordinador, que ve el carrito completo.
+    """
+
+    def save_sale(self, data: dict) -> None:
+        pass
+
+    def save_sales(self, sales: List[dict]) -> None:
+        pass
+
+    def page_sales(self, since: int = 0, limit: int = 500) -> SalePage:
+        return SalePage(items=[], next_token=since)
+
+
+class LocalInventoryShard(InventoryShard):
+    """
+    Shard en el mismo proceso, sobre su propio ProductRepository.
+    Es también lo que ejecuta cada proceso trabajador de un
+    inventario repartido (ver infra.process_shards).
+
+    Con un `pricing` (PricingEngine) valoriza sus líneas con las
+    promociones vigentes en el `timestamp` de cada operación. Solo ve
+    su parte del carrito: un combo con productos de otro shard no se
+    aplica.
+    """
+
+    def __init__(
+        self, product_repo: ProductRepository, pricing: Optional[PricingEngine] = None
+    ) -> None:
+        self._product_repo = product_repo
+        self._pricing = pricing
+        self._inventory = InventoryService(product_repo)
+        self._sales = SaleService(
+            product_repo, _UnrecordedSales(), self._inventory, pricing=pricing
+        )
+        self._prepared: Dict[str, Dict[str, int]] = {}
+
+    def load(self, products: List[Product]) -> None:
+        self._product_repo.save_many(products)
+
+    def find_by_codes(self, codes: List[str]) -> Dict[str, Product]:
+        return self._product_repo.find_by_codes(codes)
+
+    def execute(self, operations: List[ShardOperation]) -> List[SaleOutcome]:
+        """
+        Si una operación lanza una excepción, antes de propagarla se
+        devuelve lo que el lote ya había vendido o reservado: el lote
+        no deja stock descontado que el coordinador no conozca.
+        """
+        outcomes: List[SaleOutcome] = []
+        # Ventas completas que el lote ya descontó.
+        sold: List[Receipt] = []
+        # Las ventas completas consecutivas (del mismo momento) se
+        # confirman juntas: un solo acceso al repositorio. Las
+        # preparaciones, de a una.
+        pending: List[Cart] = []
+        pending_at: Optional[float] = None
+        try:
+            for operation in operations:
+                if pending and (operation.txid is not None or operation.timestamp != pending_at):
+                    outcomes.extend(self._confirm(pending, pending_at, sold))
+                    pending = []
+                if operation.txid is None:
+                    pending.append(operation.cart)
+                    pending_at = operation.timestamp
+                else:
+                    outcomes.append(self._prepare(operation))
+            if pending:
+                outcomes.extend(self._confirm(pending, pending_at, sold))
+        except Exception:
+            self._undo_batch(sold, [op.txid for op in operations if op.txid is not None])
+            raise
+        return outcomes
+
+    def finish(self, commit: List[str], abort: List[str]) -> None:
+        for txid in commit:
+            self._prepared.pop(txid, None)
+        for txid in abort:
+            quantities = self._prepared.pop(txid, None)
+            if quantities is not None:
+                self._release(quantities)
+
+    def release(self, quantities: Dict[str, int]) -> None:
+        self._release(quantities)
+
+    def _prepare(self, operation: ShardOperation) -> SaleOutcome:
+        items = operation.cart.get_items()
+        try:
+            requested = _sum_requested_quantities(items)
+            with self._inventory.lock_products(requested.keys()):
+                products = self._inventory.check_items_availability(items)
+                self._inventory.discount_items_stock(items, products)
+        except DomainError as exc:
+            return SaleOutcome(error=exc)
+        self._prepared[operation.txid] = requested
+        discounts = None
+        if self._pricing is not None:
+            discounts = _price_lines(items, products, self._pricing, operation.timestamp)
+        lines = _build_receipt_lines(items, products, discounts)
+        return SaleOutcome(receipt=Receipt(items=lines, grand_total=sum(i.total for i in lines)))
+
+    def _release(self, quantities: Dict[str, int]) -> None:
+        with self._inventory.lock_products(quantities.keys()):
+            self._inventory.release_stock(quantities)
+
+    def _confirm(
+        self, carts: List[Cart], timestamp: Optional[float], sold: List[Receipt]
+    ) -> List[SaleOutcome]:
+        outcomes = self._sales.confirm_sales(carts, timestamp)
+        sold.extend(o.receipt for o in outcomes if o.receipt is not None)
+        return outcomes
+
+    def _undo_batch(self, sold: List[Receipt], txids: List[str]) -> None:
+        """
+        Devuelve el stock de las ventas completas y las reservas de un
+        lote que falló a mitad (las transacciones que no llegaron a
+        reservar se ignoran).
+        """
+        self.finish([], txids)
+        quantities: Dict[str, int] = {}
+        for receipt in sold:
+            for code, quantity in _sold_quantities(receipt).items():
+                quantities[code] = quantities.get(code, 0) + quantity
+        if quantities:
+            self._release(quantities)
+
+
+# ==========
+# Coordinador
+# ==========
+
+
+@dataclass
+class _Split:
+    """
+    Reparto de un carrito entre shards: para cada shard, el subcarrito
+    y las posiciones de sus líneas en el carrito original.
+    """
+    parts: Dict[int, Tuple[Cart, List[int]]]
+    line_count: int
+
+
+def _line_shards(items: List[CartItem], shard_count: int) -> List[int]:
+    """
+    Shard de cada línea. Solo se sanitiza el código (para enrutar); el
+    resto de la validación la hace el shard, que tiene los productos.
+    """
+    return [shard_of(_sanitize_product_code(item.product_code), shard_count) for item in items]
+
+
+def _split_cart(items: List[CartItem], line_shards: List[int]) -> _Split:
+    parts: Dict[int, Tuple[Cart, List[int]]] = {}
+    for position, (item, shard) in enumerate(zip(items, line_shards)):
+        if shard not in parts:
+            parts[shard] = (Cart(), [])
+        sub_cart, positions = parts[shard]
+        sub_cart.add_item(item.product_code, item.quantity)
+        positions.append(position)
+    return _Split(parts=parts, line_count=len(items))
+
+
+def _sold_quantities(receipt: Receipt) -> Dict[str, int]:
+    sold: Dict[str, int] = {}
+    for line in receipt.items:
+        sold[line.product_code] = sold.get(line.product_code, 0) + line.quantity
+    return sold
+
+
+class ShardedSaleService:
+    """
+    Venta sobre un inventario repartido en shards (p. ej. un proceso
+    trabajador por núcleo, cada uno dueño de sus productos), para no
+    quedar limitados por el GIL de un solo proceso.
+
+    - Cada línea del carrito va al shard dueño de su código (shard_of).
+    - Un carrito de un solo shard se vende ahí de una vez.
+    - Un carrito repartido sigue un protocolo de dos fases: cada shard
+      prepara su parte (valida, descuenta y reserva); si todas las
+      partes se prepararon, la venta se registra y se confirma en todos
+      los shards; si alguna falló, se deshacen las demás.
+    - Los lotes de confirm_sales se envían con una sola llamada por
+      shard y fase, y los shards trabajan en paralelo.
+
+    El registro de ventas es del coordinador: una venta solo queda
+    confirmada en los shards después de registrarse en `sale_repo`,
+    y es el coordinador quien le asigna `sale_id` y `timestamp` (`clock`).
+
+    Los descuentos los calcula cada shard (ver LocalInventoryShard) con
+    ese mismo `timestamp`, que viaja en cada ShardOperation: todas las
+    partes de un carrito se valorizan en el mismo instante. Los combos
+    que mezclan productos de shards distintos no se aplican.
+    """
+
+    def __init__(
+        self,
+        shards: List[InventoryShard],
+        sale_repo: SaleRepository,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        if not shards:
+            raise ValueError("Se necesita al menos un shard.")
+        self._shards = shards
+        self._sale_repo = sale_repo
+        self._clock = clock
+        self._executor = ThreadPoolExecutor(
+            max_workers=len(shards), thread_name_prefix="sigi-shard"
+        )
+        self._txid_prefix = uuid.uuid4().hex
+        self._txids = count()
+        self._txid_lock = threading.Lock()
+
+    @property
+    def shard_count(self) -> int:
+        return len(self._shards)
+
+    def load_products(self, products: Iterable[Product]) -> None:
+        batches: Dict[int, List[Product]] = {}
+        for product in products:
+            batches.setdefault(shard_of(product.code, len(self._shards)), []).append(product)
+        self._on_shards(
+            {shard: (lambda s=shard, b=batch: self._shards[s].load(b)) for shard, batch in batches.items()}
+        )
+
+    def find_products(self, codes: Iterable[str]) -> Dict[str, Product]:
+        by_shard: Dict[int, List[str]] = {}
+        for code in codes:
+            by_shard.setdefault(shard_of(code, len(self._shards)), []).append(code)
+        found: Dict[str, Product] = {}
+        results = self._on_shards(
+            {shard: (lambda s=shard, c=c: self._shards[s].find_by_codes(c)) for shard, c in by_shard.items()}
+        )
+        for products in results.values():
+            found.update(products)
+        return found
+
+    def confirm_sale(self, cart: Cart) -> Receipt:
+        (outcome,) = self.confirm_sales([cart])
+        if outcome.error is not None:
+            raise outcome.error
+        return outcome.receipt  # type: ignore[return-value]
+
+    def confirm_sales(self, carts: List[Cart]) -> List[SaleOutcome]:
+        """
+        Confirma un lote de carritos. Devuelve un SaleOutcome por carrito,
+        en el mismo orden. En cada shard las operaciones se aplican en el
+        orden recibido; una reserva que luego se deshace pudo haber dejado
+        sin stock a un carrito posterior del mismo lote.
+        """
+        shard_count = len(self._shards)
+        # Un solo momento para todo el lote: con él valorizan los shards
+        # y es el `timestamp` de los recibos.
+        now = self._clock()
+        outcomes: List[Optional[SaleOutcome]] = [None] * len(carts)
+        operations: Dict[int, List[ShardOperation]] = {}
+        # (posición del carrito, shard, índice de su operación en ese shard)
+        singles: List[Tuple[int, int, int]] = []
+        distributed: List[Tuple[int, str, _Split, Dict[int, int]]] = []
+
+        for position, cart in enumerate(carts):
+            try:
+                _validate_cart_not_empty(cart)
+                items = cart.get_items()
+                line_shards = _line_shards(items, shard_count)
+            except DomainError as exc:
+                outcomes[position] = SaleOutcome(error=exc)
+                continue
+
+            shard = line_shards[0]
+            if line_shards.count(shard) == len(line_shards):
+                queue = operations.setdefault(shard, [])
+                singles.append((position, shard, len(queue)))
+                queue.append(ShardOperation(cart=cart, timestamp=now))
+                continue
+
+            split = _split_cart(items, line_shards)
+            txid = self._next_txid()
+            indexes: Dict[int, int] = {}
+            for shard, (sub_cart, _) in split.parts.items():
+                queue = operations.setdefault(shard, [])
+                indexes[shard] = len(queue)
+                queue.append(ShardOperation(cart=sub_cart, txid=txid, timestamp=now))
+            distributed.append((position, txid, split, indexes))
+
+        # Fase 1: ventas completas y preparaciones, todos los shards en paralelo.
+        results, failures = self._try_on_shards(
+            {shard: (lambda s=shard, ops=ops: self._shards[s].execute(ops)) for shard, ops in operations.items()}
+        )
+        if failures:
+            # El shard que falló ya devolvió lo suyo (ver LocalInventoryShard.execute):
+            # los demás deshacen sus reservas y devuelven sus ventas completas.
+            self._undo_phase_one(singles, distributed, outcomes, results)
+            raise next(iter(failures.values()))
+
+        for position, shard, index in singles:
+            outcomes[position] = results[shard][index]
+
+        commit: Dict[int, List[str]] = {}
+        abort: Dict[int, List[str]] = {}
+        for position, txid, split, indexes in distributed:
+            parts = {shard: results[shard][index] for shard, index in indexes.items()}
+            error = next((o.error for o in parts.values() if o.error is not None), None)
+            decision = abort if error is not None else commit
+            for shard, outcome in parts.items():
+                # Una parte que falló no reservó nada, no hace falta avisarle.
+                if outcome.error is None:
+                    decision.setdefault(shard, []).append(txid)
+            if error is not None:
+                outcomes[position] = SaleOutcome(error=error)
+                continue
+            lines: List[Optional[ReceiptItem]] = [None] * split.line_count
+            for shard, (_, positions) in split.parts.items():
+                for line_position, line in zip(positions, parts[shard].receipt.items):
+                    lines[line_position] = line
+            receipt_items: List[ReceiptItem] = lines  # type: ignore[assignment]
+            outcomes[position] = SaleOutcome(
+                receipt=Receipt(items=receipt_items, grand_total=sum(i.total for i in receipt_items))
+            )
+
+        # Registro: punto de decisión del commit.
+        sold = [o.receipt for o in outcomes if o is not None and o.receipt is not None]
+        for receipt in sold:
+            receipt.sale_id = _new_sale_id()
+            receipt.timestamp = now
+        try:
+            if sold:
+                self._sale_repo.save_sales([_sale_payload(r) for r in sold])
+        except Exception:
+            self._undo(singles, outcomes, commit, abort)
+            raise
+
+        # Fase 2.
+        self._finish(commit, abort)
+        return outcomes  # type: ignore[return-value]
+
+    def close(self) -> None:
+        self._executor.shutdown()
+
+    # ----- Internos -----
+
+    def _next_txid(self) -> str:
+        with self._txid_lock:
+            return f"{self._txid_prefix}-{next(self._txids)}"
+
+    def _on_shards(self, calls: Dict[int, Callable[[], Any]]) -> Dict[int, Any]:
+        """
+        Ejecuta una llamada por shard en paralelo y espera todas. Si
+        alguna falla, propaga la primera excepción.
+        """
+        results, failures = self._try_on_shards(calls)
+        if failures:
+            raise next(iter(failures.values()))
+        return results
+
+    def _try_on_shards(
+        self, calls: Dict[int, Callable[[], Any]]
+    ) -> Tuple[Dict[int, Any], Dict[int, Exception]]:
+        """
+        Como _on_shards, pero espera a todos los shards aunque alguno
+        falle y devuelve aparte los resultados y las excepciones.
+        """
+        results: Dict[int, Any] = {}
+        failures: Dict[int, Exception] = {}
+        if len(calls) == 1:
+            ((shard, call),) = calls.items()
+            try:
+                results[shard] = call()
+            except Exception as exc:
+                failures[shard] = exc
+            return results, failures
+        futures = {shard: self._executor.submit(call) for shard, call in calls.items()}
+        for shard, future in futures.items():
+            try:
+                results[shard] = future.result()
+            except Exception as exc:
+                failures[shard] = exc
+        return results, failures
+
+    def _finish(self, commit: Dict[int, List[str]], abort: Dict[int, List[str]]) -> None:
+        shards = set(commit) | set(abort)
+        if shards:
+            self._on_shards(
+                {
+                    shard: (lambda s=shard: self._shards[s].finish(commit.get(s, []), abort.get(s, [])))
+                    for shard in shards
+                }
+            )
+
+    def _undo_phase_one(
+        self,
+        singles: List[Tuple[int, int, int]],
+        distributed: List[Tuple[int, str, _Split, Dict[int, int]]],
+        outcomes: List[Optional[SaleOutcome]],
+        results: Dict[int, List[SaleOutcome]],
+    ) -> None:
+        """
+        La fase 1 falló en algún shard: en los que respondieron se
+        abortan todas las reservas y se devuelven las ventas completas.
+        """
+        for position, shard, index in singles:
+            if shard in results:
+                outcomes[position] = results[shard][index]
+        abort: Dict[int, List[str]] = {}
+        for _, txid, _, indexes in distributed:
+            for shard in indexes:
+                if shard in results:
+                    abort.setdefault(shard, []).append(txid)
+        self._undo([single for single in singles if single[1] in results], outcomes, {}, abort)
+
+    def _undo(
+        self,
+        singles: List[Tuple[int, int, int]],
+        outcomes: List[Optional[SaleOutcome]],
+        commit: Dict[int, List[str]],
+        abort: Dict[int, List[str]],
+    ) -> None:
+        """
+        El registro (o la fase 1) falló: deshace las reservas y
+        devuelve el stock de las ventas completas.
+        """
+        for shard, txids in commit.items():
+            abort.setdefault(shard, []).extend(txids)
+        self._finish({}, abort)
+
+        released: Dict[int, Dict[str, int]] = {}
+        for position, shard, _ in singles:
+            receipt = outcomes[position].receipt  # type: ignore[union-attr]
+            if receipt is None:
+                continue
+            quantities = released.setdefault(shard, {})
+            for code, quantity in _sold_quantities(receipt).items():
+                quantities[code] = quantities.get(code, 0) + quantity
+        if released:
+            self._on_shards(
+                {shard: (lambda s=shard, q=q: self._shards[s].release(q)) for shard, q in released.items()}
+            )
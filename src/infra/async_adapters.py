@@ -0,0 +1,73 @@
+import asyncio
+from concurrent.futures import Executor
+from functools import partial
+from typing import Any, Callable, Dict, Iterable, List, Optional
+from core.async_ports import AsyncProductRepository, AsyncSaleRepository
+from core.models import Product, ProductPage, ProductSearchResult, SalePage
+from core.ports import ProductRepository, SaleRepository
+
+
+async def _run_in_executor(executor: Optional[Executor], func: Callable[..., Any], *args: Any) -> Any:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, partial(func, *args))
+
+
+class ThreadPoolProductRepository(AsyncProductRepository):
+    """
+    Adapta un ProductRepository síncrono (SQLite, memoria, ...) al puerto
+    asíncrono: cada llamada bloqueante corre en un pool de hilos y el
+    event loop queda libre mientras tanto. Sin `executor` se usa el
+    pool por defecto del loop.
+    """
+
+    def __init__(self, inner: ProductRepository, executor: Optional[Executor] = None) -> None:
+        self._inner = inner
+        self._executor = executor
+
+    async def find_by_code(self, code: str) -> Optional[Product]:
+        return await _run_in_executor(self._executor, self._inner.find_by_code, code)
+
+    async def find_by_codes(self, codes: Iterable[str]) -> Dict[str, Product]:
+        return await _run_in_executor(self._executor, self._inner.find_by_codes, list(codes))
+
+    async def save(self, product: Product) -> None:
+        await _run_in_executor(self._executor, self._inner.save, product)
+
+    async def save_many(self, products: Iterable[Product]) -> None:
+        await _run_in_executor(self._executor, self._inner.save_many, list(products))
+
+    async def compare_and_save_many(self, products: Iterable[Product]) -> List[str]:
+        return await _run_in_executor(self._executor, self._inner.compare_and_save_many, list(products))
+
+    async def list_all(self) -> List[Product]:
+        return await _run_in_executor(self._executor, self._inner.list_all)
+
+    async def page_products(self, after: Optional[str] = None, limit: int = 500) -> ProductPage:
+        return await _run_in_executor(self._executor, self._inner.page_products, after, limit)
+
+    async def search(
+        self,
+        text: str,
+        location: Optional[str] = None,
+        offset: int = 0,
+        limit: int = 20,
+    ) -> ProductSearchResult:
+        return await _run_in_executor(
+            self._executor, self._inner.search, text, location, offset, limit
+        )
+
+
+class ThreadPoolSaleRepository(AsyncSaleRepository):
+    """
+    Adapta un SaleRepository síncrono al puerto asíncrono.
+    """
+
+    def __init__(self, inner: SaleRepository, executor: Optional[Executor] = None) -> None:
+        self._inner = inner
+        self._executor = executor
+
+    async def save_sale(self, data: dict) -> None:
+        await _run_in_executor(self._executor, self._inner.save_sale, data)
+
+    async def page_sales(self, since: int = 0, limit: int = 500) -> SalePage:
+        return await _run_in_executor(self._executor, self._inner.page_sales, since, limit)
@@ -0,0 +1,181 @@
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, replace
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from core.models import Product, ProductPage, ProductSearchResult
+from core.ports import ProductRepository
+
+
+@dataclass
+class CacheStats:
+    """
+    Contadores del caché de productos.
+    """
+    hits: int
+    misses: int
+    evictions: int
+    size: int
+
+
+class CachedProductRepository(ProductRepository):
+    """
+    Decorador de lectura con caché LRU delante de cualquier
+    ProductRepository (SQLite, servicio remoto, etc.).
+
+    - Como máximo `max_entries` productos; se expulsa el menos usado.
+    - `ttl` opcional (segundos): pasado ese tiempo se vuelve a consultar.
+    - Escritura directa (write-through): `save` / `save_many` guardan en
+      el repositorio interno y actualizan el caché.
+    - `compare_and_save_many` también actualiza el caché si se guardó; si
+      hubo conflicto, descarta esos productos (la copia en caché quedó
+      vieja) para que el reintento los lea del repositorio interno.
+
+    Los servicios no saben que existe: reciben un ProductRepository más.
+    """
+
+    def __init__(
+        self,
+        inner: ProductRepository,
+        max_entries: int = 10000,
+        ttl: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if max_entries <= 0:
+            raise ValueError("max_entries debe ser mayor a cero.")
+        self._inner = inner
+        self._max_entries = max_entries
+        self._ttl = ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[Product, float]]" = OrderedDict()
+        # Se incrementa con cada escritura: una lectura al repositorio
+        # interno que se cruzó con una escritura no se guarda en caché.
+        self._generation = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    # ----- API del puerto -----
+
+    def find_by_code(self, code: str) -> Optional[Product]:
+        with self._lock:
+            product = self._lookup(code)
+            generation = self._generation
+        if product is not None:
+            return product
+
+        product = self._inner.find_by_code(code)
+        if product is not None:
+            with self._lock:
+                if generation == self._generation:
+                    self._store(product)
+        return product
+
+    def find_by_codes(self, codes: Iterable[str]) -> Dict[str, Product]:
+        found: Dict[str, Product] = {}
+        missing: List[str] = []
+        with self._lock:
+            for code in codes:
+                product = self._lookup(code)
+                if product is not None:
+                    found[code] = product
+                else:
+                    missing.append(code)
+            generation = self._generation
+        if not missing:
+            return found
+
+        loaded = self._inner.find_by_codes(missing)
+        with self._lock:
+            if generation == self._generation:
+                for product in loaded.values():
+                    self._store(product)
+        found.update(loaded)
+        return found
+
+    def save(self, product: Product) -> None:
+        self._inner.save(product)
+        with self._lock:
+            self._generation += 1
+            self._store(product)
+
+    def save_many(self, products: Iterable[Product]) -> None:
+        products = list(products)
+        self._inner.save_many(products)
+        with self._lock:
+            self._generation += 1
+            for product in products:
+                self._store(product)
+
+    def compare_and_save_many(self, products: Iterable[Product]) -> List[str]:
+        products = list(products)
+        conflicts = self._inner.compare_and_save_many(products)
+        with self._lock:
+            self._generation += 1
+            if conflicts:
+                for code in conflicts:
+                    self._entries.pop(code, None)
+            else:
+                for product in products:
+                    self._store(replace(product, version=product.version + 1))
+        return conflicts
+
+    def list_all(self) -> List[Product]:
+        return self._inner.list_all()
+
+    def page_products(self, after: Optional[str] = None, limit: int = 500) -> ProductPage:
+        return self._inner.page_products(after, limit)
+
+    def search(
+        self,
+        text: str,
+        location: Optional[str] = None,
+        offset: int = 0,
+        limit: int = 20,
+    ) -> ProductSearchResult:
+        return self._inner.search(text, location, offset, limit)
+
+    # ----- Administración del caché -----
+
+    def invalidate(self, code: Optional[str] = None) -> None:
+        """
+        Descarta un producto del caché, o todo el caché si no se indica código.
+        """
+        with self._lock:
+            self._generation += 1
+            if code is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(code, None)
+
+    def stats(self) -> CacheStats:
+        with self._lock:
+            return CacheStats(
+                hits=self._hits,
+                misses=self._misses,
+                evictions=self._evictions,
+                size=len(self._entries),
+            )
+
+    # ----- Internos (requieren el lock tomado) -----
+
+    def _lookup(self, code: str) -> Optional[Product]:
+        entry = self._entries.get(code)
+        if entry is not None:
+            product, expires_at = entry
+            if expires_at >= self._clock():
+                self._entries.move_to_end(code)
+                self._hits += 1
+                return product
+            del self._entries[code]
+        self._misses += 1
+        return None
+
+    def _store(self, product: Product) -> None:
+        expires_at = self._clock() + self._ttl if self._ttl is not None else float("inf")
+        self._entries[product.code] = (product, expires_at)
+        self._entries.move_to_end(product.code)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+            self._evictions += 1
@@ -0,0 +1,103 @@
+import csv
+import json
+import os
+from typing import Iterable, Iterator, TextIO
+from core.catalog import CatalogImportService, CatalogRow, ImportReport
+from core.models import Product
+from core.ports import ProductRepository
+
+_FIELDS = ("code", "name", "price", "stock", "location")
+_EXPORT_BATCH = 1000
+
+
+# ==========
+# Lectura (filas para CatalogImportService)
+# ==========
+
+
+def read_csv_rows(stream: TextIO) -> Iterator[CatalogRow]:
+    """
+    Filas de un CSV con encabezado (code,name,price,stock,location;
+    stock y ubicación son opcionales). Lee de a una fila.
+    """
+    reader = csv.DictReader(stream)
+    for row in reader:
+        yield reader.line_num, row
+
+
+def read_jsonl_rows(stream: TextIO) -> Iterator[CatalogRow]:
+    """
+    Filas de un archivo JSONL (un objeto por línea). Las líneas vacías
+    se ignoran; las que no son JSON válido llegan como None.
+    """
+    for line_no, line in enumerate(stream, 1):
+        if not line.strip():
+            continue
+        try:
+            yield line_no, json.loads(line)
+        except json.JSONDecodeError:
+            yield line_no, None
+
+
+# ==========
+# Escritura
+# ==========
+
+
+def write_csv(stream: TextIO, products: Iterable[Product]) -> int:
+    writer = csv.writer(stream)
+    writer.writerow(_FIELDS)
+    count = 0
+    for p in products:
+        writer.writerow((p.code, p.name, repr(p.price), p.stock, p.location))
+        count += 1
+    return count
+
+
+def write_jsonl(stream: TextIO, products: Iterable[Product]) -> int:
+    count = 0
+    for p in products:
+        record = {"code": p.code, "name": p.name, "price": p.price, "stock": p.stock, "location": p.location}
+        stream.write(json.dumps(record, ensure_ascii=False) + "\n")
+        count += 1
+    return count
+
+
+# ==========
+# Archivos completos
+# ==========
+
+
+def _is_csv(path: str) -> bool:
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".csv":
+        return True
+    if extension == ".jsonl":
+        return False
+    raise ValueError(f"Formato de catálogo no soportado: {path} (use .csv o .jsonl)")
+
+
+def import_catalog_file(
+    path: str,
+    service: CatalogImportService,
+    batch_size: int = 1000,
+    max_errors: int = 1000,
+) -> ImportReport:
+    """
+    Importa un catálogo .csv o .jsonl leyéndolo en streaming.
+    """
+    is_csv = _is_csv(path)
+    with open(path, encoding="utf-8-sig", newline="" if is_csv else None) as f:
+        rows = read_csv_rows(f) if is_csv else read_jsonl_rows(f)
+        return service.import_rows(rows, batch_size, max_errors)
+
+
+def export_catalog_file(path: str, product_repo: ProductRepository) -> int:
+    """
+    Exporta el catálogo completo a .csv o .jsonl recorriéndolo por
+    páginas (memoria constante). Devuelve la cantidad de productos.
+    """
+    is_csv = _is_csv(path)
+    products = product_repo.iter_products(_EXPORT_BATCH)
+    with open(path, "w", encoding="utf-8", newline="" if is_csv else None) as f:
+        return write_csv(f, products) if is_csv else write_jsonl(f, products)
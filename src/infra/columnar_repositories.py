@@ -0,0 +1,231 @@
+import threading
+from array import array
+from bisect import bisect_right
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional
+from core.models import Product, ProductPage, ProductSearchResult
+from core.ports import ProductRepository
+from infra.search_index import ProductSearchIndex
+
+if TYPE_CHECKING:
+    from infra.snapshots import ProductColumns
+
+
+class _StringPool:
+    """
+    Tabla de textos internados: cada texto distinto se guarda una sola vez
+    y las columnas solo almacenan su índice (4 bytes).
+    """
+
+    def __init__(self, values: Iterable[str] = ()) -> None:
+        self._values: List[str] = list(values)
+        self._ids: Dict[str, int] = {value: i for i, value in enumerate(self._values)}
+
+    def intern(self, value: str) -> int:
+        text_id = self._ids.get(value)
+        if text_id is None:
+            text_id = len(self._values)
+            self._values.append(value)
+            self._ids[value] = text_id
+        return text_id
+
+    def get(self, text_id: int) -> str:
+        return self._values[text_id]
+
+
+class _TextColumn:
+    """
+    Columna de textos empaquetados en un único buffer UTF-8.
+    Cada fila guarda solo su posición y longitud dentro del buffer,
+    sin un objeto str por fila. Al reemplazar un texto se anexa el
+    nuevo valor (el anterior queda como espacio sin uso).
+    """
+
+    def __init__(self) -> None:
+        self._data = bytearray()
+        self._starts = array("Q")
+        self._lengths = array("L")
+
+    def append(self, value: str) -> None:
+        encoded = value.encode("utf-8")
+        self._starts.append(len(self._data))
+        self._lengths.append(len(encoded))
+        self._data += encoded
+
+    def set(self, row: int, value: str) -> None:
+        if self.get(row) == value:
+            return
+        encoded = value.encode("utf-8")
+        self._starts[row] = len(self._data)
+        self._lengths[row] = len(encoded)
+        self._data += encoded
+
+    def get(self, row: int) -> str:
+        start = self._starts[row]
+        return self._data[start:start + self._lengths[row]].decode("utf-8")
+
+
+class ColumnarProductRepository(ProductRepository):
+    """
+    Repositorio de productos en memoria con almacenamiento por columnas,
+    pensado para catálogos de millones de SKUs.
+
+    En lugar de un objeto Product por SKU se guardan arreglos tipados
+    (precio como double, stock y versión como enteros de 64 bits). Las ubicaciones,
+    que se repiten mucho, se internan y cada fila guarda solo su índice;
+    los nombres, casi siempre distintos, se empaquetan en un buffer UTF-8.
+    Un índice código -> fila permite las búsquedas en O(1). Los objetos
+    Product se construyen solo al entregarlos, como copias del estado actual.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._rows: Dict[str, int] = {}
+        self._codes: List[str] = []
+        self._prices = array("d")
+        self._stocks = array("q")
+        self._versions = array("q")
+        self._names = _TextColumn()
+        self._location_ids = array("L")
+        self._locations = _StringPool()
+        # El índice de búsqueda duplica nombres y ubicaciones en
+        # memoria: se construye recién en la primera búsqueda y desde
+        # entonces se mantiene con cada escritura.
+        self._index: Optional[ProductSearchIndex] = None
+        self._sorted_codes: Optional[List[str]] = None
+
+    @classmethod
+    def from_columns(cls, columns: "ProductColumns") -> "ColumnarProductRepository":
+        """
+        Repositorio restaurado desde un snapshot: las columnas del
+        snapshot se adoptan tal cual, sin crear objetos por SKU.
+        """
+        repo = cls()
+        repo._codes = columns.codes
+        repo._rows = dict(zip(columns.codes, range(len(columns.codes))))
+        repo._prices = columns.prices
+        repo._stocks = columns.stocks
+        repo._versions = columns.versions
+        repo._names._data = bytearray(columns.names)
+        repo._names._starts = columns.name_starts
+        repo._names._lengths = columns.name_lengths
+        repo._location_ids = columns.location_ids
+        repo._locations = _StringPool(columns.locations)
+        # Los códigos del snapshot ya vienen ordenados.
+        repo._sorted_codes = list(columns.codes)
+        return repo
+
+    def __len__(self) -> int:
+        return len(self._codes)
+
+    # ----- API del puerto -----
+
+    def find_by_code(self, code: str) -> Optional[Product]:
+        with self._lock:
+            row = self._rows.get(code)
+            return self._view(row) if row is not None else None
+
+    def find_by_codes(self, codes: Iterable[str]) -> Dict[str, Product]:
+        found: Dict[str, Product] = {}
+        with self._lock:
+            for code in codes:
+                row = self._rows.get(code)
+                if row is not None:
+                    found[code] = self._view(row)
+        return found
+
+    def save(self, product: Product) -> None:
+        with self._lock:
+            self._write(product)
+
+    def save_many(self, products: Iterable[Product]) -> None:
+        with self._lock:
+            for product in products:
+                self._write(product)
+
+    def compare_and_save_many(self, products: Iterable[Product]) -> List[str]:
+        products = list(products)
+        with self._lock:
+            conflicts: List[str] = []
+            for product in products:
+                row = self._rows.get(product.code)
+                if row is None or self._versions[row] != product.version:
+                    conflicts.append(product.code)
+            if conflicts:
+                return conflicts
+            for product in products:
+                self._write(product, product.version + 1)
+        return []
+
+    def list_all(self) -> List[Product]:
+        with self._lock:
+            return [self._view(row) for row in range(len(self._codes))]
+
+    def page_products(self, after: Optional[str] = None, limit: int = 500) -> ProductPage:
+        with self._lock:
+            codes = self._sorted_codes
+            if codes is None:
+                codes = self._sorted_codes = sorted(self._rows)
+            start = bisect_right(codes, after) if after is not None else 0
+            page = codes[start:start + limit]
+            items = [self._view(self._rows[code]) for code in page]
+        more = start + limit < len(codes)
+        return ProductPage(items=items, next_token=page[-1] if more else None)
+
+    def search(
+        self,
+        text: str,
+        location: Optional[str] = None,
+        offset: int = 0,
+        limit: int = 20,
+    ) -> ProductSearchResult:
+        index = self._index
+        if index is None:
+            index = self._build_index()
+        page, total = index.search_page(text, location, offset, limit)
+        with self._lock:
+            items = [self._view(self._rows[code]) for code in page]
+        return ProductSearchResult(items=items, total=total)
+
+    def _build_index(self) -> ProductSearchIndex:
+        with self._lock:
+            if self._index is None:
+                index = ProductSearchIndex()
+                for row in range(len(self._codes)):
+                    index.add(self._view(row))
+                self._index = index
+            return self._index
+
+    # ----- Internos (requieren el lock tomado) -----
+
+    def _view(self, row: int) -> Product:
+        return Product(
+            code=self._codes[row],
+            name=self._names.get(row),
+            price=self._prices[row],
+            stock=self._stocks[row],
+            location=self._locations.get(self._location_ids[row]),
+            version=self._versions[row],
+        )
+
+    def _write(self, product: Product, version: Optional[int] = None) -> None:
+        if version is None:
+            version = product.version
+        location_id = self._locations.intern(product.location)
+        row = self._rows.get(product.code)
+        if row is None:
+            self._sorted_codes = None
+            self._rows[product.code] = len(self._codes)
+            self._codes.append(product.code)
+            self._prices.append(product.price)
+            self._stocks.append(product.stock)
+            self._versions.append(version)
+            self._names.append(product.name)
+            self._location_ids.append(location_id)
+        else:
+            self._prices[row] = product.price
+            self._stocks[row] = product.stock
+            self._versions[row] = version
+            self._names.set(row, product.name)
+            self._location_ids[row] = location_id
+        if self._index is not None:
+            self._index.add(product)
@@ -0,0 +1,66 @@
+from typing import Dict, Iterable, List, Optional
+from core.events import StockEventBus
+from core.models import Product, ProductPage, ProductSearchResult
+from core.ports import ProductRepository
+
+
+class StockEventProductRepository(ProductRepository):
+    """
+    Decorador de ProductRepository que publica en un StockEventBus los
+    cambios de stock de `save` / `save_many` (altas de catálogo,
+    productos nuevos de una importación, ajustes manuales,
+    restore_products). Para conocer el stock anterior lee esos
+    productos antes de guardar, solo si el bus tiene suscriptores; un
+    producto nuevo cuenta con stock anterior 0.
+
+    `compare_and_save_many` delega sin publicar: lo usan InventoryService
+    y CatalogImportService (actualizaciones de una importación), que
+    publican ellos mismos con el stock que ya leyeron si reciben el
+    mismo bus en `events`, sin una lectura extra por venta.
+    """
+
+    def __init__(self, inner: ProductRepository, events: StockEventBus) -> None:
+        self._inner = inner
+        self.events = events
+
+    # ----- API del puerto -----
+
+    def find_by_code(self, code: str) -> Optional[Product]:
+        return self._inner.find_by_code(code)
+
+    def find_by_codes(self, codes: Iterable[str]) -> Dict[str, Product]:
+        return self._inner.find_by_codes(codes)
+
+    def save(self, product: Product) -> None:
+        self.save_many([product])
+
+    def save_many(self, products: Iterable[Product]) -> None:
+        products = list(products)
+        if not self.events.has_subscribers:
+            self._inner.save_many(products)
+            return
+        stock = {code: p.stock for code, p in self._inner.find_by_codes({p.code for p in products}).items()}
+        self._inner.save_many(products)
+        changes = []
+        for product in products:
+            changes.append((product.code, stock.get(product.code, 0), product.stock))
+            stock[product.code] = product.stock
+        self.events.publish(changes)
+
+    def compare_and_save_many(self, products: Iterable[Product]) -> List[str]:
+        return self._inner.compare_and_save_many(products)
+
+    def list_all(self) -> List[Product]:
+        return self._inner.list_all()
+
+    def page_products(self, after: Optional[str] = None, limit: int = 500) -> ProductPage:
+        return self._inner.page_products(after, limit)
+
+    def search(
+        self,
+        text: str,
+        location: Optional[str] = None,
+        offset: int = 0,
+        limit: int = 20,
+    ) -> ProductSearchResult:
+        return self._inner.search(text, location, offset, limit)
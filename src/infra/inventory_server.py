@@ -0,0 +1,490 @@
+import json
+import multiprocessing
+import os
+import socket
+import socketserver
+import struct
+import threading
+from typing import Any, BinaryIO, Callable, Dict, List, Optional, Tuple, Union
+from core.errors import ConcurrencyError, DomainError, ValidationError
+from core.models import Cart, Product, ProductPage, ProductSearchResult, SalePage
+from core.ports import ProductRepository, SaleRepository
+from core.services import InventoryService, Receipt, ReceiptItem, SaleService
+from infra.memory_repositories import InMemoryProductRepository, InMemorySaleRepository
+
+# ==========
+# Protocolo
+# ==========
+# Cada trama es un largo (u32, big-endian) seguido de un arreglo JSON
+# compacto. Una trama lleva una o más llamadas y su respuesta, los
+# resultados en el mismo orden:
+#
+#   pedido:    [[id, método, [args...]], ...]
+#   respuesta: [[id, true, resultado], [id, false, [tipo, mensaje]], ...]
+#
+# El `id` lo elige el cliente; le permite tener muchas llamadas en
+# vuelo por conexión (pipelining) y casar cada respuesta con su pedido.
+# Se usa JSON y no pickle: el servidor no debe ejecutar nada que venga
+# por el socket. Productos, recibos y páginas viajan como arreglos.
+
+Address = Union[str, Tuple[str, int]]
+
+_HEADER = struct.Struct(">I")
+MAX_FRAME_BYTES = 64 * 1024 * 1024
+
+# Errores de dominio que cruzan el socket conservando su tipo.
+_ERROR_TYPES: Dict[str, type] = {
+    "DomainError": DomainError,
+    "ValidationError": ValidationError,
+    "ConcurrencyError": ConcurrencyError,
+}
+
+
+class RemoteCallError(RuntimeError):
+    """
+    El servidor falló al atender la llamada por un error que no es de
+    dominio (p. ej. el repositorio no respondió).
+    """
+    pass
+
+
+def write_frame(stream: Union[socket.socket, BinaryIO], payload: Any) -> None:
+    data = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    if len(data) > MAX_FRAME_BYTES:
+        raise ValueError(f"La trama ocupa {len(data)} bytes; el máximo es {MAX_FRAME_BYTES}.")
+    frame = _HEADER.pack(len(data)) + data
+    if isinstance(stream, socket.socket):
+        stream.sendall(frame)
+    else:
+        stream.write(frame)
+        stream.flush()
+
+
+def read_frame(stream: BinaryIO) -> Optional[Any]:
+    """
+    Lee una trama completa; None si la conexión se cerró entre tramas.
+    """
+    header = stream.read(_HEADER.size)
+    if not header:
+        return None
+    if len(header) < _HEADER.size:
+        raise ConnectionError("La conexión se cortó a mitad de una trama.")
+    (length,) = _HEADER.unpack(header)
+    if length > MAX_FRAME_BYTES:
+        raise ConnectionError(f"Trama de {length} bytes: supera el máximo permitido.")
+    data = stream.read(length)
+    if len(data) < length:
+        raise ConnectionError("La conexión se cortó a mitad de una trama.")
+    return json.loads(data)
+
+
+def encode_error(exc: BaseException) -> List[str]:
+    if isinstance(exc, DomainError):
+        name = type(exc).__name__ if type(exc).__name__ in _ERROR_TYPES else "DomainError"
+        return [name, str(exc)]
+    return [type(exc).__name__, str(exc)]
+
+
+def decode_error(encoded: List[str]) -> Exception:
+    name, message = encoded
+    error_type = _ERROR_TYPES.get(name)
+    if error_type is not None:
+        return error_type(message)
+    return RemoteCallError(f"{name}: {message}")
+
+
+def encode_product(product: Optional[Product]) -> Optional[list]:
+    if product is None:
+        return None
+    return [product.code, product.name, product.price, product.stock, product.location, product.version]
+
+
+def decode_product(encoded: Optional[list]) -> Optional[Product]:
+    return None if encoded is None else Product(*encoded)
+
+
+def encode_cart(cart: Cart) -> List[list]:
+    return [[item.product_code, item.quantity] for item in cart.get_items()]
+
+
+def decode_cart(encoded: List[list]) -> Cart:
+    cart = Cart()
+    for code, quantity in encoded:
+        cart.add_item(code, quantity)
+    return cart
+
+
+def encode_receipt(receipt: Receipt) -> list:
+    return [
+        [
+            [i.product_code, i.name, i.quantity, i.unit_price, i.total, i.discount, i.promotion]
+            for i in receipt.items
+        ],
+        receipt.grand_total,
+        receipt.sale_id,
+        receipt.timestamp,
+    ]
+
+
+def decode_receipt(encoded: list) -> Receipt:
+    lines, grand_total, sale_id, timestamp = encoded
+    return Receipt(
+        items=[ReceiptItem(*line) for line in lines],
+        grand_total=grand_total,
+        sale_id=sale_id,
+        timestamp=timestamp,
+    )
+
+
+# ==========
+# Despacho de llamadas
+# ==========
+
+
+class _Dispatcher:
+    """
+    Traduce cada llamada del protocolo a los repositorios y al
+    SaleService del servidor, que son la única copia del inventario.
+    """
+
+    def __init__(
+        self,
+        product_repo: ProductRepository,
+        sale_repo: SaleRepository,
+        sale_service: SaleService,
+    ) -> None:
+        self._sale_service = sale_service
+        self._handlers: Dict[str, Callable[..., Any]] = {
+            "ping": lambda: True,
+            "find_by_code": lambda code: encode_product(product_repo.find_by_code(code)),
+            "find_by_codes": lambda codes: {
+                code: encode_product(product) for code, product in product_repo.find_by_codes(codes).items()
+            },
+            "save": lambda product: product_repo.save(decode_product(product)),
+            "save_many": lambda products: product_repo.save_many(decode_product(p) for p in products),
+            "compare_and_save_many": lambda products: product_repo.compare_and_save_many(
+                [decode_product(p) for p in products]
+            ),
+            "list_all": lambda: [encode_product(p) for p in product_repo.list_all()],
+            "page_products": self._page_products(product_repo),
+            "search": self._search(product_repo),
+            "save_sale": sale_repo.save_sale,
+            "save_sales": sale_repo.save_sales,
+            "page_sales": self._page_sales(sale_repo),
+            "confirm_sale": lambda cart, key=None: encode_receipt(
+                sale_service.confirm_sale(decode_cart(cart), idempotency_key=key)
+            ),
+            "confirm_sales": self._confirm_sales,
+        }
+
+    def dispatch(self, calls: List[list]) -> List[list]:
+        """
+        Atiende las llamadas de una trama en orden. Las confirm_sale
+        consecutivas sin clave de idempotencia se confirman juntas con
+        confirm_sales (una lectura, un guardado de stock y un registro
+        de ventas para todas).
+        """
+        replies: List[list] = []
+        position = 0
+        while position < len(calls):
+            end = position
+            while end < len(calls) and _is_plain_sale(calls[end]):
+                end += 1
+            if end - position > 1:
+                replies.extend(self._confirm_group(calls[position:end]))
+                position = end
+                continue
+            call_id, method, args = calls[position]
+            replies.append(self._call(call_id, method, args))
+            position += 1
+        return replies
+
+    def _call(self, call_id: Any, method: str, args: list) -> list:
+        handler = self._handlers.get(method)
+        if handler is None:
+            return [call_id, False, ["RemoteCallError", f"Método desconocido: {method}"]]
+        try:
+            return [call_id, True, handler(*args)]
+        except Exception as exc:
+            return [call_id, False, encode_error(exc)]
+
+    def _confirm_group(self, calls: List[list]) -> List[list]:
+        try:
+            carts = [decode_cart(args[0]) for _, _, args in calls]
+            outcomes = self._sale_service.confirm_sales(carts)
+        except Exception:
+            # Error de todo el lote (p. ej. conflictos persistentes): el
+            # stock ya se revirtió; se reintenta venta por venta.
+            return [self._call(call_id, method, args) for call_id, method, args in calls]
+        return [
+            [call_id, True, encode_receipt(outcome.receipt)]
+            if outcome.ok
+            else [call_id, False, encode_error(outcome.error)]
+            for (call_id, _, _), outcome in zip(calls, outcomes)
+        ]
+
+    def _confirm_sales(self, carts: List[list]) -> List[list]:
+        outcomes = self._sale_service.confirm_sales([decode_cart(cart) for cart in carts])
+        return [
+            [True, encode_receipt(outcome.receipt)] if outcome.ok else [False, encode_error(outcome.error)]
+            for outcome in outcomes
+        ]
+
+    @staticmethod
+    def _page_products(product_repo: ProductRepository) -> Callable[..., list]:
+        def page(after: Optional[str] = None, limit: int = 500) -> list:
+            result: ProductPage = product_repo.page_products(after=after, limit=limit)
+            return [[encode_product(p) for p in result.items], result.next_token]
+        return page
+
+    @staticmethod
+    def _search(product_repo: ProductRepository) -> Callable[..., list]:
+        def search(text: str, location: Optional[str] = None, offset: int = 0, limit: int = 20) -> list:
+            result: ProductSearchResult = product_repo.search(text, location=location, offset=offset, limit=limit)
+            return [[encode_product(p) for p in result.items], result.total]
+        return search
+
+    @staticmethod
+    def _page_sales(sale_repo: SaleRepository) -> Callable[..., list]:
+        def page(since: int = 0, limit: int = 500) -> list:
+            result: SalePage = sale_repo.page_sales(since=since, limit=limit)
+            return [result.items, result.next_token]
+        return page
+
+
+def _is_plain_sale(call: list) -> bool:
+    _, method, args = call
+    return method == "confirm_sale" and len(args) == 1
+
+
+# ==========
+# Servidor
+# ==========
+
+
+class _ConnectionHandler(socketserver.StreamRequestHandler):
+    """
+    Una conexión (un terminal o una conexión de su pool): atiende sus
+    tramas en orden, una respuesta por trama.
+    """
+
+    def handle(self) -> None:
+        server: "_ServerMixin" = self.server  # type: ignore[assignment]
+        server.track(self.request, True)
+        try:
+            while True:
+                try:
+                    calls = read_frame(self.rfile)
+                except (ConnectionError, ValueError, OSError):
+                    return
+                if calls is None:
+                    return
+                try:
+                    replies = server.dispatcher.dispatch(calls)
+                except (TypeError, ValueError):
+                    return  # trama que no respeta el protocolo: se corta la conexión
+                write_frame(self.wfile, replies)
+        except OSError:
+            return
+        finally:
+            server.track(self.request, False)
+
+
+class _ServerMixin:
+    dispatcher: _Dispatcher
+    daemon_threads = True
+    allow_reuse_address = True
+    # Muchas cajas pueden conectarse a la vez (la cola por defecto es de 5).
+    request_queue_size = 128
+
+    def init_tracking(self) -> None:
+        self._connections: set = set()
+        self._connections_lock = threading.Lock()
+
+    def track(self, connection: socket.socket, active: bool) -> None:
+        with self._connections_lock:
+            if active:
+                self._connections.add(connection)
+            else:
+                self._connections.discard(connection)
+
+    def disconnect_all(self) -> None:
+        with self._connections_lock:
+            connections = list(self._connections)
+        for connection in connections:
+            try:
+                connection.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+
+class _TCPServer(_ServerMixin, socketserver.ThreadingTCPServer):
+    def server_bind(self) -> None:
+        self.socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        super().server_bind()
+
+    def process_request(self, request, client_address) -> None:
+        request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        super().process_request(request, client_address)
+
+
+if hasattr(socketserver, "ThreadingUnixStreamServer"):
+    class _UnixServer(_ServerMixin, socketserver.ThreadingUnixStreamServer):
+        pass
+
+
+class InventoryServer:
+    """
+    Servidor de inventario para varias cajas: expone sobre un socket
+    TCP (`address` = (host, puerto)) o Unix (`address` = ruta) las
+    operaciones de ProductRepository, SaleRepository y
+    SaleService.confirm_sale / confirm_sales.
+
+    El servidor es dueño del inventario: las cajas que venden con
+    RemoteSaleService comparten el stock sin tocar el repositorio
+    directamente. Cada conexión se atiende en su propio hilo; las
+    ventas concurrentes se coordinan como siempre (KeyedLocks y
+    guardado condicional en el SaleService).
+    """
+
+    def __init__(
+        self,
+        product_repo: ProductRepository,
+        sale_repo: SaleRepository,
+        sale_service: Optional[SaleService] = None,
+        address: Address = ("127.0.0.1", 0),
+    ) -> None:
+        if sale_service is None:
+            sale_service = SaleService(product_repo, sale_repo, InventoryService(product_repo))
+        self._unix_path: Optional[str] = None
+        server: _ServerMixin
+        if isinstance(address, str):
+            if not hasattr(socketserver, "ThreadingUnixStreamServer"):
+                raise ValueError("Los sockets Unix no están disponibles en esta plataforma.")
+            if os.path.exists(address):
+                os.remove(address)
+            server = _UnixServer(address, _ConnectionHandler)
+            self._unix_path = address
+        else:
+            server = _TCPServer(address, _ConnectionHandler)
+        server.dispatcher = _Dispatcher(product_repo, sale_repo, sale_service)
+        server.init_tracking()
+        self._server = server
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def address(self) -> Address:
+        """
+        Dirección real (con el puerto asignado si se pidió el 0).
+        """
+        return self._unix_path or self._server.server_address[:2]  # type: ignore[attr-defined]
+
+    def start(self) -> "InventoryServer":
+        """
+        Atiende conexiones en un hilo de fondo.
+        """
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, name="inventory-server", daemon=True  # type: ignore[attr-defined]
+        )
+        self._thread.start()
+        return self
+
+    def serve_forever(self) -> None:
+        self._server.serve_forever()  # type: ignore[attr-defined]
+
+    def shutdown(self) -> None:
+        """
+        Detiene serve_forever (llamado desde otro hilo).
+        """
+        self._server.shutdown()  # type: ignore[attr-defined]
+
+    def close(self) -> None:
+        """
+        Deja de aceptar conexiones y corta las abiertas.
+        """
+        if self._thread is not None:
+            self.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._server.server_close()  # type: ignore[attr-defined]
+        self._server.disconnect_all()
+        if self._unix_path and os.path.exists(self._unix_path):
+            os.remove(self._unix_path)
+
+    def __enter__(self) -> "InventoryServer":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+# ==========
+# Servidor en un proceso propio
+# ==========
+
+
+def _run_server_process(
+    connection,
+    address: Address,
+    repository_factory: Callable[[], ProductRepository],
+    sale_repository_factory: Callable[[], SaleRepository],
+    products: List[Product],
+) -> None:
+    product_repo = repository_factory()
+    product_repo.save_many(products)
+    server = InventoryServer(product_repo, sale_repository_factory(), address=address)
+    connection.send(server.address)
+
+    def wait_for_close() -> None:
+        # El padre avisa (o cierra su extremo al morir) para detener el servidor.
+        try:
+            connection.recv()
+        except EOFError:
+            pass
+        server.shutdown()
+
+    threading.Thread(target=wait_for_close, name="inventory-server-stop", daemon=True).start()
+    try:
+        server.serve_forever()
+    finally:
+        server.close()
+
+
+class InventoryServerProcess:
+    """
+    InventoryServer en un proceso propio (el proceso servidor de la
+    tienda), con el catálogo inicial `products` cargado en el
+    repositorio que crea `repository_factory`. Las fábricas deben
+    poder serializarse con pickle (clases o funciones de módulo).
+    """
+
+    def __init__(
+        self,
+        address: Address = ("127.0.0.1", 0),
+        products: Optional[List[Product]] = None,
+        repository_factory: Callable[[], ProductRepository] = InMemoryProductRepository,
+        sale_repository_factory: Callable[[], SaleRepository] = InMemorySaleRepository,
+        context: Optional[Any] = None,
+    ) -> None:
+        context = context or multiprocessing.get_context("spawn")
+        self._connection, child = context.Pipe()
+        self._process = context.Process(
+            target=_run_server_process,
+            args=(child, address, repository_factory, sale_repository_factory, list(products or ())),
+            daemon=True,
+        )
+        self._process.start()
+        child.close()
+        address = self._connection.recv()
+        self.address: Address = address if isinstance(address, str) else tuple(address)
+
+    def close(self) -> None:
+        self._connection.send(None)
+        self._connection.close()
+        self._process.join()
+
+    def __enter__(self) -> "InventoryServerProcess":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
@@ -0,0 +1,295 @@
+import json
+import os
+import threading
+import time
+from contextlib import closing
+from itertools import islice
+from typing import Iterator, List, Optional, Tuple
+from core.models import SalePage
+from core.ports import SaleRepository
+
+
+_SEGMENT_PREFIX = "sales-"
+_SEGMENT_SUFFIX = ".jsonl"
+# Token de paginación: segmento y posición en bytes dentro de él, en un
+# solo entero (0 = desde el inicio). Retomar es un seek, sin releer
+# el historial anterior.
+_OFFSET_BITS = 40
+
+
+def _cursor(segment: int, offset: int) -> int:
+    return segment << _OFFSET_BITS | offset
+
+
+def _split_cursor(token: int) -> Tuple[int, int]:
+    return token >> _OFFSET_BITS, token & ((1 << _OFFSET_BITS) - 1)
+
+
+def _segment_name(index: int) -> str:
+    return f"{_SEGMENT_PREFIX}{index:08d}{_SEGMENT_SUFFIX}"
+
+
+def _segment_index(filename: str) -> Optional[int]:
+    if not (filename.startswith(_SEGMENT_PREFIX) and filename.endswith(_SEGMENT_SUFFIX)):
+        return None
+    digits = filename[len(_SEGMENT_PREFIX):-len(_SEGMENT_SUFFIX)]
+    return int(digits) if digits.isdigit() else None
+
+
+class _PendingWrite:
+    """
+    Venta encolada a la espera de que su lote llegue a disco.
+    """
+
+    __slots__ = ("line", "done", "error")
+
+    def __init__(self, line: bytes) -> None:
+        self.line = line
+        self.done = False
+        self.error: Optional[BaseException] = None
+
+
+class JournalSaleRepository(SaleRepository):
+    """
+    Repositorio de ventas en archivos de solo-anexado (JSON lines).
+
+    - Group commit: las ventas que llegan dentro de la misma ventana
+      (`commit_window` segundos, o hasta `max_batch` ventas) se escriben
+      juntas y se confirman con un único fsync. `save_sale` no retorna
+      hasta que su venta está en disco.
+    - Segmentos: al superar `segment_max_bytes` se abre un archivo nuevo
+      (sales-00000001.jsonl, sales-00000002.jsonl, ...).
+    - Lectura en streaming: `iter_sales` recorre el historial línea por
+      línea sin cargarlo completo en memoria. El token de `page_sales`
+      es (segmento, posición en bytes): cada página sigue donde terminó
+      la anterior.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        commit_window: float = 0.002,
+        max_batch: int = 512,
+        segment_max_bytes: int = 64 * 1024 * 1024,
+    ) -> None:
+        self._directory = directory
+        self._commit_window = commit_window
+        self._max_batch = max_batch
+        self._segment_max_bytes = segment_max_bytes
+        self.fsync_count = 0
+
+        os.makedirs(directory, exist_ok=True)
+        segments = self._segment_indexes()
+        self._segment = segments[-1] if segments else 1
+        self._file = open(os.path.join(directory, _segment_name(self._segment)), "ab")
+        self._repair_tail()
+
+        self._lock = threading.Lock()
+        self._work_ready = threading.Condition(self._lock)
+        self._committed = threading.Condition(self._lock)
+        # Cada save_sales es un grupo: va entero en un mismo lote.
+        self._pending: List[List[_PendingWrite]] = []
+        self._pending_lines = 0
+        self._closing = False
+
+        self._writer = threading.Thread(
+            target=self._writer_loop, name="sales-journal-writer", daemon=True
+        )
+        self._writer.start()
+
+    # ----- API del puerto -----
+
+    def save_sale(self, data: dict) -> None:
+        self.save_sales([data])
+
+    def save_sales(self, sales: List[dict]) -> None:
+        """
+        Encola todas las ventas juntas y espera a que lleguen a disco.
+        Van siempre en un mismo lote (un lote puede superar `max_batch`
+        para no partirlas): quedan contiguas en el journal y se
+        confirman o fallan todas juntas.
+        """
+        writes = [
+            _PendingWrite(
+                (json.dumps(data, ensure_ascii=False, separators=(",", ":")) + "\n").encode("utf-8")
+            )
+            for data in sales
+        ]
+        if not writes:
+            return
+
+        with self._lock:
+            if self._closing:
+                raise RuntimeError("El journal de ventas está cerrado.")
+            self._pending.append(writes)
+            self._pending_lines += len(writes)
+            self._work_ready.notify()
+            # Los lotes se escriben en orden: si la última terminó, todas terminaron.
+            while not writes[-1].done:
+                self._committed.wait()
+
+        for write in writes:
+            if write.error is not None:
+                raise write.error
+
+    # ----- Lectura -----
+
+    def iter_sales(self, since: int = 0, batch_size: int = 500) -> Iterator[dict]:
+        """
+        Recorre las ventas en orden de registro, segmento por segmento,
+        a partir del token `since` (de page_sales; 0 = desde el inicio).
+        Una última línea incompleta (escritura interrumpida) se ignora.
+        El archivo ya se lee por bloques, así que `batch_size` no
+        cambia nada aquí.
+        """
+        for line, _ in self._iter_lines(since):
+            yield json.loads(line)
+
+    def page_sales(self, since: int = 0, limit: int = 500) -> SalePage:
+        items: List[dict] = []
+        next_token = since
+        with closing(self._iter_lines(since)) as lines:
+            for line, next_token in islice(lines, limit):
+                items.append(json.loads(line))
+        return SalePage(items=items, next_token=next_token)
+
+    def list_sales(self) -> List[dict]:
+        return list(self.iter_sales())
+
+    # ----- Ciclo de vida -----
+
+    def close(self) -> None:
+        """
+        Escribe lo pendiente, detiene el hilo escritor y cierra el archivo.
+        """
+        with self._lock:
+            self._closing = True
+            self._work_ready.notify()
+        self._writer.join()
+        self._file.close()
+
+    def __enter__(self) -> "JournalSaleRepository":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    # ----- Internos -----
+
+    def _segment_indexes(self) -> List[int]:
+        indexes = (_segment_index(name) for name in os.listdir(self._directory))
+        return sorted(index for index in indexes if index is not None)
+
+    def _iter_lines(self, since: int = 0) -> Iterator[Tuple[bytes, int]]:
+        """
+        Líneas completas desde el token `since`, cada una con el token
+        que apunta justo después de ella.
+        """
+        first, offset = _split_cursor(since)
+        for index in self._segment_indexes():
+            if index < first:
+                continue
+            position = offset if index == first else 0
+            path = os.path.join(self._directory, _segment_name(index))
+            with open(path, "rb") as segment:
+                segment.seek(position)
+                for line in segment:
+                    if not line.endswith(b"\n"):
+                        break
+                    position += len(line)
+                    yield line, _cursor(index, position)
+
+    def _repair_tail(self) -> None:
+        """
+        Si el proceso murió a mitad de una escritura, el segmento activo
+        puede terminar en una línea incompleta: se recorta hasta el
+        último salto de línea para que los anexos sigan siendo válidos.
+        """
+        path = self._file.name
+        end = os.path.getsize(path)
+        with open(path, "rb") as segment:
+            position = end
+            while position > 0:
+                start = max(0, position - 65536)
+                segment.seek(start)
+                chunk = segment.read(position - start)
+                newline = chunk.rfind(b"\n")
+                if newline >= 0:
+                    position = start + newline + 1
+                    break
+                position = start
+        if position != end:
+            self._file.truncate(position)
+        self._file.seek(position)
+
+    def _writer_loop(self) -> None:
+        while True:
+            with self._lock:
+                while not self._pending and not self._closing:
+                    self._work_ready.wait()
+                if not self._pending:
+                    return
+                self._wait_for_batch()
+                batch = self._take_batch()
+
+            error: Optional[BaseException] = None
+            try:
+                self._write_batch(batch)
+            except Exception as exc:
+                error = exc
+
+            with self._lock:
+                for write in batch:
+                    write.done = True
+                    write.error = error
+                self._committed.notify_all()
+
+    def _take_batch(self) -> List[_PendingWrite]:
+        """
+        Grupos completos hasta `max_batch` ventas (al menos uno, aunque
+        por sí solo lo supere). Con el lock tomado.
+        """
+        batch: List[_PendingWrite] = []
+        taken = 0
+        for group in self._pending:
+            if batch and len(batch) + len(group) > self._max_batch:
+                break
+            batch.extend(group)
+            taken += 1
+        del self._pending[:taken]
+        self._pending_lines -= len(batch)
+        return batch
+
+    def _wait_for_batch(self) -> None:
+        """
+        Espera (con el lock tomado) a que se llene el lote o venza
+        la ventana de commit desde la llegada de la primera venta.
+        """
+        deadline = time.monotonic() + self._commit_window
+        while self._pending_lines < self._max_batch and not self._closing:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            self._work_ready.wait(remaining)
+
+    def _write_batch(self, batch: List[_PendingWrite]) -> None:
+        payload = b"".join(write.line for write in batch)
+        offset = self._file.tell()
+        if offset > 0 and offset + len(payload) > self._segment_max_bytes:
+            self._rotate()
+            offset = 0
+        try:
+            self._file.write(payload)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self.fsync_count += 1
+        except Exception:
+            # Deja el segmento como estaba antes del lote fallido.
+            self._file.truncate(offset)
+            self._file.seek(offset)
+            raise
+
+    def _rotate(self) -> None:
+        self._file.close()
+        self._segment += 1
+        self._file = open(os.path.join(self._directory, _segment_name(self._segment)), "ab")
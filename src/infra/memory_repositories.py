@@ -1,6 +1,13 @@
-from typing import Dict, Optional, List
-from core.models import Product
+import threading
+from bisect import bisect_right
+from dataclasses import replace
+from typing import TYPE_CHECKING, Dict, Iterable, Optional, List
+from core.models import Product, ProductPage, ProductSearchResult, SalePage
 from core.ports import ProductRepository, SaleRepository
+from infra.search_index import ProductSearchIndex
+
+if TYPE_CHECKING:
+    from infra.snapshots import ProductColumns
 
 
 class InMemoryProductRepository(ProductRepository):
@@ -11,16 +18,146 @@ class InMemoryProductRepository(ProductRepository):
 
     def __init__(self) -> None:
         self._data: Dict[str, Product] = {}
+        # Hace atómica la comparación de versiones con la escritura.
+        self._write_lock = threading.Lock()
+        # El índice de búsqueda se construye en la primera búsqueda si
+        # el repositorio se restauró desde un snapshot (ver from_columns).
+        self._index: Optional[ProductSearchIndex] = ProductSearchIndex()
+        # Códigos ordenados para paginar; se recalcula solo cuando
+        # aparece un código nuevo (no en cada actualización de stock).
+        self._sorted_codes: Optional[List[str]] = None
+        # Filas de un snapshot restaurado que todavía no se convirtieron
+        # en Product: cada una se materializa al leerla por primera vez.
+        self._columns: Optional["ProductColumns"] = None
+        self._unloaded: Dict[str, int] = {}
+
+    @classmethod
+    def from_columns(cls, columns: "ProductColumns") -> "InMemoryProductRepository":
+        """
+        Repositorio restaurado desde un snapshot. No crea un Product por
+        SKU al arrancar (con millones de SKUs, eso tomaría segundos):
+        solo el índice código -> fila.
+        """
+        repo = cls()
+        repo._columns = columns
+        repo._unloaded = dict(zip(columns.codes, range(len(columns.codes))))
+        # Los códigos del snapshot ya vienen ordenados.
+        repo._sorted_codes = list(columns.codes)
+        repo._index = None
+        return repo
 
     def find_by_code(self, code: str) -> Optional[Product]:
-        return self._data.get(code)
+        return self._get(code)
+
+    def find_by_codes(self, codes: Iterable[str]) -> Dict[str, Product]:
+        found: Dict[str, Product] = {}
+        for code in codes:
+            product = self._get(code)
+            if product is not None:
+                found[code] = product
+        return found
 
     def save(self, product: Product) -> None:
-        self._data[product.code] = product
+        with self._write_lock:
+            self._store(product)
+
+    def save_many(self, products: Iterable[Product]) -> None:
+        with self._write_lock:
+            for product in products:
+                self._store(product)
+
+    def compare_and_save_many(self, products: Iterable[Product]) -> List[str]:
+        products = list(products)
+        with self._write_lock:
+            conflicts: List[str] = []
+            for product in products:
+                current = self._get(product.code)
+                if current is None or current.version != product.version:
+                    conflicts.append(product.code)
+            if conflicts:
+                return conflicts
+            for product in products:
+                self._store(replace(product, version=product.version + 1))
+        return []
 
     def list_all(self) -> List[Product]:
+        self._load_all()
         return list(self._data.values())
 
+    def page_products(self, after: Optional[str] = None, limit: int = 500) -> ProductPage:
+        codes = self._sorted_codes
+        if codes is None:
+            self._load_all()
+            codes = self._sorted_codes = sorted(self._data)
+        start = bisect_right(codes, after) if after is not None else 0
+        page = codes[start:start + limit]
+        more = start + limit < len(codes)
+        return ProductPage(
+            items=[self._get(code) for code in page],  # type: ignore[misc]
+            next_token=page[-1] if more else None,
+        )
+
+    def search(
+        self,
+        text: str,
+        location: Optional[str] = None,
+        offset: int = 0,
+        limit: int = 20,
+    ) -> ProductSearchResult:
+        index = self._index
+        if index is None:
+            index = self._build_index()
+        page, total = index.search_page(text, location, offset, limit)
+        return ProductSearchResult(
+            items=[self._data[code] for code in page],
+            total=total,
+        )
+
+    def _get(self, code: str) -> Optional[Product]:
+        product = self._data.get(code)
+        if product is None and self._unloaded:
+            columns = self._columns
+            row = self._unloaded.get(code)
+            if row is not None and columns is not None:
+                # setdefault: si una escritura llegó antes, gana esa.
+                product = self._data.setdefault(code, columns.product_at(row))
+            else:
+                # _load_all terminó entre medio: la fila ya está en _data.
+                product = self._data.get(code)
+        return product
+
+    def _load_all(self) -> None:
+        """
+        Materializa las filas del snapshot que falten y lo libera.
+        """
+        if not self._unloaded:
+            return
+        with self._write_lock:
+            columns = self._columns
+            if columns is not None:
+                for code, row in self._unloaded.items():
+                    if code not in self._data:
+                        self._data[code] = columns.product_at(row)
+            self._columns = None
+            self._unloaded = {}
+
+    def _build_index(self) -> ProductSearchIndex:
+        self._load_all()
+        with self._write_lock:
+            if self._index is None:
+                index = ProductSearchIndex()
+                for product in self._data.values():
+                    index.add(product)
+                self._index = index
+            return self._index
+
+    def _store(self, product: Product) -> None:
+        if product.code not in self._data and product.code not in self._unloaded:
+            self._sorted_codes = None
+        self._data[product.code] = product
+        if self._index is not None:
+            self._index.add(product)
+
     def seed_demo_data(self) -> None:
         """
         Carga algunos productos de ejemplo para pruebas manuales.
@@ -74,5 +211,13 @@ class InMemorySaleRepository(SaleRepository):
     def save_sale(self, data: dict) -> None:
         self._sales.append(data)
 
+    def save_sales(self, sales: List[dict]) -> None:
+        self._sales.extend(sales)
+
     def list_sales(self) -> List[dict]:
         return list(self._sales)
+
+    def page_sales(self, since: int = 0, limit: int = 500) -> SalePage:
+        # El token es la posición en el historial (solo se anexa).
+        items = self._sales[since:since + limit]
+        return SalePage(items=items, next_token=since + len(items))
@@ -0,0 +1,154 @@
+import threading
+from bisect import bisect_left
+from dataclasses import dataclass
+from typing import Dict, List, Sequence, Tuple
+from core.metrics import MetricsSink
+
+
+# Límites superiores de los buckets, en segundos (de 50 µs a 5 s).
+DEFAULT_BUCKETS: Tuple[float, ...] = (
+    0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005,
+    0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+)
+
+
+@dataclass
+class HistogramSnapshot:
+    """
+    Copia de un histograma: `counts[i]` es la cantidad de observaciones
+    en el bucket i (no acumulado); el último bucket es +Inf.
+    """
+    bounds: Tuple[float, ...]
+    counts: List[int]
+    count: int
+    total: float
+
+    def quantile(self, q: float) -> float:
+        """
+        Estimación del cuantil `q` (0..1): límite superior del bucket
+        donde cae. Devuelve +Inf si cae en el último bucket.
+        """
+        if self.count == 0:
+            return 0.0
+        target = q * self.count
+        seen = 0
+        for bound, count in zip(self.bounds + (float("inf"),), self.counts):
+            seen += count
+            if seen >= target:
+                return bound
+        return float("inf")
+
+
+class _Histogram:
+    __slots__ = ("counts", "count", "total")
+
+    def __init__(self, size: int) -> None:
+        self.counts = [0] * size
+        self.count = 0
+        self.total = 0.0
+
+
+class HistogramMetricsSink(MetricsSink):
+    """
+    Sink en proceso: histogramas de duración por (componente, etapa)
+    y contadores de llamadas a repositorios y de errores.
+    """
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS) -> None:
+        self._bounds = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        self._histograms: Dict[Tuple[str, str], _Histogram] = {}
+        self._repository_calls: Dict[Tuple[str, str, str], int] = {}
+        self._errors: Dict[Tuple[str, str], int] = {}
+
+    # ----- MetricsSink -----
+
+    def observe_stage(self, component: str, stage: str, seconds: float) -> None:
+        bucket = bisect_left(self._bounds, seconds)
+        with self._lock:
+            histogram = self._histograms.get((component, stage))
+            if histogram is None:
+                histogram = self._histograms[(component, stage)] = _Histogram(len(self._bounds) + 1)
+            histogram.counts[bucket] += 1
+            histogram.count += 1
+            histogram.total += seconds
+
+    def count_repository_call(self, component: str, repository: str, operation: str) -> None:
+        key = (component, repository, operation)
+        with self._lock:
+            self._repository_calls[key] = self._repository_calls.get(key, 0) + 1
+
+    def count_error(self, component: str, error_type: str) -> None:
+        key = (component, error_type)
+        with self._lock:
+            self._errors[key] = self._errors.get(key, 0) + 1
+
+    # ----- Consultas -----
+
+    def histograms(self) -> Dict[Tuple[str, str], HistogramSnapshot]:
+        with self._lock:
+            return {
+                key: HistogramSnapshot(self._bounds, list(h.counts), h.count, h.total)
+                for key, h in self._histograms.items()
+            }
+
+    def repository_calls(self) -> Dict[Tuple[str, str, str], int]:
+        with self._lock:
+            return dict(self._repository_calls)
+
+    def errors(self) -> Dict[Tuple[str, str], int]:
+        with self._lock:
+            return dict(self._errors)
+
+
+# ==========
+# Exportación en formato de texto de Prometheus
+# ==========
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(**labels: str) -> str:
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + "}"
+
+
+def _format_bound(bound: float) -> str:
+    return "+Inf" if bound == float("inf") else repr(bound)
+
+
+def render_prometheus(sink: HistogramMetricsSink, prefix: str = "sigi") -> str:
+    """
+    Devuelve las métricas del sink en el formato de texto de Prometheus
+    (para servir en /metrics).
+    """
+    lines: List[str] = []
+
+    name = f"{prefix}_stage_duration_seconds"
+    lines.append(f"# HELP {name} Duración de cada etapa de los servicios del Core.")
+    lines.append(f"# TYPE {name} histogram")
+    for (component, stage), histogram in sorted(sink.histograms().items()):
+        cumulative = 0
+        for bound, count in zip(histogram.bounds + (float("inf"),), histogram.counts):
+            cumulative += count
+            labels = _labels(component=component, stage=stage, le=_format_bound(bound))
+            lines.append(f"{name}_bucket{labels} {cumulative}")
+        labels = _labels(component=component, stage=stage)
+        lines.append(f"{name}_sum{labels} {histogram.total!r}")
+        lines.append(f"{name}_count{labels} {histogram.count}")
+
+    name = f"{prefix}_repository_calls_total"
+    lines.append(f"# HELP {name} Llamadas a los repositorios por operación.")
+    lines.append(f"# TYPE {name} counter")
+    for (component, repository, operation), value in sorted(sink.repository_calls().items()):
+        labels = _labels(component=component, repository=repository, operation=operation)
+        lines.append(f"{name}{labels} {value}")
+
+    name = f"{prefix}_errors_total"
+    lines.append(f"# HELP {name} Errores de dominio y de validación por tipo.")
+    lines.append(f"# TYPE {name} counter")
+    for (component, error_type), value in sorted(sink.errors().items()):
+        lines.append(f"{name}{_labels(component=component, error=error_type)} {value}")
+
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,395 @@
+import calendar
+import json
+import os
+import threading
+import time
+import uuid
+from itertools import islice
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+from core.models import SalePage
+from core.ports import SaleRepository
+from infra.snapshots import (
+    SaleLineColumns,
+    load_sale_line_columns,
+    load_sale_snapshot,
+    sale_line_columns,
+    save_sale_snapshot,
+)
+
+# ==========
+# Nombres de las particiones
+# ==========
+# Una partición por día (UTC), según el timestamp de cada venta:
+#
+#   sales-20260314.jsonl          ventas anexadas (JSON lines)
+#   sales-20260314.<token>.snap   partición compactada (snapshot por columnas)
+#
+# Un día puede tener ambos archivos: el snapshot con lo compactado y el
+# .jsonl con ventas que llegaron después (p. ej. un terminal que
+# sincroniza tarde). El token identifica cada compactación y permite
+# terminarla si el proceso murió a mitad (ver _recover_compactions).
+
+_DAY = 86_400
+_PREFIX = "sales-"
+_LOG_SUFFIX = ".jsonl"
+_SNAP_SUFFIX = ".snap"
+# Registro renombrado durante una compactación: sales-20260314.<token>.compacting
+_COMPACTING_SUFFIX = ".compacting"
+# Token de paginación: día y posición de la venta dentro del día, en un
+# solo entero (0 = desde el inicio).
+_POSITION_BITS = 32
+
+
+def _day_of(timestamp: float) -> int:
+    return int(timestamp // _DAY)
+
+
+def _day_label(day: int) -> str:
+    return time.strftime("%Y%m%d", time.gmtime(day * _DAY))
+
+
+def _parse_day(label: str) -> Optional[int]:
+    if len(label) != 8 or not label.isdigit():
+        return None
+    try:
+        return calendar.timegm(time.strptime(label, "%Y%m%d")) // _DAY
+    except ValueError:
+        return None
+
+
+def _cursor(day: int, position: int) -> int:
+    return day << _POSITION_BITS | position
+
+
+def _split_cursor(token: int) -> Tuple[int, int]:
+    return token >> _POSITION_BITS, token & ((1 << _POSITION_BITS) - 1)
+
+
+def _read_log(path: str) -> List[dict]:
+    """
+    Ventas de un .jsonl. Una última línea incompleta (escritura
+    interrumpida) se ignora.
+    """
+    sales = []
+    with open(path, "rb") as log:
+        for line in log:
+            if not line.endswith(b"\n"):
+                break
+            sales.append(json.loads(line))
+    return sales
+
+
+class PartitionedSaleRepository(SaleRepository):
+    """
+    Historial de ventas particionado por día.
+
+    - Escritura: cada venta se anexa al .jsonl de su día (según
+      `timestamp`; si no trae uno, se le asigna la hora de `clock`).
+    - `sales_between(start, end)` abre solo las particiones de los días
+      del rango.
+    - `compact(before)` pasa los días anteriores a `before` a snapshots
+      por columnas, más compactos y rápidos de leer, ordenados por
+      timestamp.
+    - Retención: `drop_before` / `apply_retention` borran particiones
+      enteras (un unlink por archivo, sin reescribir nada).
+
+    `page_sales` / `iter_sales` recorren los días en orden; el token es
+    (día, posición dentro del día), así que retomar no relee los días
+    anteriores, y ni la retención ni las ventas tardías de otros días
+    lo corren. Compactar un día lo reordena por timestamp: un recorrido
+    que estaba a mitad de ese día puede repetir u omitir ventas de él.
+    """
+
+    def __init__(self, directory: str, clock=time.time, sync: bool = False) -> None:
+        self._directory = directory
+        self._clock = clock
+        self._sync = sync
+        self._lock = threading.RLock()
+        # Compactación y retención, de a una; no frenan escrituras ni lecturas.
+        self._maintenance = threading.Lock()
+        self._logs: Set[int] = set()
+        # Día -> token del snapshot vigente.
+        self._snaps: Dict[int, str] = {}
+        # Día -> token del registro que se está compactando (se sigue leyendo).
+        self._compacting: Dict[int, str] = {}
+        os.makedirs(directory, exist_ok=True)
+        self._recover_compactions(self._scan())
+
+    # ----- API del puerto -----
+
+    def save_sale(self, data: dict) -> None:
+        self.save_sales([data])
+
+    def save_sales(self, sales: List[dict]) -> None:
+        """
+        Anexa las ventas al registro de su día. Un lote que abarca
+        varios días escribe un archivo por día.
+        """
+        by_day: Dict[int, List[bytes]] = {}
+        now = None
+        for data in sales:
+            timestamp = data.get("timestamp")
+            if timestamp is None:
+                now = self._clock() if now is None else now
+                data = dict(data, timestamp=now)
+                timestamp = now
+            line = json.dumps(data, ensure_ascii=False, separators=(",", ":")) + "\n"
+            by_day.setdefault(_day_of(timestamp), []).append(line.encode("utf-8"))
+
+        with self._lock:
+            for day, lines in sorted(by_day.items()):
+                with open(self._log_path(day), "ab") as log:
+                    log.write(b"".join(lines))
+                    log.flush()
+                    if self._sync:
+                        os.fsync(log.fileno())
+                self._logs.add(day)
+
+    def page_sales(self, since: int = 0, limit: int = 500) -> SalePage:
+        items: List[dict] = []
+        next_token = since
+        for sale, next_token in islice(self._iter_positions(since), limit):
+            items.append(sale)
+        return SalePage(items=items, next_token=next_token)
+
+    def iter_sales(self, since: int = 0, batch_size: int = 500) -> Iterator[dict]:
+        """
+        Recorre las ventas día por día desde el token `since` (de
+        page_sales; 0 = desde el inicio). Cada partición se lee completa
+        al llegar a ella (memoria acotada a un día de ventas); los días
+        anteriores al del token no se abren.
+        """
+        for sale, _ in self._iter_positions(since):
+            yield sale
+
+    def list_sales(self) -> List[dict]:
+        return list(self.iter_sales())
+
+    # ----- Consultas por rango -----
+
+    def sales_between(self, start: float, end: float) -> List[dict]:
+        """
+        Ventas con `start <= timestamp < end`, día por día. Solo se
+        abren las particiones de los días que toca el rango.
+        """
+        result: List[dict] = []
+        first, last = _day_of(start), _day_of(end)
+        for day in self._days_between(start, end):
+            # Los días intermedios caen completos en el rango.
+            whole_day = first < day < last
+            result.extend(self._read_partition(
+                day, None if whole_day else start, None if whole_day else end
+            ))
+        return result
+
+    def iter_line_columns(self, start: float, end: float) -> Iterator[SaleLineColumns]:
+        """
+        Líneas de venta en columnas (ver SaleLineColumns), una entrega
+        por archivo de las particiones que toca el rango. Las particiones
+        compactadas se leen sin decodificar cada venta. Entrega los días
+        completos: quien consume filtra por timestamp.
+        """
+        for day in self._days_between(start, end):
+            with self._lock:
+                token = self._snaps.get(day)
+                columns = [load_sale_line_columns(self._snap_path(day, token))] if token else []
+                columns.extend(sale_line_columns(logged) for logged in self._read_logs(day))
+            yield from columns
+
+    def partitions(self) -> List[int]:
+        """
+        Días con ventas (días desde epoch, UTC), en orden.
+        """
+        with self._lock:
+            return sorted(self._logs.union(self._snaps, self._compacting))
+
+    # ----- Mantenimiento -----
+
+    def compact(self, before: Optional[float] = None) -> int:
+        """
+        Compacta las particiones de los días anteriores a `before` (por
+        defecto, todos menos el de hoy): el .jsonl se funde con el
+        snapshot del día, si ya había uno. Devuelve la cantidad de
+        particiones compactadas.
+
+        Solo el renombre del registro y el cambio al snapshot nuevo
+        toman el lock de las escrituras: el snapshot se arma fuera de
+        él, mientras las ventas nuevas del día van a un .jsonl nuevo y
+        las lecturas siguen viendo el registro renombrado.
+        """
+        cutoff = _day_of(self._clock() if before is None else before)
+        compacted = 0
+        with self._maintenance:
+            with self._lock:
+                days = [day for day in sorted(self._logs) if day < cutoff]
+            for day in days:
+                token = uuid.uuid4().hex
+                pending = self._compacting_path(day, token)
+                with self._lock:
+                    os.replace(self._log_path(day), pending)
+                    self._logs.discard(day)
+                    self._compacting[day] = token
+                self._compact_day(day, pending, token)
+                compacted += 1
+        return compacted
+
+    def drop_before(self, timestamp: float) -> int:
+        """
+        Borra las particiones de los días anteriores al de `timestamp`
+        (el día de `timestamp` se conserva entero). Devuelve la
+        cantidad de días borrados.
+        """
+        cutoff = _day_of(timestamp)
+        dropped = 0
+        with self._maintenance, self._lock:
+            for day in sorted(self._logs.union(self._snaps)):
+                if day >= cutoff:
+                    break
+                if day in self._logs:
+                    os.remove(self._log_path(day))
+                    self._logs.discard(day)
+                if day in self._snaps:
+                    os.remove(self._snap_path(day, self._snaps.pop(day)))
+                dropped += 1
+        return dropped
+
+    def apply_retention(self, keep_days: int) -> int:
+        """
+        Conserva el día de hoy y los `keep_days - 1` anteriores.
+        """
+        if keep_days < 1:
+            raise ValueError("keep_days debe ser al menos 1.")
+        today = _day_of(self._clock())
+        return self.drop_before((today - keep_days + 1) * _DAY)
+
+    # ----- Internos -----
+
+    def _log_path(self, day: int) -> str:
+        return os.path.join(self._directory, f"{_PREFIX}{_day_label(day)}{_LOG_SUFFIX}")
+
+    def _snap_path(self, day: int, token: str) -> str:
+        return os.path.join(self._directory, f"{_PREFIX}{_day_label(day)}.{token}{_SNAP_SUFFIX}")
+
+    def _compacting_path(self, day: int, token: str) -> str:
+        return os.path.join(
+            self._directory, f"{_PREFIX}{_day_label(day)}.{token}{_COMPACTING_SUFFIX}"
+        )
+
+    def _days_between(self, start: float, end: float) -> List[int]:
+        """
+        Días con partición que tocan el rango [start, end).
+        """
+        if end <= start:
+            return []
+        first, last = _day_of(start), _day_of(end)
+        if last * _DAY == end:
+            last -= 1
+        return [day for day in self.partitions() if first <= day <= last]
+
+    def _scan(self) -> Dict[int, List[str]]:
+        """
+        Registra los .jsonl y snapshots del directorio. Devuelve los
+        tokens de snapshot de cada día (más de uno solo si una
+        compactación quedó a medias).
+        """
+        snaps: Dict[int, List[str]] = {}
+        for name in sorted(os.listdir(self._directory)):
+            if not name.startswith(_PREFIX):
+                continue
+            if name.endswith(_LOG_SUFFIX):
+                day = _parse_day(name[len(_PREFIX):-len(_LOG_SUFFIX)])
+                if day is not None:
+                    self._logs.add(day)
+            elif name.endswith(_SNAP_SUFFIX):
+                label, _, token = name[len(_PREFIX):-len(_SNAP_SUFFIX)].partition(".")
+                day = _parse_day(label)
+                if day is not None and token:
+                    snaps.setdefault(day, []).append(token)
+                    self._snaps[day] = token
+        return snaps
+
+    def _iter_positions(self, since: int) -> Iterator[Tuple[dict, int]]:
+        """
+        Ventas desde el token `since`, cada una con el token que apunta
+        justo después de ella.
+        """
+        first, skip = _split_cursor(since)
+        for day in self.partitions():
+            if day < first:
+                continue
+            position = skip if day == first else 0
+            for sale in self._read_partition(day)[position:]:
+                position += 1
+                yield sale, _cursor(day, position)
+
+    def _read_logs(self, day: int) -> List[List[dict]]:
+        """
+        Registros del día en orden: el que se está compactando (si hay)
+        y el .jsonl vigente. Con el lock tomado.
+        """
+        logs = []
+        token = self._compacting.get(day)
+        if token is not None:
+            logs.append(_read_log(self._compacting_path(day, token)))
+        if day in self._logs:
+            logs.append(_read_log(self._log_path(day)))
+        return logs
+
+    def _read_partition(
+        self, day: int, start: Optional[float] = None, end: Optional[float] = None
+    ) -> List[dict]:
+        with self._lock:
+            token = self._snaps.get(day)
+            sales = load_sale_snapshot(self._snap_path(day, token), start, end) if token else []
+            for logged in self._read_logs(day):
+                if start is not None:
+                    logged = [sale for sale in logged if start <= sale["timestamp"] < end]
+                sales.extend(logged)
+        return sales
+
+    def _compact_day(self, day: int, pending: str, token: str) -> None:
+        """
+        Funde el registro renombrado (`pending`) con el snapshot del día
+        en un snapshot nuevo que lleva el mismo `token`. Orden de los
+        pasos: snapshot nuevo, borrar el anterior, borrar `pending`.
+        Solo el cambio de snapshot toma el lock; el snapshot anterior no
+        cambia mientras tanto porque la compactación y la retención van
+        de a una.
+        """
+        previous = self._snaps.get(day)
+        sales = load_sale_snapshot(self._snap_path(day, previous)) if previous else []
+        sales.extend(_read_log(pending))
+        # Orden estable: las ventas del mismo instante quedan en orden de registro.
+        sales.sort(key=lambda sale: sale["timestamp"])
+        save_sale_snapshot(self._snap_path(day, token), sales)
+        with self._lock:
+            self._snaps[day] = token
+            self._compacting.pop(day, None)
+            if previous:
+                os.remove(self._snap_path(day, previous))
+            os.remove(pending)
+
+    def _recover_compactions(self, snaps: Dict[int, List[str]]) -> None:
+        """
+        Termina una compactación interrumpida. Si el snapshot con el
+        token del registro renombrado ya existe, el registro está
+        incluido y solo quedan por borrar los archivos viejos; si no,
+        se repite la compactación.
+        """
+        for name in sorted(os.listdir(self._directory)):
+            if not (name.startswith(_PREFIX) and name.endswith(_COMPACTING_SUFFIX)):
+                continue
+            label, _, token = name[len(_PREFIX):-len(_COMPACTING_SUFFIX)].partition(".")
+            day = _parse_day(label)
+            if day is None:
+                continue
+            pending = os.path.join(self._directory, name)
+            tokens = snaps.get(day, [])
+            if token in tokens:
+                for stale in tokens:
+                    if stale != token:
+                        os.remove(self._snap_path(day, stale))
+                self._snaps[day] = token
+                os.remove(pending)
+            else:
+                self._compact_day(day, pending, token)
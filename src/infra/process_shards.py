@@ -0,0 +1,188 @@
+import multiprocessing
+import threading
+from multiprocessing.connection import Connection
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+from core.errors import DomainError
+from core.models import Cart, Product
+from core.pricing import PricingEngine
+from core.ports import ProductRepository
+from core.services import Receipt, ReceiptItem, SaleOutcome
+from core.sharding import InventoryShard, LocalInventoryShard, ShardOperation
+from infra.memory_repositories import InMemoryProductRepository
+
+
+# ==========
+# Formato de transporte
+# ==========
+# Los lotes viajan como tuplas de valores simples en lugar de objetos
+# Cart / Receipt: pickle las serializa varias veces más rápido, y el
+# coordinador (un solo proceso) no se vuelve el cuello de botella.
+
+_EncodedOperation = Tuple[Optional[str], Optional[float], List[Tuple[str, int]]]
+_EncodedOutcome = Union[DomainError, Tuple[List[tuple], float]]
+
+
+def _encode_operations(operations: List[ShardOperation]) -> List[_EncodedOperation]:
+    return [
+        (
+            op.txid,
+            op.timestamp,
+            [(item.product_code, item.quantity) for item in op.cart.get_items()],
+        )
+        for op in operations
+    ]
+
+
+def _decode_operations(encoded: List[_EncodedOperation]) -> List[ShardOperation]:
+    operations: List[ShardOperation] = []
+    for txid, timestamp, lines in encoded:
+        cart = Cart()
+        for code, quantity in lines:
+            cart.add_item(code, quantity)
+        operations.append(ShardOperation(cart=cart, txid=txid, timestamp=timestamp))
+    return operations
+
+
+def _encode_outcomes(outcomes: List[SaleOutcome]) -> List[_EncodedOutcome]:
+    encoded: List[_EncodedOutcome] = []
+    for outcome in outcomes:
+        if outcome.error is not None:
+            encoded.append(outcome.error)
+            continue
+        receipt = outcome.receipt
+        encoded.append((
+            [
+                (i.product_code, i.name, i.quantity, i.unit_price, i.total, i.discount, i.promotion)
+                for i in receipt.items
+            ],
+            receipt.grand_total,
+        ))
+    return encoded
+
+
+def _decode_outcomes(encoded: List[_EncodedOutcome]) -> List[SaleOutcome]:
+    outcomes: List[SaleOutcome] = []
+    for value in encoded:
+        if isinstance(value, DomainError):
+            outcomes.append(SaleOutcome(error=value))
+            continue
+        lines, grand_total = value
+        receipt = Receipt(items=[ReceiptItem(*line) for line in lines], grand_total=grand_total)
+        outcomes.append(SaleOutcome(receipt=receipt))
+    return outcomes
+
+
+# ==========
+# Proceso trabajador
+# ==========
+
+
+def _serve(
+    connection: Connection,
+    repository_factory: Callable[[], ProductRepository],
+    pricing: Optional[PricingEngine] = None,
+) -> None:
+    """
+    Bucle del proceso trabajador: recibe (método, argumentos), ejecuta
+    sobre su LocalInventoryShard y responde (ok, resultado o excepción).
+    """
+    shard = LocalInventoryShard(repository_factory(), pricing)
+    handlers: Dict[str, Callable[..., Any]] = {
+        "load": shard.load,
+        "find_by_codes": shard.find_by_codes,
+        "execute": lambda encoded: _encode_outcomes(shard.execute(_decode_operations(encoded))),
+        "finish": shard.finish,
+        "release": shard.release,
+    }
+    while True:
+        try:
+            request = connection.recv()
+        except EOFError:
+            return
+        if request is None:
+            return
+        method, args = request
+        try:
+            reply = (True, handlers[method](*args))
+        except Exception as exc:
+            reply = (False, exc)
+        connection.send(reply)
+
+
+class ProcessInventoryShard(InventoryShard):
+    """
+    Shard de inventario en un proceso trabajador propio, dueño de su
+    ProductRepository (creado dentro del proceso con `repository_factory`,
+    que debe poder serializarse con pickle: una clase o función de módulo).
+
+    Cada llamada viaja por un Pipe; las llamadas desde varios hilos se
+    serializan. El proceso no comparte el GIL con el coordinador.
+
+    `pricing` (PricingEngine) se copia al proceso al arrancarlo: su
+    reloj también debe poder serializarse (time.time sí, una lambda no),
+    y un cambio de promociones requiere shards nuevos.
+    """
+
+    def __init__(
+        self,
+        repository_factory: Callable[[], ProductRepository] = InMemoryProductRepository,
+        context: Optional[Any] = None,
+        pricing: Optional[PricingEngine] = None,
+    ) -> None:
+        # "spawn" evita heredar hilos y locks del proceso padre.
+        context = context or multiprocessing.get_context("spawn")
+        self._connection, child = context.Pipe()
+        self._process = context.Process(
+            target=_serve, args=(child, repository_factory, pricing), daemon=True
+        )
+        self._process.start()
+        child.close()
+        self._lock = threading.Lock()
+
+    def load(self, products: List[Product]) -> None:
+        self._call("load", products)
+
+    def find_by_codes(self, codes: List[str]) -> Dict[str, Product]:
+        return self._call("find_by_codes", codes)
+
+    def execute(self, operations: List[ShardOperation]) -> List[SaleOutcome]:
+        return _decode_outcomes(self._call("execute", _encode_operations(operations)))
+
+    def finish(self, commit: List[str], abort: List[str]) -> None:
+        self._call("finish", commit, abort)
+
+    def release(self, quantities: Dict[str, int]) -> None:
+        self._call("release", quantities)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._process.is_alive():
+                self._connection.send(None)
+            self._process.join()
+            self._connection.close()
+
+    def __enter__(self) -> "ProcessInventoryShard":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _call(self, method: str, *args: Any) -> Any:
+        with self._lock:
+            self._connection.send((method, args))
+            ok, result = self._connection.recv()
+        if not ok:
+            raise result
+        return result
+
+
+def start_process_shards(
+    count: int,
+    repository_factory: Callable[[], ProductRepository] = InMemoryProductRepository,
+    pricing: Optional[PricingEngine] = None,
+) -> List[ProcessInventoryShard]:
+    """
+    Arranca `count` shards en procesos trabajadores (normalmente uno por
+    núcleo). El llamador debe cerrarlos con close().
+    """
+    return [ProcessInventoryShard(repository_factory, pricing=pricing) for _ in range(count)]
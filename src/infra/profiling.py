@@ -0,0 +1,201 @@
+import cProfile
+import io
+import pstats
+import sys
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, Iterator, List, Tuple
+from core.models import Cart
+from infra.metrics import DEFAULT_BUCKETS, HistogramMetricsSink
+
+
+@dataclass
+class StageAllocations:
+    """
+    Memoria de una etapa, sumada sobre todas sus ejecuciones.
+
+    - `net_bytes` / `net_blocks`: lo que la etapa dejó vivo al terminar
+      (p. ej. la venta guardada en el repositorio).
+    - `peak_bytes`: suma de los picos de cada ejecución por encima de la
+      memoria al entrar; mide lo temporal (listas, dicts, recibos) aunque
+      se libere antes de salir.
+    """
+    calls: int = 0
+    net_bytes: int = 0
+    net_blocks: int = 0
+    peak_bytes: int = 0
+
+    def per_call(self) -> Tuple[float, float, float]:
+        calls = self.calls or 1
+        return self.net_bytes / calls, self.net_blocks / calls, self.peak_bytes / calls
+
+
+class _Frame:
+    __slots__ = ("start_bytes", "start_blocks", "peak")
+
+    def __init__(self, start_bytes: int, start_blocks: int) -> None:
+        self.start_bytes = start_bytes
+        self.start_blocks = start_blocks
+        self.peak = start_bytes
+
+
+class AllocationProfilingSink(HistogramMetricsSink):
+    """
+    Sink de perfilado: además de los histogramas de duración, mide la
+    memoria asignada en cada etapa con tracemalloc (si está activo).
+
+    Se activa pasándolo como `metrics` a los servicios, solo para una
+    corrida de perfilado: tracemalloc hace cada asignación varias veces
+    más lenta, así que las duraciones de esta corrida no son
+    representativas. Las etapas anidadas (confirm_sale contiene
+    validation, register_sale, ...) se miden por separado. Pensado para
+    un solo hilo: tracemalloc mide todo el proceso.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS) -> None:
+        super().__init__(buckets)
+        self._frames: List[_Frame] = []
+        self._allocations: Dict[Tuple[str, str], StageAllocations] = {}
+
+    @contextmanager
+    def stage(self, component: str, stage: str) -> Iterator[None]:
+        if not tracemalloc.is_tracing():
+            with super().stage(component, stage):
+                yield
+            return
+
+        current, peak = tracemalloc.get_traced_memory()
+        # El pico desde la última marca pertenece a las etapas abiertas.
+        for frame in self._frames:
+            frame.peak = max(frame.peak, peak)
+        tracemalloc.reset_peak()
+        frame = _Frame(current, sys.getallocatedblocks())
+        self._frames.append(frame)
+        try:
+            with super().stage(component, stage):
+                yield
+        finally:
+            current, peak = tracemalloc.get_traced_memory()
+            blocks = sys.getallocatedblocks()
+            frame.peak = max(frame.peak, peak)
+            self._frames.pop()
+            for outer in self._frames:
+                outer.peak = max(outer.peak, frame.peak)
+            tracemalloc.reset_peak()
+
+            totals = self._allocations.get((component, stage))
+            if totals is None:
+                totals = self._allocations[(component, stage)] = StageAllocations()
+            totals.calls += 1
+            totals.net_bytes += current - frame.start_bytes
+            totals.net_blocks += blocks - frame.start_blocks
+            totals.peak_bytes += frame.peak - frame.start_bytes
+
+    def allocations(self) -> Dict[Tuple[str, str], StageAllocations]:
+        return dict(self._allocations)
+
+
+@dataclass
+class AllocationSite:
+    location: str
+    size_bytes: int
+    count: int
+
+
+@dataclass
+class SaleProfile:
+    """
+    Resultado de profile_sales. Los valores "por venta" dividen por
+    la cantidad de carritos procesados (vendidos o rechazados).
+    """
+    sales: int
+    net_bytes: int
+    net_blocks: int
+    stages: Dict[Tuple[str, str], StageAllocations]
+    top_sites: List[AllocationSite]
+    hot_spots: str = ""
+    errors: Dict[str, int] = field(default_factory=dict)
+
+    def bytes_per_sale(self) -> float:
+        return self.net_bytes / (self.sales or 1)
+
+    def blocks_per_sale(self) -> float:
+        return self.net_blocks / (self.sales or 1)
+
+
+def profile_sales(
+    confirm_sale: Callable[[Cart], object],
+    sink: AllocationProfilingSink,
+    carts: Iterable[Cart],
+    top: int = 15,
+    with_cprofile: bool = True,
+) -> SaleProfile:
+    """
+    Confirma cada carrito con `confirm_sale` (normalmente el método de
+    un SaleService creado con `metrics=sink`) bajo tracemalloc y,
+    opcionalmente, cProfile.
+
+    - Memoria neta y bloques por venta de toda la corrida.
+    - Memoria por etapa (según el sink).
+    - Los `top` lugares del código que dejaron más memoria asignada.
+    - Con cProfile, las funciones con más tiempo acumulado (texto de
+      pstats). Para que su costo no se mezcle con el de las
+      asignaciones, la primera mitad de los carritos se perfila con
+      cProfile y la segunda con tracemalloc.
+    """
+    carts = list(carts)
+    errors: Dict[str, int] = {}
+
+    def run(batch: List[Cart]) -> None:
+        for cart in batch:
+            try:
+                confirm_sale(cart)
+            except Exception as exc:
+                errors[type(exc).__name__] = errors.get(type(exc).__name__, 0) + 1
+
+    hot_spots = ""
+    half = len(carts) // 2 if with_cprofile else 0
+    if with_cprofile:
+        profiler = cProfile.Profile()
+        profiler.enable()
+        run(carts[:half])
+        profiler.disable()
+        output = io.StringIO()
+        pstats.Stats(profiler, stream=output).sort_stats("cumulative").print_stats(top)
+        hot_spots = output.getvalue()
+
+    measured = carts[half:]
+    was_tracing = tracemalloc.is_tracing()
+    if not was_tracing:
+        tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot()
+        blocks_before = sys.getallocatedblocks()
+        bytes_before = tracemalloc.get_traced_memory()[0]
+        run(measured)
+        net_bytes = tracemalloc.get_traced_memory()[0] - bytes_before
+        net_blocks = sys.getallocatedblocks() - blocks_before
+        after = tracemalloc.take_snapshot()
+    finally:
+        if not was_tracing:
+            tracemalloc.stop()
+
+    ignored = [tracemalloc.Filter(False, tracemalloc.__file__)]
+    top_sites = [
+        AllocationSite(
+            location=f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+            size_bytes=stat.size_diff,
+            count=stat.count_diff,
+        )
+        for stat in after.filter_traces(ignored).compare_to(before.filter_traces(ignored), "lineno")[:top]
+    ]
+    return SaleProfile(
+        sales=len(measured),
+        net_bytes=net_bytes,
+        net_blocks=net_blocks,
+        stages=sink.allocations(),
+        top_sites=top_sites,
+        hot_spots=hot_spots,
+        errors=errors,
+    )
@@ -0,0 +1,332 @@
+import itertools
+import socket
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+from core.models import Cart, Product, ProductPage, ProductSearchResult, SalePage
+from core.ports import ProductRepository, SaleRepository
+from core.services import Receipt, SaleOutcome
+from infra.inventory_server import (
+    Address,
+    decode_error,
+    decode_product,
+    decode_receipt,
+    encode_cart,
+    encode_product,
+    read_frame,
+    write_frame,
+)
+
+# ==========
+# Conexiones
+# ==========
+
+
+class _Connection:
+    """
+    Una conexión al InventoryServer con varias llamadas en vuelo.
+
+    - Pipelining: cada llamada lleva un id y queda pendiente en
+      `_pending`; un hilo lector resuelve su Future al llegar la
+      respuesta, así que enviar no espera a la respuesta anterior.
+    - Agrupamiento: las llamadas que llegan mientras otro hilo está
+      enviando se acumulan en `_outbox` y salen juntas en la trama
+      siguiente (un solo sendall y una sola respuesta para todas).
+    """
+
+    def __init__(self, address: Address, timeout: Optional[float]) -> None:
+        try:
+            if isinstance(address, str):
+                self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                self._socket.settimeout(timeout)
+                try:
+                    self._socket.connect(address)
+                except OSError:
+                    self._socket.close()
+                    raise
+            else:
+                self._socket = socket.create_connection(address, timeout=timeout)
+                self._socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        except OSError as exc:
+            raise ConnectionError(f"No se pudo conectar con el servidor de inventario {address!r}: {exc}") from exc
+        # El lector espera respuestas sin límite; los timeouts son por llamada.
+        self._socket.settimeout(None)
+        self._reader_file = self._socket.makefile("rb")
+        self._lock = threading.Lock()
+        self._send_lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._pending: Dict[int, Future] = {}
+        self._outbox: List[list] = []
+        self._error: Optional[BaseException] = None
+        self._reader = threading.Thread(target=self._read_loop, name="inventory-client-reader", daemon=True)
+        self._reader.start()
+
+    @property
+    def alive(self) -> bool:
+        return self._error is None
+
+    def submit(self, calls: Sequence[Tuple[str, Sequence[Any]]]) -> List[Future]:
+        futures: List[Future] = []
+        with self._lock:
+            if self._error is not None:
+                raise ConnectionError(f"Conexión con el servidor de inventario cerrada: {self._error}")
+            for method, args in calls:
+                call_id = next(self._ids)
+                future: Future = Future()
+                self._pending[call_id] = future
+                self._outbox.append([call_id, method, list(args)])
+                futures.append(future)
+        self._flush()
+        return futures
+
+    def close(self) -> None:
+        self._fail(ConnectionError("Conexión cerrada por el cliente."))
+        try:
+            self._socket.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self._reader.join()
+        self._reader_file.close()
+        self._socket.close()
+
+    def _flush(self) -> None:
+        # Quien toma el lock de envío manda todo lo acumulado, incluidas
+        # las llamadas que otros hilos encolaron mientras esperaban.
+        with self._send_lock:
+            with self._lock:
+                batch, self._outbox = self._outbox, []
+            if not batch:
+                return
+            try:
+                write_frame(self._socket, batch)
+            except (OSError, ValueError) as exc:
+                self._fail(exc, [call[0] for call in batch])
+
+    def _read_loop(self) -> None:
+        try:
+            while True:
+                replies = read_frame(self._reader_file)
+                if replies is None:
+                    raise ConnectionError("El servidor cerró la conexión.")
+                for call_id, ok, result in replies:
+                    with self._lock:
+                        future = self._pending.pop(call_id, None)
+                    if future is None:
+                        continue
+                    if ok:
+                        future.set_result(result)
+                    else:
+                        future.set_exception(decode_error(result))
+        except (OSError, ValueError) as exc:
+            self._fail(exc)
+
+    def _fail(self, error: BaseException, call_ids: Optional[List[int]] = None) -> None:
+        """
+        Marca la conexión como caída y falla las llamadas pendientes
+        (todas, o solo `call_ids` si lo que falló fue un envío).
+        """
+        with self._lock:
+            if call_ids is None:
+                if self._error is None:
+                    self._error = error
+                failed = list(self._pending.values())
+                self._pending.clear()
+            else:
+                self._error = self._error or error
+                failed = [self._pending.pop(call_id) for call_id in call_ids if call_id in self._pending]
+        for future in failed:
+            if not future.done():
+                future.set_exception(ConnectionError(f"Sin respuesta del servidor de inventario: {error}"))
+
+
+class InventoryClient:
+    """
+    Cliente del InventoryServer con un pool de `connections` conexiones
+    (abiertas a demanda y reemplazadas si se caen). Cada conexión
+    admite muchas llamadas en vuelo, así que el pool se reparte en
+    turnos entre todos los hilos de la caja.
+
+    - `call`: una llamada, espera el resultado.
+    - `call_async`: devuelve un Future (pipelining desde un solo hilo).
+    - `call_many`: varias llamadas en una misma trama.
+
+    Los errores de dominio del servidor se relanzan con su tipo
+    (ValidationError, DomainError, ConcurrencyError); si la conexión
+    se corta, las llamadas pendientes fallan con ConnectionError y no
+    se reintentan solas (use claves de idempotencia al vender).
+    """
+
+    def __init__(self, address: Address, connections: int = 2, timeout: Optional[float] = 30.0) -> None:
+        if connections < 1:
+            raise ValueError("Se necesita al menos una conexión.")
+        self._address = address
+        self.timeout = timeout
+        self._slots: List[Optional[_Connection]] = [None] * connections
+        self._turns = itertools.count()
+        self._lock = threading.Lock()
+
+    def call(self, method: str, *args: Any) -> Any:
+        return self.call_async(method, *args).result(self.timeout)
+
+    def call_async(self, method: str, *args: Any) -> Future:
+        return self._connection().submit([(method, args)])[0]
+
+    def call_many(self, calls: Sequence[Tuple[str, Sequence[Any]]]) -> List[Future]:
+        """
+        Envía todas las llamadas juntas y devuelve un Future por llamada.
+        """
+        return self._connection().submit(calls) if calls else []
+
+    def close(self) -> None:
+        with self._lock:
+            connections, self._slots = self._slots, [None] * len(self._slots)
+        for connection in connections:
+            if connection is not None:
+                connection.close()
+
+    def __enter__(self) -> "InventoryClient":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _connection(self) -> _Connection:
+        slot = next(self._turns) % len(self._slots)
+        with self._lock:
+            connection = self._slots[slot]
+            if connection is None or not connection.alive:
+                if connection is not None:
+                    connection.close()
+                connection = self._slots[slot] = _Connection(self._address, self.timeout)
+            return connection
+
+
+def _then(future: Future, decode: Callable[[Any], Any]) -> Future:
+    """
+    Future con el resultado de `future` pasado por `decode`.
+    """
+    decoded: Future = Future()
+
+    def done(source: Future) -> None:
+        error = source.exception()
+        if error is not None:
+            decoded.set_exception(error)
+            return
+        try:
+            decoded.set_result(decode(source.result()))
+        except Exception as exc:
+            decoded.set_exception(exc)
+
+    future.add_done_callback(done)
+    return decoded
+
+
+# ==========
+# Adaptadores de los puertos
+# ==========
+
+
+class RemoteProductRepository(ProductRepository):
+    """
+    ProductRepository servido por un InventoryServer. Cada método es
+    una llamada; compare_and_save_many se resuelve en el servidor, así
+    que el guardado condicional sigue protegiendo contra otras cajas.
+    """
+
+    def __init__(self, client: InventoryClient) -> None:
+        self._client = client
+
+    def find_by_code(self, code: str) -> Optional[Product]:
+        return decode_product(self._client.call("find_by_code", code))
+
+    def find_by_codes(self, codes: Iterable[str]) -> Dict[str, Product]:
+        found = self._client.call("find_by_codes", list(codes))
+        return {code: decode_product(product) for code, product in found.items()}
+
+    def save(self, product: Product) -> None:
+        self._client.call("save", encode_product(product))
+
+    def save_many(self, products: Iterable[Product]) -> None:
+        self._client.call("save_many", [encode_product(p) for p in products])
+
+    def compare_and_save_many(self, products: Iterable[Product]) -> List[str]:
+        return self._client.call("compare_and_save_many", [encode_product(p) for p in products])
+
+    def list_all(self) -> List[Product]:
+        return [decode_product(p) for p in self._client.call("list_all")]
+
+    def page_products(self, after: Optional[str] = None, limit: int = 500) -> ProductPage:
+        items, next_token = self._client.call("page_products", after, limit)
+        return ProductPage(items=[decode_product(p) for p in items], next_token=next_token)
+
+    def search(
+        self,
+        text: str,
+        location: Optional[str] = None,
+        offset: int = 0,
+        limit: int = 20,
+    ) -> ProductSearchResult:
+        items, total = self._client.call("search", text, location, offset, limit)
+        return ProductSearchResult(items=[decode_product(p) for p in items], total=total)
+
+
+class RemoteSaleRepository(SaleRepository):
+    """
+    SaleRepository servido por un InventoryServer.
+    """
+
+    def __init__(self, client: InventoryClient) -> None:
+        self._client = client
+
+    def save_sale(self, data: dict) -> None:
+        self._client.call("save_sale", data)
+
+    def save_sales(self, sales: List[dict]) -> None:
+        self._client.call("save_sales", sales)
+
+    def page_sales(self, since: int = 0, limit: int = 500) -> SalePage:
+        items, next_token = self._client.call("page_sales", since, limit)
+        return SalePage(items=items, next_token=next_token)
+
+    def list_sales(self) -> List[dict]:
+        return list(self.iter_sales())
+
+
+class RemoteSaleService:
+    """
+    Ventas confirmadas en el servidor de inventario: la forma de que
+    varias cajas compartan el stock con una sola ida y vuelta por venta.
+
+    `submit_sale` no espera la respuesta (varias ventas en vuelo por
+    conexión); las que se envían juntas las confirma el servidor en un
+    solo lote.
+    """
+
+    def __init__(self, client: InventoryClient) -> None:
+        self._client = client
+
+    def confirm_sale(self, cart: Cart, idempotency_key: Optional[str] = None) -> Receipt:
+        return self.submit_sale(cart, idempotency_key).result(self._client.timeout)
+
+    def submit_sale(self, cart: Cart, idempotency_key: Optional[str] = None) -> Future:
+        """
+        Envía la venta y devuelve un Future con el Receipt.
+        """
+        args = [encode_cart(cart)] if idempotency_key is None else [encode_cart(cart), idempotency_key]
+        return _then(self._client.call_async("confirm_sale", *args), decode_receipt)
+
+    def submit_sales(self, carts: List[Cart]) -> List[Future]:
+        """
+        Envía varias ventas en una misma trama; un Future por carrito.
+        """
+        futures = self._client.call_many([("confirm_sale", [encode_cart(cart)]) for cart in carts])
+        return [_then(future, decode_receipt) for future in futures]
+
+    def confirm_sales(self, carts: List[Cart]) -> List[SaleOutcome]:
+        outcomes: List[SaleOutcome] = []
+        for ok, value in self._client.call("confirm_sales", [encode_cart(cart) for cart in carts]):
+            if ok:
+                outcomes.append(SaleOutcome(receipt=decode_receipt(value)))
+            else:
+                outcomes.append(SaleOutcome(error=decode_error(value)))
+        return outcomes
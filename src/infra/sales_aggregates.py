@@ -0,0 +1,223 @@
+import heapq
+import threading
+import time
+from dataclasses import dataclass
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from core.models import SalePage
+from core.ports import SaleRepository
+
+_DAY_SECONDS = 86400
+
+
+@dataclass
+class ProductTotals:
+    units: int = 0
+    revenue: float = 0.0
+
+
+@dataclass
+class BucketTotals:
+    """
+    Totales de un intervalo de tiempo (por defecto, un día UTC).
+    `start` es el inicio del intervalo en segundos desde epoch.
+    """
+    start: float
+    sales: int = 0
+    units: int = 0
+    revenue: float = 0.0
+
+
+class SalesAggregates:
+    """
+    Totales de ventas mantenidos de forma incremental.
+
+    Cada venta registrada actualiza los acumulados en O(líneas):
+    unidades e ingresos por producto, y totales por intervalo de tiempo.
+    Las consultas por producto o por intervalo responden en O(1), sin
+    recorrer el historial. `rebuild` recalcula todo desde el historial
+    (p. ej. al reiniciar o tras una pérdida de estado).
+
+    El momento de la venta se toma del campo "timestamp" del registro.
+    Una venta sin timestamp que se registra ahora cae en el intervalo
+    del reloj; una sin timestamp del historial (en `rebuild`) cuenta en
+    los totales por producto y generales, pero en ningún intervalo
+    (se informa en `undated_sales`), porque no se sabe cuándo ocurrió.
+    """
+
+    def __init__(
+        self,
+        bucket_seconds: int = _DAY_SECONDS,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self._bucket_seconds = bucket_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self) -> None:
+        self._products: Dict[str, ProductTotals] = {}
+        self._buckets: Dict[float, BucketTotals] = {}
+        self._sales = 0
+        self._revenue = 0.0
+        self._undated_sales = 0
+
+    # ----- Actualización -----
+
+    def add_sale(self, data: dict) -> None:
+        """
+        Suma una venta que se está registrando ahora.
+        """
+        timestamp = data.get("timestamp")
+        self._add(data, float(timestamp) if timestamp is not None else self._clock())
+
+    def _add(self, data: dict, at: Optional[float]) -> None:
+        with self._lock:
+            bucket = None
+            if at is None:
+                self._undated_sales += 1
+            else:
+                start = at - at % self._bucket_seconds
+                bucket = self._buckets.get(start)
+                if bucket is None:
+                    bucket = self._buckets[start] = BucketTotals(start=start)
+                bucket.sales += 1
+                bucket.revenue += data["grand_total"]
+            self._sales += 1
+            self._revenue += data["grand_total"]
+
+            for line in data["items"]:
+                totals = self._products.get(line["product_code"])
+                if totals is None:
+                    totals = self._products[line["product_code"]] = ProductTotals()
+                totals.units += line["quantity"]
+                totals.revenue += line["total"]
+                if bucket is not None:
+                    bucket.units += line["quantity"]
+
+    def rebuild(self, sales: Iterable[dict]) -> None:
+        """
+        Descarta los acumulados y los recalcula a partir del historial
+        (por ejemplo, `sale_repo.iter_sales()`). Si se siguen
+        registrando ventas mientras tanto, usar
+        AggregatingSaleRepository.rebuild.
+        """
+        with self._lock:
+            self._reset()
+        for data in sales:
+            timestamp = data.get("timestamp")
+            self._add(data, float(timestamp) if timestamp is not None else None)
+
+    # ----- Consultas O(1) -----
+
+    def units_sold(self, product_code: str) -> int:
+        with self._lock:
+            totals = self._products.get(product_code)
+            return totals.units if totals is not None else 0
+
+    def revenue(self, product_code: str) -> float:
+        with self._lock:
+            totals = self._products.get(product_code)
+            return totals.revenue if totals is not None else 0.0
+
+    def totals_at(self, timestamp: float) -> BucketTotals:
+        """
+        Totales del intervalo que contiene `timestamp`.
+        """
+        start = timestamp - timestamp % self._bucket_seconds
+        with self._lock:
+            bucket = self._buckets.get(start)
+            if bucket is None:
+                return BucketTotals(start=start)
+            return BucketTotals(bucket.start, bucket.sales, bucket.units, bucket.revenue)
+
+    @property
+    def undated_sales(self) -> int:
+        """
+        Ventas del historial sin timestamp (fuera de todo intervalo).
+        """
+        with self._lock:
+            return self._undated_sales
+
+    def overall(self) -> Tuple[int, float]:
+        """
+        Cantidad de ventas e ingresos totales.
+        """
+        with self._lock:
+            return self._sales, self._revenue
+
+    # ----- Rankings -----
+
+    def top_sellers(self, n: int = 10) -> List[Tuple[str, int]]:
+        """
+        Los `n` productos con más unidades vendidas. Recorre solo los
+        acumulados por producto (O(productos vendidos · log n)), nunca
+        el historial de ventas.
+        """
+        with self._lock:
+            return heapq.nlargest(
+                n,
+                ((code, totals.units) for code, totals in self._products.items()),
+                key=lambda pair: pair[1],
+            )
+
+
+class AggregatingSaleRepository(SaleRepository):
+    """
+    Decorador de SaleRepository que actualiza unos SalesAggregates
+    después de cada venta registrada con éxito.
+
+    Los registros avanzan en paralelo entre sí (el repositorio interno
+    puede agruparlos, como el journal). `rebuild` espera a que terminen
+    los registros en curso y frena los nuevos hasta terminar: cada
+    venta se cuenta una sola vez, por el historial o en vivo.
+    """
+
+    def __init__(self, inner: SaleRepository, aggregates: SalesAggregates) -> None:
+        self._inner = inner
+        self.aggregates = aggregates
+        self._gate = threading.Condition()
+        self._saving = 0
+        self._rebuilding = False
+
+    def save_sale(self, data: dict) -> None:
+        with self._registering():
+            self._inner.save_sale(data)
+            self.aggregates.add_sale(data)
+
+    def save_sales(self, sales: List[dict]) -> None:
+        with self._registering():
+            self._inner.save_sales(sales)
+            for data in sales:
+                self.aggregates.add_sale(data)
+
+    def page_sales(self, since: int = 0, limit: int = 500) -> SalePage:
+        return self._inner.page_sales(since, limit)
+
+    def rebuild(self) -> None:
+        """
+        Recalcula los acumulados desde el historial del repositorio interno.
+        """
+        with self._gate:
+            self._gate.wait_for(lambda: not self._rebuilding)
+            self._rebuilding = True
+            self._gate.wait_for(lambda: not self._saving)
+        try:
+            self.aggregates.rebuild(self._inner.iter_sales())
+        finally:
+            with self._gate:
+                self._rebuilding = False
+                self._gate.notify_all()
+
+    @contextmanager
+    def _registering(self) -> Iterator[None]:
+        with self._gate:
+            self._gate.wait_for(lambda: not self._rebuilding)
+            self._saving += 1
+        try:
+            yield
+        finally:
+            with self._gate:
+                self._saving -= 1
+                if not self._saving:
+                    self._gate.notify_all()
@@ -0,0 +1,158 @@
+import heapq
+import re
+import threading
+import unicodedata
+from bisect import bisect_left
+from typing import Dict, List, Optional, Set, Tuple
+from core.models import Product
+
+
+_TOKEN_PATTERN = re.compile(r"[^\W_]+")
+
+
+def _strip_marks(text: str) -> str:
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(c for c in decomposed if not unicodedata.combining(c))
+
+
+# Caracteres latinos (hasta U+024F) ya sin acentos: para los textos que
+# solo usan esos caracteres, un translate reemplaza la descomposición
+# carácter por carácter (mismo resultado, bastante más rápido).
+_LATIN_LIMIT = "\u0250"
+_LATIN_TABLE = {code: _strip_marks(chr(code)) for code in range(0x80, 0x250)}
+
+
+def normalize_search_text(text: str) -> str:
+    """
+    Pasa el texto a minúsculas y le quita los acentos
+    ("Galón" -> "galon", "Ñandú" -> "nandu").
+    """
+    if text.isascii():
+        return text.casefold()
+    if max(text) < _LATIN_LIMIT:
+        return text.translate(_LATIN_TABLE).casefold()
+    return _strip_marks(text).casefold()
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Divide un texto normalizado en palabras (letras y dígitos).
+    """
+    return _TOKEN_PATTERN.findall(normalize_search_text(text))
+
+
+class ProductSearchIndex:
+    """
+    Índice invertido en memoria sobre el nombre y la ubicación de los
+    productos, sin distinguir mayúsculas ni acentos.
+
+    - Cada palabra del nombre apunta al conjunto de códigos que la contienen.
+    - Cada palabra de la consulta se trata como prefijo: "tor 1/4" encuentra
+      "Caja de tornillos 1/4\"". Todas las palabras deben coincidir.
+    - Las ubicaciones se indexan por su texto normalizado completo.
+
+    El vocabulario ordenado (para buscar prefijos con bisect) se
+    reconstruye de forma perezosa solo cuando aparecen palabras nuevas,
+    así que las escrituras frecuentes de stock no lo afectan.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._postings: Dict[str, Set[str]] = {}
+        self._by_location: Dict[str, Set[str]] = {}
+        self._entries: Dict[str, Tuple[str, Tuple[str, ...], str]] = {}
+        self._vocabulary: List[str] = []
+        self._vocabulary_dirty = False
+
+    def add(self, product: Product) -> None:
+        """
+        Indexa (o reindexa) un producto. Si el nombre y la ubicación
+        no cambiaron, no hace nada.
+        """
+        with self._lock:
+            entry = self._entries.get(product.code)
+            if entry is not None and entry[0] == product.name and entry[2] == product.location:
+                return
+            if entry is not None:
+                self._remove(product.code, entry)
+
+            tokens = tuple(sorted(set(tokenize(product.name))))
+            location = normalize_search_text(product.location).strip()
+            self._entries[product.code] = (product.name, tokens, product.location)
+            for token in tokens:
+                codes = self._postings.get(token)
+                if codes is None:
+                    codes = self._postings[token] = set()
+                    self._vocabulary_dirty = True
+                codes.add(product.code)
+            self._by_location.setdefault(location, set()).add(product.code)
+
+    def search(self, text: str, location: Optional[str] = None) -> List[str]:
+        """
+        Devuelve los códigos que coinciden, ordenados por código
+        (orden estable para paginar).
+        """
+        return sorted(self._matches(text, location))
+
+    def search_page(
+        self, text: str, location: Optional[str] = None, offset: int = 0, limit: int = 20
+    ) -> Tuple[List[str], int]:
+        """
+        Una página de `search` y la cantidad total de coincidencias.
+        Solo se ordenan las `offset + limit` primeras (heapq.nsmallest),
+        no todas: una consulta corta sobre un catálogo grande no paga
+        el orden del conjunto completo.
+        """
+        candidates = self._matches(text, location)
+        return heapq.nsmallest(offset + limit, candidates)[offset:], len(candidates)
+
+    def _matches(self, text: str, location: Optional[str]) -> Set[str]:
+        """
+        Códigos que coinciden, sin ordenar (un conjunto nuevo).
+        """
+        prefixes = set(tokenize(text))
+        with self._lock:
+            if prefixes:
+                # Se intersecta empezando por el conjunto más pequeño.
+                matches = sorted((self._codes_with_prefix(p) for p in prefixes), key=len)
+                candidates = matches[0].intersection(*matches[1:])
+            else:
+                candidates = set(self._entries)
+
+            if location is not None:
+                key = normalize_search_text(location).strip()
+                candidates &= self._by_location.get(key, set())
+        return candidates
+
+    # ----- Internos (requieren el lock tomado) -----
+
+    def _codes_with_prefix(self, prefix: str) -> Set[str]:
+        if self._vocabulary_dirty:
+            self._vocabulary = sorted(self._postings)
+            self._vocabulary_dirty = False
+
+        matched: List[Set[str]] = []
+        position = bisect_left(self._vocabulary, prefix)
+        while position < len(self._vocabulary):
+            token = self._vocabulary[position]
+            if not token.startswith(prefix):
+                break
+            matched.append(self._postings[token])
+            position += 1
+        if len(matched) == 1:
+            return matched[0]
+        return set().union(*matched)
+
+    def _remove(self, code: str, entry: Tuple[str, Tuple[str, ...], str]) -> None:
+        _, tokens, location = entry
+        for token in tokens:
+            codes = self._postings[token]
+            codes.discard(code)
+            if not codes:
+                del self._postings[token]
+                self._vocabulary_dirty = True
+        location_key = normalize_search_text(location).strip()
+        codes = self._by_location[location_key]
+        codes.discard(code)
+        if not codes:
+            del self._by_location[location_key]
@@ -0,0 +1,650 @@
+import json
+import mmap
+import os
+import struct
+import sys
+import threading
+from array import array
+from dataclasses import dataclass, replace
+from itertools import accumulate
+from typing import Dict, Iterable, Iterator, List, Optional, TextIO, Tuple
+from core.models import Product, ProductPage, ProductSearchResult
+from core.ports import ProductRepository, SaleRepository
+from infra.columnar_repositories import ColumnarProductRepository
+from infra.memory_repositories import InMemoryProductRepository, InMemorySaleRepository
+
+# ==========
+# Formato binario
+# ==========
+# MAGIC | largo del encabezado (u32) | encabezado JSON | secciones
+#
+# El encabezado describe cada sección (desplazamiento, largo y tipo).
+# Las columnas numéricas se guardan como arreglos tipados (`array`) y
+# los textos como un único bloque UTF-8 separado por "\0". Al restaurar,
+# el archivo se mapea en memoria y cada columna se copia de una vez,
+# sin interpretar registro por registro.
+
+_MAGIC = b"SIGISNAP"
+_FORMAT = 1
+_ALIGNMENT = 8
+_SEPARATOR = "\0"
+
+
+def _check_text(value: str) -> str:
+    if _SEPARATOR in value:
+        raise ValueError(f"El texto {value!r} contiene un carácter nulo y no puede guardarse.")
+    return value
+
+
+def _join_texts(values: List[str]) -> bytes:
+    return _SEPARATOR.join(map(_check_text, values)).encode("utf-8")
+
+
+def _split_texts(blob: str, count: int) -> List[str]:
+    return blob.split(_SEPARATOR) if count else []
+
+
+def _write_sections(path: str, kind: str, count: int, sections: Dict[str, object]) -> None:
+    """
+    Escribe el archivo de forma atómica: a un temporal, fsync y rename.
+    Cada sección es un `array` o un bloque de bytes.
+    """
+    payloads: List[Tuple[str, str, bytes]] = []
+    for name, value in sections.items():
+        if isinstance(value, array):
+            payloads.append((name, value.typecode, value.tobytes()))
+        else:
+            payloads.append((name, "bytes", value))  # type: ignore[arg-type]
+
+    def header_for(start: int) -> bytes:
+        offset = start
+        described = {}
+        for name, kind_code, data in payloads:
+            described[name] = {"offset": offset, "length": len(data), "type": kind_code}
+            offset += len(data) + (-len(data)) % _ALIGNMENT
+        return json.dumps({
+            "format": _FORMAT,
+            "kind": kind,
+            "count": count,
+            "byteorder": sys.byteorder,
+            "itemsizes": {code: array(code).itemsize for _, code, _ in payloads if code != "bytes"},
+            "sections": described,
+        }).encode("utf-8")
+
+    # El encabezado incluye los desplazamientos, que dependen de su propio
+    # largo: se calcula dos veces (el largo se estabiliza enseguida).
+    start = 0
+    header = header_for(start)
+    while True:
+        prefix = len(_MAGIC) + 4 + len(header)
+        start = prefix + (-prefix) % _ALIGNMENT
+        new_header = header_for(start)
+        if len(new_header) == len(header):
+            header = new_header
+            break
+        header = new_header
+
+    temporary = path + ".tmp"
+    with open(temporary, "wb") as f:
+        f.write(_MAGIC)
+        f.write(struct.pack("<I", len(header)))
+        f.write(header)
+        f.write(b"\0" * (start - len(_MAGIC) - 4 - len(header)))
+        for _, _, data in payloads:
+            f.write(data)
+            f.write(b"\0" * ((-len(data)) % _ALIGNMENT))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temporary, path)
+
+
+class _SnapshotReader:
+    """
+    Lectura de un snapshot mapeado en memoria.
+    """
+
+    def __init__(self, path: str, kind: str) -> None:
+        self._file = open(path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._map[: len(_MAGIC)] != _MAGIC:
+            self.close()
+            raise ValueError(f"{path} no es un snapshot de SIGI-PV.")
+        (header_length,) = struct.unpack_from("<I", self._map, len(_MAGIC))
+        start = len(_MAGIC) + 4
+        self.header = json.loads(self._map[start:start + header_length].decode("utf-8"))
+        if self.header["format"] != _FORMAT or self.header["kind"] != kind:
+            self.close()
+            raise ValueError(f"{path}: formato o tipo de snapshot no soportado.")
+        self.count: int = self.header["count"]
+
+    def column(self, name: str) -> array:
+        section = self.header["sections"][name]
+        values = array(section["type"])
+        if values.itemsize != self.header["itemsizes"][section["type"]]:
+            raise ValueError("El snapshot se generó en una plataforma incompatible.")
+        with memoryview(self._map) as view:
+            values.frombytes(view[section["offset"]:section["offset"] + section["length"]])
+        if self.header["byteorder"] != sys.byteorder:
+            values.byteswap()
+        return values
+
+    def blob(self, name: str) -> bytes:
+        section = self.header["sections"][name]
+        return self._map[section["offset"]:section["offset"] + section["length"]]
+
+    def texts(self, name: str) -> List[str]:
+        return _split_texts(self.blob(name).decode("utf-8"), self.count)
+
+    def close(self) -> None:
+        self._map.close()
+        self._file.close()
+
+    def __enter__(self) -> "_SnapshotReader":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+# ==========
+# Productos
+# ==========
+
+
+@dataclass
+class ProductColumns:
+    """
+    Catálogo en columnas, tal como se guarda en el snapshot.
+    `names` es el bloque UTF-8 de nombres separados por "\\0", y
+    `name_starts` / `name_lengths` ubican cada nombre dentro del bloque
+    (el repositorio en columnas lo usa tal cual, sin decodificar).
+    Los códigos están ordenados.
+    """
+    codes: List[str]
+    names: bytes
+    name_starts: array
+    name_lengths: array
+    prices: array
+    stocks: array
+    versions: array
+    location_ids: array
+    locations: List[str]
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def product_at(self, row: int) -> Product:
+        start = self.name_starts[row]
+        return Product(
+            code=self.codes[row],
+            name=self.names[start:start + self.name_lengths[row]].decode("utf-8"),
+            price=self.prices[row],
+            stock=self.stocks[row],
+            location=self.locations[self.location_ids[row]],
+            version=self.versions[row],
+        )
+
+    def iter_products(self) -> Iterator[Product]:
+        names = _split_texts(self.names.decode("utf-8"), len(self.codes))
+        locations = self.locations
+        for code, name, price, stock, location_id, version in zip(
+            self.codes, names, self.prices, self.stocks, self.location_ids, self.versions
+        ):
+            yield Product(code, name, price, stock, locations[location_id], version)
+
+
+def save_product_snapshot(path: str, products: Iterable[Product]) -> int:
+    """
+    Guarda los productos en un snapshot binario, ordenados por código.
+    Para un repositorio, pasar `repo.iter_products()`. Devuelve la cantidad.
+    """
+    codes: List[str] = []
+    names = bytearray()
+    name_starts = array("Q")
+    name_lengths = array("L")
+    prices = array("d")
+    stocks = array("q")
+    versions = array("q")
+    location_ids = array("L")
+    locations: Dict[str, int] = {}
+
+    for product in sorted(products, key=lambda p: p.code):
+        codes.append(product.code)
+        encoded = _check_text(product.name).encode("utf-8")
+        if name_starts:
+            names += b"\0"
+        name_starts.append(len(names))
+        name_lengths.append(len(encoded))
+        names += encoded
+        prices.append(product.price)
+        stocks.append(product.stock)
+        versions.append(product.version)
+        location_ids.append(locations.setdefault(product.location, len(locations)))
+
+    _write_sections(path, "products", len(codes), {
+        "codes": _join_texts(codes),
+        "names": bytes(names),
+        "name_starts": name_starts,
+        "name_lengths": name_lengths,
+        "prices": prices,
+        "stocks": stocks,
+        "versions": versions,
+        "location_ids": location_ids,
+        "locations": _join_texts(list(locations)),
+    })
+    return len(codes)
+
+
+def load_product_snapshot(path: str) -> ProductColumns:
+    with _SnapshotReader(path, "products") as reader:
+        location_blob = reader.blob("locations").decode("utf-8")
+        return ProductColumns(
+            codes=reader.texts("codes"),
+            names=reader.blob("names"),
+            name_starts=reader.column("name_starts"),
+            name_lengths=reader.column("name_lengths"),
+            prices=reader.column("prices"),
+            stocks=reader.column("stocks"),
+            versions=reader.column("versions"),
+            location_ids=reader.column("location_ids"),
+            locations=location_blob.split(_SEPARATOR) if reader.count else [],
+        )
+
+
+# ==========
+# Ventas
+# ==========
+
+_SALE_KEYS = ("items", "grand_total", "sale_id", "timestamp")
+_SALE_LINE_KEYS = ("product_code", "name", "quantity", "unit_price", "total")
+# Marca de "venta sin timestamp" en la columna de timestamps.
+_NO_TIMESTAMP = float("nan")
+
+
+def save_sale_snapshot(path: str, sales: Iterable[dict]) -> int:
+    """
+    Guarda el historial de ventas en columnas. Los códigos y nombres
+    de producto, que se repiten mucho, se guardan una sola vez; el id
+    y el timestamp de cada venta tienen columna propia.
+    Las claves adicionales de cada venta y de cada línea (p. ej. el
+    descuento de una promoción) se conservan como JSON.
+    """
+    grand_totals = array("d")
+    timestamps = array("d")
+    sale_ids: List[str] = []
+    line_counts = array("I")
+    extras: List[str] = []
+    texts: Dict[str, int] = {}
+    line_codes = array("I")
+    line_names = array("I")
+    quantities = array("q")
+    unit_prices = array("d")
+    totals = array("d")
+    line_extras: List[str] = []
+
+    for sale in sales:
+        grand_totals.append(sale["grand_total"])
+        timestamp = sale.get("timestamp")
+        timestamps.append(_NO_TIMESTAMP if timestamp is None else timestamp)
+        sale_ids.append(sale.get("sale_id") or "")
+        line_counts.append(len(sale["items"]))
+        other = {k: v for k, v in sale.items() if k not in _SALE_KEYS}
+        extras.append(json.dumps(other, ensure_ascii=False) if other else "")
+        for line in sale["items"]:
+            line_codes.append(texts.setdefault(line["product_code"], len(texts)))
+            line_names.append(texts.setdefault(line["name"], len(texts)))
+            quantities.append(line["quantity"])
+            unit_prices.append(line["unit_price"])
+            totals.append(line["total"])
+            other = {k: v for k, v in line.items() if k not in _SALE_LINE_KEYS}
+            line_extras.append(json.dumps(other, ensure_ascii=False) if other else "")
+
+    _write_sections(path, "sales", len(grand_totals), {
+        "grand_totals": grand_totals,
+        "timestamps": timestamps,
+        "sale_ids": _join_texts(sale_ids),
+        "line_counts": line_counts,
+        "extras": _join_texts(extras),
+        "texts": _join_texts(list(texts)),
+        "line_codes": line_codes,
+        "line_names": line_names,
+        "quantities": quantities,
+        "unit_prices": unit_prices,
+        "totals": totals,
+        "line_extras": _join_texts(line_extras),
+    })
+    return len(grand_totals)
+
+
+def load_sale_snapshot(
+    path: str,
+    start: Optional[float] = None,
+    end: Optional[float] = None,
+) -> List[dict]:
+    """
+    Lee las ventas del snapshot, en el orden en que se guardaron.
+
+    Con `start` y/o `end` devuelve solo las ventas con
+    `start <= timestamp < end` (las que no tienen timestamp quedan
+    fuera). El filtro usa la columna de timestamps: las demás ventas
+    no se decodifican.
+    """
+    with _SnapshotReader(path, "sales") as reader:
+        sections = reader.header["sections"]
+        grand_totals = reader.column("grand_totals")
+        line_counts = reader.column("line_counts")
+        extras = reader.texts("extras")
+        line_codes = reader.column("line_codes")
+        text_blob = reader.blob("texts").decode("utf-8")
+        texts = text_blob.split(_SEPARATOR) if line_codes else []
+        line_names = reader.column("line_names")
+        quantities = reader.column("quantities")
+        unit_prices = reader.column("unit_prices")
+        totals = reader.column("totals")
+        # Secciones opcionales: los snapshots anteriores no las tienen.
+        if "line_extras" in sections and line_codes:
+            line_extras = reader.blob("line_extras").decode("utf-8").split(_SEPARATOR)
+        else:
+            line_extras = [""] * len(line_codes)
+        if "timestamps" in sections:
+            timestamps: Optional[array] = reader.column("timestamps")
+            sale_ids = reader.texts("sale_ids")
+        else:
+            timestamps = None
+            sale_ids = [""] * reader.count
+
+    rows: Iterable[int] = range(len(grand_totals))
+    if start is not None or end is not None:
+        low = float("-inf") if start is None else start
+        high = float("inf") if end is None else end
+        if timestamps is None:
+            timestamps = _timestamps_from_extras(extras)
+        rows = [row for row, timestamp in enumerate(timestamps) if low <= timestamp < high]
+
+    first_lines = array("q", [0])
+    first_lines.extend(accumulate(line_counts))
+    sales: List[dict] = []
+    for row in rows:
+        items = []
+        for n in range(first_lines[row], first_lines[row + 1]):
+            item = {
+                "product_code": texts[line_codes[n]],
+                "name": texts[line_names[n]],
+                "quantity": quantities[n],
+                "unit_price": unit_prices[n],
+                "total": totals[n],
+            }
+            if line_extras[n]:
+                item.update(json.loads(line_extras[n]))
+            items.append(item)
+        sale = {"items": items, "grand_total": grand_totals[row]}
+        if sale_ids[row]:
+            sale["sale_id"] = sale_ids[row]
+        if timestamps is not None and timestamps[row] == timestamps[row]:  # NaN = sin timestamp
+            sale["timestamp"] = timestamps[row]
+        if extras[row]:
+            sale.update(json.loads(extras[row]))
+        sales.append(sale)
+    return sales
+
+
+def _timestamps_from_extras(extras: List[str]) -> array:
+    # Snapshots anteriores a la columna de timestamps: estaban entre los extras.
+    return array("d", (
+        json.loads(extra).get("timestamp", _NO_TIMESTAMP) if extra else _NO_TIMESTAMP
+        for extra in extras
+    ))
+
+
+@dataclass
+class SaleLineColumns:
+    """
+    Líneas de venta en columnas, para analizar el historial sin armar
+    un dict por venta. Por venta: `timestamps` (NaN si no tiene) y
+    `line_counts`; por línea: `line_codes` (índice del código de
+    producto en `texts`) y `quantities`.
+    """
+    texts: List[str]
+    timestamps: array
+    line_counts: array
+    line_codes: array
+    quantities: array
+
+    def __len__(self) -> int:
+        return len(self.line_counts)
+
+
+def load_sale_line_columns(path: str) -> SaleLineColumns:
+    """
+    Lee las columnas de líneas de un snapshot de ventas sin decodificar
+    nombres, precios ni extras de cada venta.
+    """
+    with _SnapshotReader(path, "sales") as reader:
+        line_codes = reader.column("line_codes")
+        texts = reader.blob("texts").decode("utf-8").split(_SEPARATOR) if line_codes else []
+        if "timestamps" in reader.header["sections"]:
+            timestamps = reader.column("timestamps")
+        else:
+            timestamps = _timestamps_from_extras(reader.texts("extras"))
+        return SaleLineColumns(
+            texts=texts,
+            timestamps=timestamps,
+            line_counts=reader.column("line_counts"),
+            line_codes=line_codes,
+            quantities=reader.column("quantities"),
+        )
+
+
+def sale_line_columns(sales: Iterable[dict]) -> SaleLineColumns:
+    """
+    Las mismas columnas a partir de registros de venta (dicts).
+    """
+    texts: Dict[str, int] = {}
+    columns = SaleLineColumns(
+        texts=[],
+        timestamps=array("d"),
+        line_counts=array("I"),
+        line_codes=array("I"),
+        quantities=array("q"),
+    )
+    for sale in sales:
+        timestamp = sale.get("timestamp")
+        columns.timestamps.append(_NO_TIMESTAMP if timestamp is None else timestamp)
+        columns.line_counts.append(len(sale["items"]))
+        for line in sale["items"]:
+            columns.line_codes.append(texts.setdefault(line["product_code"], len(texts)))
+            columns.quantities.append(line["quantity"])
+    columns.texts = list(texts)
+    return columns
+
+
+# ==========
+# Registro de cambios desde el último snapshot
+# ==========
+
+
+class ProductChangeLog:
+    """
+    Registro de cambios de productos (JSONL, solo se anexa) posterior
+    al último snapshot. Cada línea es el estado completo del producto
+    después de la escritura, así que reaplicarlo es idempotente.
+
+    Con `sync=True` cada escritura espera a que el cambio llegue al disco.
+    """
+
+    def __init__(self, path: str, sync: bool = False) -> None:
+        self._path = path
+        self._sync = sync
+        self._lock = threading.Lock()
+        self._file: TextIO = open(path, "a", encoding="utf-8")
+
+    def append(self, products: Iterable[Product]) -> None:
+        lines = "".join(
+            json.dumps(
+                [p.code, p.name, p.price, p.stock, p.location, p.version],
+                ensure_ascii=False,
+            ) + "\n"
+            for p in products
+        )
+        if not lines:
+            return
+        with self._lock:
+            self._file.write(lines)
+            self._file.flush()
+            if self._sync:
+                os.fsync(self._file.fileno())
+
+    def iter_changes(self) -> Iterator[Product]:
+        """
+        Cambios en orden de escritura. Una última línea incompleta
+        (corte durante la escritura) se descarta.
+        """
+        with self._lock:
+            self._file.flush()
+        with open(self._path, encoding="utf-8") as f:
+            for line in f:
+                if not line.endswith("\n"):
+                    return
+                code, name, price, stock, location, version = json.loads(line)
+                yield Product(code, name, price, stock, location, version)
+
+    def replay(self, product_repo: ProductRepository, batch_size: int = 1000) -> int:
+        """
+        Reaplica los cambios sobre un repositorio restaurado.
+        Devuelve la cantidad de cambios aplicados.
+        """
+        applied = 0
+        batch: List[Product] = []
+        for product in self.iter_changes():
+            batch.append(product)
+            if len(batch) >= batch_size:
+                product_repo.save_many(batch)
+                applied += len(batch)
+                batch = []
+        if batch:
+            product_repo.save_many(batch)
+            applied += len(batch)
+        return applied
+
+    def reset(self) -> None:
+        """
+        Vacía el registro (después de guardar un snapshot nuevo). Con
+        escrituras en curso, usar ChangeLoggingProductRepository.checkpoint:
+        una escritura entre el snapshot y el reset se perdería.
+        """
+        with self._lock:
+            self._file.truncate(0)
+            self._file.seek(0)
+
+    def close(self) -> None:
+        with self._lock:
+            self._file.close()
+
+
+# ==========
+# Arranque en caliente
+# ==========
+
+
+def restore_product_repository(
+    path: str,
+    change_log: Optional[ProductChangeLog] = None,
+    columnar: bool = False,
+) -> ProductRepository:
+    """
+    Restaura un repositorio de productos desde un snapshot y, si se
+    indica, reaplica el registro de cambios escrito desde entonces.
+
+    Con `columnar=True` se obtiene un ColumnarProductRepository; si no,
+    un InMemoryProductRepository. En ambos casos el índice de búsqueda
+    se construye recién en la primera búsqueda, así que el terminal
+    puede vender apenas termina la carga.
+    """
+    columns = load_product_snapshot(path)
+    repo: ProductRepository
+    if columnar:
+        repo = ColumnarProductRepository.from_columns(columns)
+    else:
+        repo = InMemoryProductRepository.from_columns(columns)
+    if change_log is not None:
+        change_log.replay(repo)
+    return repo
+
+
+def restore_sale_repository(path: str) -> InMemorySaleRepository:
+    repo = InMemorySaleRepository()
+    repo.save_sales(load_sale_snapshot(path))
+    return repo
+
+
+def save_sale_repository_snapshot(path: str, sale_repo: SaleRepository) -> int:
+    return save_sale_snapshot(path, sale_repo.iter_sales())
+
+
+class ChangeLoggingProductRepository(ProductRepository):
+    """
+    Decorador que anota en un ProductChangeLog cada escritura exitosa
+    del repositorio interno (después de aplicarla).
+
+    Aplicar y anotar es una sola sección crítica: el registro queda en
+    el mismo orden en que se aplicaron las escrituras (dos escrituras
+    del mismo producto no se anotan invertidas), que es el orden en
+    que `replay` las vuelve a aplicar.
+    """
+
+    def __init__(self, inner: ProductRepository, change_log: ProductChangeLog) -> None:
+        self._inner = inner
+        self._log = change_log
+        self._write_lock = threading.Lock()
+
+    def checkpoint(self, path: str) -> int:
+        """
+        Guarda un snapshot nuevo en `path` y vacía el registro, sin
+        escrituras entre medio: ninguna queda fuera del snapshot y a la
+        vez borrada del registro. Las escrituras esperan mientras se
+        guarda (las lecturas no). Devuelve la cantidad de productos.
+        """
+        with self._write_lock:
+            count = save_product_snapshot(path, self._inner.iter_products())
+            self._log.reset()
+        return count
+
+    def find_by_code(self, code: str) -> Optional[Product]:
+        return self._inner.find_by_code(code)
+
+    def find_by_codes(self, codes: Iterable[str]) -> Dict[str, Product]:
+        return self._inner.find_by_codes(codes)
+
+    def save(self, product: Product) -> None:
+        with self._write_lock:
+            self._inner.save(product)
+            self._log.append([product])
+
+    def save_many(self, products: Iterable[Product]) -> None:
+        products = list(products)
+        with self._write_lock:
+            self._inner.save_many(products)
+            self._log.append(products)
+
+    def compare_and_save_many(self, products: Iterable[Product]) -> List[str]:
+        products = list(products)
+        with self._write_lock:
+            conflicts = self._inner.compare_and_save_many(products)
+            if not conflicts:
+                self._log.append(replace(p, version=p.version + 1) for p in products)
+        return conflicts
+
+    def list_all(self) -> List[Product]:
+        return self._inner.list_all()
+
+    def page_products(self, after: Optional[str] = None, limit: int = 500) -> ProductPage:
+        return self._inner.page_products(after, limit)
+
+    def search(
+        self,
+        text: str,
+        location: Optional[str] = None,
+        offset: int = 0,
+        limit: int = 20,
+    ) -> ProductSearchResult:
+        return self._inner.search(text, location, offset, limit)
@@ -0,0 +1,450 @@
+import json
+import sqlite3
+import threading
+import weakref
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from core.models import Product, ProductPage, ProductSearchResult, SalePage
+from core.ports import ProductRepository, SaleRepository
+from infra.search_index import normalize_search_text, tokenize
+
+
+# ==========
+# Esquema y sentencias SQL
+# ==========
+# Las sentencias son constantes: el módulo sqlite3 guarda en caché las
+# sentencias preparadas por conexión usando el texto SQL como clave,
+# así que cada conexión compila cada una una sola vez.
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS products (
+    code     TEXT PRIMARY KEY,
+    name     TEXT NOT NULL,
+    price    REAL NOT NULL,
+    stock    INTEGER NOT NULL,
+    location TEXT NOT NULL,
+    version  INTEGER NOT NULL DEFAULT 0,
+    -- Copias normalizadas (minúsculas, sin acentos) para la búsqueda.
+    search_name     TEXT NOT NULL DEFAULT '',
+    search_location TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS products_search_location
+    ON products (search_location, code);
+CREATE TABLE IF NOT EXISTS sales (
+    id          INTEGER PRIMARY KEY AUTOINCREMENT,
+    grand_total REAL NOT NULL,
+    sale_uid    TEXT,
+    created_at  REAL
+);
+CREATE TABLE IF NOT EXISTS sale_items (
+    sale_id      INTEGER NOT NULL REFERENCES sales(id),
+    line_no      INTEGER NOT NULL,
+    product_code TEXT NOT NULL,
+    name         TEXT NOT NULL,
+    quantity     INTEGER NOT NULL,
+    unit_price   REAL NOT NULL,
+    total        REAL NOT NULL,
+    discount     REAL NOT NULL DEFAULT 0,
+    promotion    TEXT,
+    PRIMARY KEY (sale_id, line_no)
+);
+"""
+
+_SELECT_PRODUCT = (
+    "SELECT code, name, price, stock, location, version FROM products WHERE code = ?"
+)
+# Un único parámetro JSON en lugar de "IN (?, ?, ...)": el texto SQL no
+# depende de la cantidad de códigos y la sentencia preparada se reutiliza.
+_SELECT_PRODUCTS_BY_CODES = (
+    "SELECT code, name, price, stock, location, version FROM products "
+    "WHERE code IN (SELECT value FROM json_each(?))"
+)
+_SELECT_ALL_PRODUCTS = (
+    "SELECT code, name, price, stock, location, version FROM products ORDER BY code"
+)
+_SELECT_PRODUCTS_PAGE = (
+    "SELECT code, name, price, stock, location, version FROM products "
+    "WHERE code > ? ORDER BY code LIMIT ?"
+)
+_UPSERT_PRODUCT = (
+    "INSERT INTO products "
+    "(code, name, price, stock, location, version, search_name, search_location) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+    "ON CONFLICT(code) DO UPDATE SET "
+    "name = excluded.name, price = excluded.price, "
+    "stock = excluded.stock, location = excluded.location, "
+    "version = excluded.version, "
+    "search_name = excluded.search_name, "
+    "search_location = excluded.search_location"
+)
+_SELECT_VERSIONS_BY_CODES = (
+    "SELECT code, version FROM products "
+    "WHERE code IN (SELECT value FROM json_each(?))"
+)
+# La condición sobre la versión es redundante con la verificación previa
+# (hecha en la misma transacción), pero deja la regla en la sentencia.
+_UPDATE_PRODUCT_IF_VERSION = (
+    "UPDATE products SET "
+    "name = ?, price = ?, stock = ?, location = ?, version = ? + 1, "
+    "search_name = ?, search_location = ? "
+    "WHERE code = ? AND version = ?"
+)
+_INSERT_SALE = "INSERT INTO sales (grand_total, sale_uid, created_at) VALUES (?, ?, ?)"
+_INSERT_SALE_ITEM = (
+    "INSERT INTO sale_items "
+    "(sale_id, line_no, product_code, name, quantity, unit_price, total, discount, promotion) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)"
+)
+_SELECT_SALES_PAGE = (
+    "SELECT id, grand_total, sale_uid, created_at FROM sales WHERE id > ? ORDER BY id LIMIT ?"
+)
+_SELECT_SALE_ITEMS_RANGE = (
+    "SELECT sale_id, product_code, name, quantity, unit_price, total, discount, promotion "
+    "FROM sale_items WHERE sale_id BETWEEN ? AND ? ORDER BY sale_id, line_no"
+)
+
+
+# ==========
+# Pool de conexiones
+# ==========
+
+
+class _ConnectionLease:
+    """
+    Conexión asignada a un hilo. Cuando el hilo termina, el objeto
+    se libera y la conexión vuelve al pool.
+    """
+
+    def __init__(self, connection: sqlite3.Connection) -> None:
+        self.connection = connection
+
+
+def _add_missing_columns(connection: sqlite3.Connection) -> None:
+    """
+    Actualiza BDs creadas con una versión anterior del esquema.
+    """
+    columns = {row[1] for row in connection.execute("PRAGMA table_info(products)")}
+    if "version" not in columns:
+        connection.execute(
+            "ALTER TABLE products ADD COLUMN version INTEGER NOT NULL DEFAULT 0"
+        )
+    columns = {row[1] for row in connection.execute("PRAGMA table_info(sale_items)")}
+    if "discount" not in columns:
+        connection.execute(
+            "ALTER TABLE sale_items ADD COLUMN discount REAL NOT NULL DEFAULT 0"
+        )
+        connection.execute("ALTER TABLE sale_items ADD COLUMN promotion TEXT")
+    columns = {row[1] for row in connection.execute("PRAGMA table_info(sales)")}
+    if "sale_uid" not in columns:
+        connection.execute("ALTER TABLE sales ADD COLUMN sale_uid TEXT")
+        connection.execute("ALTER TABLE sales ADD COLUMN created_at REAL")
+
+
+class SQLiteConnectionPool:
+    """
+    Pool de conexiones SQLite con una conexión por hilo.
+
+    Cada hilo toma una conexión libre (o crea una nueva) la primera vez
+    que accede a la BD y la conserva mientras viva; al terminar el hilo
+    la conexión regresa al pool. Todas las conexiones usan WAL, de modo
+    que las lecturas no bloquean a la escritura en curso.
+    """
+
+    def __init__(self, path: str, timeout: float = 30.0) -> None:
+        self._path = path
+        self._timeout = timeout
+        self._local = threading.local()
+        self._guard = threading.Lock()
+        self._idle: List[sqlite3.Connection] = []
+        self._all: List[sqlite3.Connection] = []
+        self._closed = False
+
+        connection = self.connection()
+        connection.executescript(_SCHEMA)
+        _add_missing_columns(connection)
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(
+            self._path,
+            timeout=self._timeout,
+            isolation_level=None,  # transacciones explícitas (BEGIN/COMMIT)
+            check_same_thread=False,  # la conexión puede volver al pool
+            cached_statements=256,
+        )
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        connection.execute("PRAGMA foreign_keys=ON")
+        return connection
+
+    def _release(self, connection: sqlite3.Connection) -> None:
+        with self._guard:
+            if not self._closed:
+                self._idle.append(connection)
+
+    def connection(self) -> sqlite3.Connection:
+        """
+        Devuelve la conexión asignada al hilo actual.
+        """
+        lease: Optional[_ConnectionLease] = getattr(self._local, "lease", None)
+        if lease is not None:
+            return lease.connection
+
+        with self._guard:
+            if self._closed:
+                raise RuntimeError("El pool de conexiones SQLite está cerrado.")
+            connection = self._idle.pop() if self._idle else None
+        if connection is None:
+            connection = self._connect()
+            with self._guard:
+                self._all.append(connection)
+
+        lease = _ConnectionLease(connection)
+        weakref.finalize(lease, self._release, connection)
+        self._local.lease = lease
+        return connection
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """
+        Ejecuta el bloque en una transacción de escritura.
+        BEGIN IMMEDIATE reserva el lock de escritura desde el inicio
+        y evita errores de "database is locked" al promover la transacción.
+        """
+        connection = self.connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            yield connection
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        connection.execute("COMMIT")
+
+    @contextmanager
+    def snapshot(self) -> Iterator[sqlite3.Connection]:
+        """
+        Ejecuta varias lecturas sobre una misma vista consistente de la BD.
+        """
+        connection = self.connection()
+        connection.execute("BEGIN")
+        try:
+            yield connection
+        finally:
+            connection.execute("COMMIT")
+
+    def close(self) -> None:
+        with self._guard:
+            self._closed = True
+            connections, self._all, self._idle = self._all, [], []
+        for connection in connections:
+            connection.close()
+        self._local = threading.local()
+
+
+# ==========
+# Repositorios
+# ==========
+
+
+def _row_to_product(row: tuple) -> Product:
+    code, name, price, stock, location, version = row
+    return Product(
+        code=code, name=name, price=price, stock=stock, location=location, version=version
+    )
+
+
+def _product_to_row(product: Product) -> tuple:
+    return (
+        product.code,
+        product.name,
+        product.price,
+        product.stock,
+        product.location,
+        product.version,
+        # Espacio inicial: cada palabra queda precedida por " " y la
+        # búsqueda por prefijo es un LIKE '% palabra%'.
+        " " + " ".join(tokenize(product.name)),
+        normalize_search_text(product.location).strip(),
+    )
+
+
+def _product_to_conditional_update(product: Product) -> tuple:
+    code, name, price, stock, location, version, search_name, search_location = (
+        _product_to_row(product)
+    )
+    return (
+        name, price, stock, location, version,
+        search_name, search_location,
+        code, version,
+    )
+
+
+def _search_filter(text: str, location: Optional[str]) -> Tuple[str, list]:
+    """
+    Arma la cláusula WHERE de la búsqueda. Las palabras solo contienen
+    letras y dígitos, así que no hay comodines de LIKE que escapar.
+    """
+    conditions: List[str] = []
+    params: list = []
+    for token in sorted(set(tokenize(text))):
+        conditions.append("search_name LIKE ?")
+        params.append(f"% {token}%")
+    if location is not None:
+        conditions.append("search_location = ?")
+        params.append(normalize_search_text(location).strip())
+    where = " WHERE " + " AND ".join(conditions) if conditions else ""
+    return where, params
+
+
+class SQLiteProductRepository(ProductRepository):
+    """
+    Repositorio de productos sobre SQLite (stdlib `sqlite3`).
+    Las escrituras por lotes usan `executemany` en una sola transacción.
+    El guardado condicional compara las versiones y actualiza dentro de
+    una misma transacción BEGIN IMMEDIATE, así que es atómico también
+    entre procesos que comparten el archivo.
+    """
+
+    def __init__(self, pool: SQLiteConnectionPool) -> None:
+        self._pool = pool
+
+    def find_by_code(self, code: str) -> Optional[Product]:
+        row = self._pool.connection().execute(_SELECT_PRODUCT, (code,)).fetchone()
+        return _row_to_product(row) if row is not None else None
+
+    def find_by_codes(self, codes: Iterable[str]) -> Dict[str, Product]:
+        rows = self._pool.connection().execute(
+            _SELECT_PRODUCTS_BY_CODES, (json.dumps(list(codes)),)
+        )
+        return {row[0]: _row_to_product(row) for row in rows}
+
+    def save(self, product: Product) -> None:
+        with self._pool.transaction() as connection:
+            connection.execute(_UPSERT_PRODUCT, _product_to_row(product))
+
+    def save_many(self, products: Iterable[Product]) -> None:
+        with self._pool.transaction() as connection:
+            connection.executemany(_UPSERT_PRODUCT, map(_product_to_row, products))
+
+    def compare_and_save_many(self, products: Iterable[Product]) -> List[str]:
+        products = list(products)
+        with self._pool.transaction() as connection:
+            stored = dict(
+                connection.execute(
+                    _SELECT_VERSIONS_BY_CODES, (json.dumps([p.code for p in products]),)
+                )
+            )
+            conflicts = [p.code for p in products if stored.get(p.code) != p.version]
+            if not conflicts:
+                connection.executemany(
+                    _UPDATE_PRODUCT_IF_VERSION, map(_product_to_conditional_update, products)
+                )
+        return conflicts
+
+    def list_all(self) -> List[Product]:
+        rows = self._pool.connection().execute(_SELECT_ALL_PRODUCTS)
+        return [_row_to_product(row) for row in rows]
+
+    def page_products(self, after: Optional[str] = None, limit: int = 500) -> ProductPage:
+        # Todo código no vacío es mayor que "", así que la primera página
+        # usa la misma sentencia preparada que las siguientes.
+        rows = self._pool.connection().execute(_SELECT_PRODUCTS_PAGE, (after or "", limit))
+        items = [_row_to_product(row) for row in rows]
+        more = len(items) == limit
+        return ProductPage(items=items, next_token=items[-1].code if more else None)
+
+    def search(
+        self,
+        text: str,
+        location: Optional[str] = None,
+        offset: int = 0,
+        limit: int = 20,
+    ) -> ProductSearchResult:
+        where, params = _search_filter(text, location)
+        with self._pool.snapshot() as connection:
+            (total,) = connection.execute(
+                "SELECT COUNT(*) FROM products" + where, params
+            ).fetchone()
+            rows = connection.execute(
+                "SELECT code, name, price, stock, location, version FROM products"
+                + where
+                + " ORDER BY code LIMIT ? OFFSET ?",
+                params + [limit, offset],
+            )
+            items = [_row_to_product(row) for row in rows]
+        return ProductSearchResult(items=items, total=total)
+
+
+class SQLiteSaleRepository(SaleRepository):
+    """
+    Repositorio de ventas sobre SQLite. Cada venta se guarda como una
+    cabecera (`sales`) y sus líneas (`sale_items`) en una sola transacción.
+    """
+
+    def __init__(self, pool: SQLiteConnectionPool) -> None:
+        self._pool = pool
+
+    def save_sale(self, data: dict) -> None:
+        self.save_sales([data])
+
+    def save_sales(self, sales: List[dict]) -> None:
+        with self._pool.transaction() as connection:
+            for data in sales:
+                self._insert_sale(connection, data)
+
+    @staticmethod
+    def _insert_sale(connection: sqlite3.Connection, data: dict) -> None:
+        sale_id = connection.execute(
+            _INSERT_SALE, (data["grand_total"], data.get("sale_id"), data.get("timestamp"))
+        ).lastrowid
+        connection.executemany(
+            _INSERT_SALE_ITEM,
+            (
+                (
+                    sale_id,
+                    line_no,
+                    line["product_code"],
+                    line["name"],
+                    line["quantity"],
+                    line["unit_price"],
+                    line["total"],
+                    line.get("discount", 0.0),
+                    line.get("promotion"),
+                )
+                for line_no, line in enumerate(data["items"])
+            ),
+        )
+
+    def list_sales(self) -> List[dict]:
+        return list(self.iter_sales())
+
+    def page_sales(self, since: int = 0, limit: int = 500) -> SalePage:
+        # El token es el id de la última venta entregada.
+        with self._pool.snapshot() as connection:
+            sales: Dict[int, dict] = {}
+            for row_id, grand_total, sale_uid, created_at in connection.execute(
+                _SELECT_SALES_PAGE, (since, limit)
+            ):
+                sale: dict = {"items": [], "grand_total": grand_total}
+                if sale_uid is not None:
+                    sale["sale_id"] = sale_uid
+                if created_at is not None:
+                    sale["timestamp"] = created_at
+                sales[row_id] = sale
+            if not sales:
+                return SalePage(items=[], next_token=since)
+            last_id = max(sales)
+            for sale_id, code, name, quantity, unit_price, total, discount, promotion in connection.execute(
+                _SELECT_SALE_ITEMS_RANGE, (min(sales), last_id)
+            ):
+                line = {
+                    "product_code": code,
+                    "name": name,
+                    "quantity": quantity,
+                    "unit_price": unit_price,
+                    "total": total,
+                }
+                if promotion is not None:
+                    line["discount"] = discount
+                    line["promotion"] = promotion
+                sales[sale_id]["items"].append(line)
+        return SalePage(items=list(sales.values()), next_token=last_id)
@@ -0,0 +1,289 @@
+import threading
+import time
+from dataclasses import dataclass, replace
+from typing import Dict, Iterable, List, Optional
+from core.models import Product, ProductPage, ProductSearchResult
+from core.ports import ProductRepository
+
+# Espera máxima entre reintentos cuando el repositorio interno falla.
+_MAX_RETRY_INTERVAL = 5.0
+
+
+@dataclass
+class WriteBehindStats:
+    """
+    Contadores del repositorio con escritura diferida. `writes` cuenta
+    los productos guardados por los servicios y `flushed_products` los
+    que llegaron al repositorio interno: la diferencia es lo que se
+    ahorró al agrupar escrituras del mismo código.
+    """
+    writes: int
+    flushes: int
+    flushed_products: int
+    failed_flushes: int
+    pending: int
+    last_error: Optional[BaseException]
+
+
+class WriteBehindProductRepository(ProductRepository):
+    """
+    Decorador de escritura diferida (write-behind) delante de cualquier
+    ProductRepository.
+
+    - Las escrituras se aplican en memoria al instante (las lecturas
+      las ven enseguida) y se agrupan por código: diez descuentos del
+      mismo SKU entre dos descargas se escriben una sola vez.
+    - Un hilo descarga lo pendiente con un único `save_many` cuando se
+      juntan `max_batch` productos o pasan `flush_interval` segundos
+      desde la primera escritura pendiente. `flush()` descarga en el
+      momento y `close()` descarga todo antes de terminar.
+    - `compare_and_save_many` compara versiones contra el estado en
+      memoria, así que el reintento optimista de los servicios sigue
+      funcionando igual.
+    - Si el repositorio interno falla, los productos siguen pendientes
+      y se reintenta con espera creciente. Con `max_pending` productos
+      pendientes, las escrituras nuevas esperan una descarga: si esa
+      descarga falla, la escritura falla con el mismo error y no se aplica.
+
+    Debe ser el único que escribe en el repositorio interno. Los
+    listados y búsquedas descargan lo pendiente antes de delegar.
+    """
+
+    def __init__(
+        self,
+        inner: ProductRepository,
+        max_batch: int = 500,
+        flush_interval: float = 0.05,
+        max_pending: int = 10000,
+    ) -> None:
+        if max_batch <= 0 or max_pending < max_batch:
+            raise ValueError("Se requiere 0 < max_batch <= max_pending.")
+        self._inner = inner
+        self._max_batch = max_batch
+        self._flush_interval = flush_interval
+        self._max_pending = max_pending
+
+        self._lock = threading.Lock()
+        self._work_ready = threading.Condition(self._lock)
+        # Una descarga a la vez (del hilo o de flush()).
+        self._flush_lock = threading.Lock()
+        self._dirty: Dict[str, Product] = {}
+        self._dirty_since: Optional[float] = None
+        self._closing = False
+
+        self._writes = 0
+        self._flushes = 0
+        self._flushed_products = 0
+        self._failed_flushes = 0
+        self._last_error: Optional[BaseException] = None
+
+        self._flusher = threading.Thread(
+            target=self._flusher_loop, name="product-write-behind", daemon=True
+        )
+        self._flusher.start()
+
+    # ----- API del puerto -----
+
+    def find_by_code(self, code: str) -> Optional[Product]:
+        with self._lock:
+            product = self._dirty.get(code)
+        if product is not None:
+            return product
+        return self._inner.find_by_code(code)
+
+    def find_by_codes(self, codes: Iterable[str]) -> Dict[str, Product]:
+        found: Dict[str, Product] = {}
+        missing: List[str] = []
+        with self._lock:
+            for code in codes:
+                product = self._dirty.get(code)
+                if product is not None:
+                    found[code] = product
+                else:
+                    missing.append(code)
+        if missing:
+            # Lo que se descarga entre medio no cambia: el interno recibe
+            # exactamente los mismos productos.
+            found.update(self._inner.find_by_codes(missing))
+        return found
+
+    def save(self, product: Product) -> None:
+        self.save_many([product])
+
+    def save_many(self, products: Iterable[Product]) -> None:
+        products = list(products)
+        with self._lock:
+            self._make_room(products)
+            for product in products:
+                self._mark_dirty(product)
+            self._writes += len(products)
+            self._wake_flusher()
+
+    def compare_and_save_many(self, products: Iterable[Product]) -> List[str]:
+        products = list(products)
+        with self._lock:
+            self._make_room(products)
+            current = self._current(product.code for product in products)
+            conflicts = [
+                product.code
+                for product in products
+                if product.code not in current or current[product.code].version != product.version
+            ]
+            if conflicts:
+                return conflicts
+            for product in products:
+                self._mark_dirty(replace(product, version=product.version + 1))
+            self._writes += len(products)
+            self._wake_flusher()
+        return []
+
+    def list_all(self) -> List[Product]:
+        self.flush()
+        return self._inner.list_all()
+
+    def page_products(self, after: Optional[str] = None, limit: int = 500) -> ProductPage:
+        self.flush()
+        return self._inner.page_products(after, limit)
+
+    def search(
+        self,
+        text: str,
+        location: Optional[str] = None,
+        offset: int = 0,
+        limit: int = 20,
+    ) -> ProductSearchResult:
+        self.flush()
+        return self._inner.search(text, location, offset, limit)
+
+    # ----- Descarga y ciclo de vida -----
+
+    def flush(self) -> None:
+        """
+        Descarga lo pendiente al repositorio interno y espera a que
+        termine. Si el repositorio interno falla, propaga el error
+        (los productos siguen pendientes).
+        """
+        with self._flush_lock:
+            with self._lock:
+                batch = dict(self._dirty)
+            if not batch:
+                return
+            try:
+                self._inner.save_many(list(batch.values()))
+            except Exception as exc:
+                with self._lock:
+                    self._failed_flushes += 1
+                    self._last_error = exc
+                raise
+            with self._lock:
+                for code, product in batch.items():
+                    # Si se volvió a escribir durante la descarga, queda
+                    # pendiente la versión nueva.
+                    if self._dirty.get(code) is product:
+                        del self._dirty[code]
+                self._dirty_since = time.monotonic() if self._dirty else None
+                self._flushes += 1
+                self._flushed_products += len(batch)
+                self._last_error = None
+
+    def stats(self) -> WriteBehindStats:
+        with self._lock:
+            return WriteBehindStats(
+                writes=self._writes,
+                flushes=self._flushes,
+                flushed_products=self._flushed_products,
+                failed_flushes=self._failed_flushes,
+                pending=len(self._dirty),
+                last_error=self._last_error,
+            )
+
+    def close(self) -> None:
+        """
+        Detiene el hilo y descarga lo pendiente. Si la última descarga
+        falla, propaga el error: lo pendiente sigue en memoria y puede
+        reintentarse con flush().
+        """
+        with self._lock:
+            self._closing = True
+            self._work_ready.notify()
+        self._flusher.join()
+        self.flush()
+
+    def __enter__(self) -> "WriteBehindProductRepository":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    # ----- Internos -----
+
+    def _make_room(self, products: List[Product]) -> None:
+        """
+        Con el lock tomado: si la escritura superaría `max_pending`,
+        descarga primero (soltando el lock mientras tanto).
+        """
+        while True:
+            if self._closing:
+                raise RuntimeError("El repositorio con escritura diferida está cerrado.")
+            new_codes = {p.code for p in products if p.code not in self._dirty}
+            if not self._dirty or len(self._dirty) + len(new_codes) <= self._max_pending:
+                return
+            self._lock.release()
+            try:
+                self.flush()
+            finally:
+                self._lock.acquire()
+
+    def _current(self, codes: Iterable[str]) -> Dict[str, Product]:
+        """
+        Estado vigente (pendiente o ya descargado), con el lock tomado.
+        """
+        current: Dict[str, Product] = {}
+        missing: List[str] = []
+        for code in codes:
+            product = self._dirty.get(code)
+            if product is not None:
+                current[code] = product
+            else:
+                missing.append(code)
+        if missing:
+            current.update(self._inner.find_by_codes(missing))
+        return current
+
+    def _mark_dirty(self, product: Product) -> None:
+        if not self._dirty:
+            self._dirty_since = time.monotonic()
+        self._dirty[product.code] = product
+
+    def _wake_flusher(self) -> None:
+        if len(self._dirty) >= self._max_batch:
+            self._work_ready.notify()
+
+    def _flusher_loop(self) -> None:
+        failures = 0
+        while True:
+            with self._lock:
+                while not self._closing:
+                    if self._dirty_since is not None:
+                        if failures:
+                            delay = min(self._flush_interval * 2 ** failures, _MAX_RETRY_INTERVAL)
+                        else:
+                            delay = self._flush_interval
+                        remaining = self._dirty_since + delay - time.monotonic()
+                        if remaining <= 0 or (len(self._dirty) >= self._max_batch and not failures):
+                            break
+                        self._work_ready.wait(remaining)
+                    else:
+                        self._work_ready.wait()
+                if self._closing:
+                    # close() hace la última descarga.
+                    return
+            try:
+                self.flush()
+                failures = 0
+            except Exception:
+                failures += 1
+                with self._lock:
+                    # La espera del próximo intento cuenta desde ahora.
+                    if self._dirty:
+                        self._dirty_since = time.monotonic()
@@ -0,0 +1,204 @@
+import asyncio
+import os
+import sys
+import time
+
+# Añadir la carpeta src al path para poder importar core/ e infra/
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import pytest
+from dataclasses import replace
+from core.async_ports import AsyncSaleRepository
+from core.async_services import AsyncSaleService
+from core.errors import DomainError, ValidationError
+from core.models import Cart, Product
+from infra.async_adapters import ThreadPoolProductRepository, ThreadPoolSaleRepository
+from infra.memory_repositories import InMemoryProductRepository, InMemorySaleRepository
+
+
+class _SlowProductRepository(InMemoryProductRepository):
+    """
+    Simula una BD lenta: cada consulta bloquea el hilo que la ejecuta.
+    """
+
+    def find_by_code(self, code):
+        time.sleep(0.05)
+        return super().find_by_code(code)
+
+
+def _build(product_repo=None):
+    product_repo = product_repo or InMemoryProductRepository()
+    sale_repo = InMemorySaleRepository()
+    product_repo.save_many(
+        Product(code=f"P00{n}", name=f"Producto {n}", price=10.0, stock=20, location="A1")
+        for n in range(1, 5)
+    )
+    service = AsyncSaleService(
+        ThreadPoolProductRepository(product_repo),
+        ThreadPoolSaleRepository(sale_repo),
+    )
+    return product_repo, sale_repo, service
+
+
+def test_async_confirm_sale_conserves_stock_under_concurrency():
+    """
+    Muchas ventas concurrentes en el mismo loop: el stock final
+    coincide con lo vendido y las ventas sin stock se rechazan.
+    """
+    product_repo, sale_repo, service = _build()
+
+    async def sell():
+        cart = Cart()
+        cart.add_item("P001", 3)
+        cart.add_item("P002", 1)
+        try:
+            await service.confirm_sale(cart)
+            return True
+        except DomainError:
+            return False
+
+    async def run():
+        return await asyncio.gather(*(sell() for _ in range(10)))
+
+    results = asyncio.run(run())
+
+    assert sum(results) == 6  # 20 // 3
+    assert product_repo.find_by_code("P001").stock == 2
+    assert product_repo.find_by_code("P002").stock == 14
+    assert len(sale_repo.list_sales()) == 6
+
+
+def test_async_confirm_sale_shares_sync_validation_rules():
+    _, _, service = _build()
+
+    cart = Cart()
+    cart.add_item("P001", 0)
+    with pytest.raises(ValidationError):
+        asyncio.run(service.confirm_sale(cart))
+
+    with pytest.raises(DomainError):
+        asyncio.run(service.confirm_sale(Cart()))
+
+
+def test_async_lookups_run_concurrently_without_blocking_loop():
+    """
+    Las 4 consultas lentas del carrito se lanzan en paralelo, y el loop
+    sigue atendiendo otras tareas mientras esperan.
+    """
+    _, _, service = _build(_SlowProductRepository())
+    cart = Cart()
+    for n in range(1, 5):
+        cart.add_item(f"P00{n}", 1)
+
+    async def run():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.005)
+
+        task = asyncio.create_task(ticker())
+        started = time.perf_counter()
+        receipt = await service.confirm_sale(cart)
+        elapsed = time.perf_counter() - started
+        task.cancel()
+        return receipt, elapsed, ticks
+
+    receipt, elapsed, ticks = asyncio.run(run())
+
+    assert receipt.grand_total == 40.0
+    assert elapsed < 0.15  # secuencial serían >= 0.2 s
+    assert ticks >= 5
+
+
+class _RacingProductRepository(InMemoryProductRepository):
+    """
+    Otra caja (síncrona) descuenta P001 justo antes del primer guardado
+    condicional de la venta asíncrona, con la misma versión leída.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.raced = False
+
+    def compare_and_save_many(self, products):
+        products = list(products)
+        if not self.raced:
+            self.raced = True
+            current = self.find_by_code("P001")
+            assert super().compare_and_save_many([replace(current, stock=current.stock - 5)]) == []
+        return super().compare_and_save_many(products)
+
+
+class _FailingSaleRepository(InMemorySaleRepository):
+    """
+    Mientras se registra la venta, otra caja vende 5 unidades de P001;
+    después el registro falla.
+    """
+
+    def __init__(self, product_repo):
+        super().__init__()
+        self._product_repo = product_repo
+
+    def save_sale(self, data):
+        current = self._product_repo.find_by_code("P001")
+        self._product_repo.save(replace(current, stock=current.stock - 5, version=current.version + 1))
+        raise OSError("disco lleno")
+
+
+def test_async_confirm_sale_does_not_lose_concurrent_stock_writes():
+    product_repo, _, service = _build(_RacingProductRepository())
+    cart = Cart()
+    cart.add_item("P001", 3)
+
+    asyncio.run(service.confirm_sale(cart))
+
+    assert product_repo.raced
+    assert product_repo.find_by_code("P001").stock == 20 - 5 - 3
+
+
+def test_async_rollback_returns_quantities_without_overwriting_other_sales():
+    product_repo, _, _ = _build()
+    service = AsyncSaleService(
+        ThreadPoolProductRepository(product_repo),
+        ThreadPoolSaleRepository(_FailingSaleRepository(product_repo)),
+    )
+    cart = Cart()
+    cart.add_item("P001", 3)
+
+    with pytest.raises(OSError):
+        asyncio.run(service.confirm_sale(cart))
+
+    assert product_repo.find_by_code("P001").stock == 20 - 5
+
+
+class _StalledSaleRepository(AsyncSaleRepository):
+    """
+    Registro de ventas que no responde a tiempo.
+    """
+
+    def __init__(self) -> None:
+        self.saved = []
+
+    async def save_sale(self, data):
+        await asyncio.sleep(5)
+        self.saved.append(data)
+
+    async def page_sales(self, since=0, limit=500):
+        raise NotImplementedError
+
+
+def test_cancelled_sale_returns_the_discounted_stock():
+    product_repo, _, _ = _build()
+    sale_repo = _StalledSaleRepository()
+    service = AsyncSaleService(ThreadPoolProductRepository(product_repo), sale_repo)
+    cart = Cart()
+    cart.add_item("P001", 4)
+
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(asyncio.wait_for(service.confirm_sale(cart), 0.1))
+
+    assert product_repo.find_by_code("P001").stock == 20
+    assert sale_repo.saved == []
@@ -0,0 +1,61 @@
+import os
+import sys
+
+# Añadir la carpeta src al path para poder importar core/ e infra/
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from core.models import Product
+from infra.cached_repositories import CachedProductRepository
+from infra.memory_repositories import InMemoryProductRepository
+
+
+class _FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _product(code: str, stock: int = 10) -> Product:
+    return Product(code=code, name="Tornillo", price=1.0, stock=stock, location="A1")
+
+
+def test_lru_eviction_and_counters():
+    """
+    El caché sirve desde memoria los productos recientes y expulsa
+    el menos usado al superar el límite.
+    """
+    inner = InMemoryProductRepository()
+    inner.save_many([_product("A"), _product("B"), _product("C")])
+    cache = CachedProductRepository(inner, max_entries=2)
+
+    cache.find_by_code("A")        # miss
+    cache.find_by_code("B")        # miss
+    cache.find_by_code("A")        # hit (B pasa a ser el menos usado)
+    cache.find_by_codes(["C"])     # miss, expulsa B
+    cache.find_by_code("B")        # miss, expulsa A
+
+    stats = cache.stats()
+    assert (stats.hits, stats.misses, stats.evictions, stats.size) == (1, 4, 2, 2)
+
+
+def test_ttl_expiry_and_write_through():
+    """
+    Las entradas vencidas se vuelven a consultar y save actualiza
+    tanto el repositorio interno como el caché.
+    """
+    clock = _FakeClock()
+    inner = InMemoryProductRepository()
+    inner.save(_product("A", stock=10))
+    cache = CachedProductRepository(inner, ttl=5.0, clock=clock)
+
+    assert cache.find_by_code("A").stock == 10
+    cache.save(_product("A", stock=7))
+    assert inner.find_by_code("A").stock == 7
+    assert cache.find_by_code("A").stock == 7
+    assert cache.stats().hits == 1
+
+    inner.save(_product("A", stock=3))  # cambio por fuera del caché
+    clock.now = 10.0
+    assert cache.find_by_code("A").stock == 3
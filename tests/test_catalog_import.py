@@ -0,0 +1,77 @@
+import io
+import os
+import sys
+
+# Añadir la carpeta src al path para poder importar core/ e infra/
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from core.catalog import CatalogImportService
+from core.models import Product
+from infra.catalog_files import (
+    export_catalog_file,
+    import_catalog_file,
+    read_csv_rows,
+    read_jsonl_rows,
+)
+from infra.memory_repositories import InMemoryProductRepository
+
+_CSV = """code,name,price,stock,location
+H001,Martillo 16 oz,9.5,25,Pasillo 1
+D001,Taladro 600W,abc,10,Pasillo 2
+,Sin código,1.0,1,Pasillo 3
+T001,  ,5.2,40,Pasillo 3
+P001,Pintura blanca,18,,
+T002,Tornillos 1/4,0.1,-3,Pasillo 3
+"""
+
+
+def test_csv_import_reports_row_errors_without_aborting():
+    """
+    Las filas válidas se importan y cada fila inválida se informa
+    con su número de línea, sin detener la importación.
+    """
+    repo = InMemoryProductRepository()
+
+    report = CatalogImportService(repo).import_rows(read_csv_rows(io.StringIO(_CSV)))
+
+    assert (report.created, report.updated, report.rejected) == (1, 0, 5)
+    assert [(e.line, e.code) for e in report.errors] == [
+        (3, "D001"),
+        (4, ""),
+        (5, "T001"),
+        (7, "T002"),
+        (6, "P001"),  # producto nuevo sin stock ni ubicación
+    ]
+    assert repo.find_by_code("H001") == Product("H001", "Martillo 16 oz", 9.5, 25, "Pasillo 1")
+
+
+def test_price_list_updates_keep_stock_and_location_and_bump_version():
+    repo = InMemoryProductRepository()
+    repo.seed_demo_data()
+    rows = read_jsonl_rows(io.StringIO(
+        '{"code": "H001", "name": "Martillo 16 oz mango fibra", "price": 10.25}\n'
+        "\n"
+        "no es json\n"
+        '{"code": "N001", "name": "Nivel", "price": 7, "stock": 3, "location": "Pasillo 1"}\n'
+    ))
+
+    report = CatalogImportService(repo).import_rows(rows, batch_size=1)
+
+    assert (report.created, report.updated, report.rejected) == (1, 1, 1)
+    assert report.errors[0].line == 3
+    hammer = repo.find_by_code("H001")
+    assert (hammer.price, hammer.stock, hammer.version) == (10.25, 25, 1)
+    assert hammer.location == "Pasillo 1 - Herramientas de mano"
+
+
+def test_export_and_reimport_round_trip(tmp_path):
+    source = InMemoryProductRepository()
+    source.seed_demo_data()
+
+    for name in ("catalogo.csv", "catalogo.jsonl"):
+        path = str(tmp_path / name)
+        assert export_catalog_file(path, source) == 4
+        target = InMemoryProductRepository()
+        report = import_catalog_file(path, CatalogImportService(target), batch_size=3)
+        assert report.created == 4 and report.rejected == 0
+        assert sorted(target.list_all(), key=lambda p: p.code) == list(source.iter_products())
@@ -0,0 +1,67 @@
+import os
+import sys
+
+# Añadir la carpeta src al path para poder importar core/ e infra/
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from core.models import Product, Cart
+from core.services import InventoryService, SaleService
+from infra.columnar_repositories import ColumnarProductRepository
+from infra.memory_repositories import InMemorySaleRepository
+
+
+def test_columnar_repository_round_trips_and_updates_products():
+    """
+    Los productos guardados se reconstruyen igual, y las
+    actualizaciones reemplazan la fila existente.
+    """
+    repo = ColumnarProductRepository()
+    repo.save_many(
+        [
+            Product(code="H001", name="Martillo", price=9.5, stock=25, location="Pasillo 1"),
+            Product(code="D001", name="Taladro eléctrico", price=49.9, stock=10, location="Pasillo 1"),
+        ]
+    )
+    repo.save(Product(code="H001", name="Martillo 16 oz", price=9.5, stock=20, location="Pasillo 2"))
+
+    assert len(repo) == 2
+    assert repo.find_by_code("H001") == Product(
+        code="H001", name="Martillo 16 oz", price=9.5, stock=20, location="Pasillo 2"
+    )
+    assert repo.find_by_codes(["D001", "X"]) == {
+        "D001": Product(code="D001", name="Taladro eléctrico", price=49.9, stock=10, location="Pasillo 1")
+    }
+    assert [p.code for p in repo.list_all()] == ["H001", "D001"]
+
+
+def test_columnar_repository_backs_sale_service():
+    """
+    El repositorio columnar sustituye al repositorio en memoria
+    en el flujo completo de venta.
+    """
+    product_repo = ColumnarProductRepository()
+    product_repo.save(Product(code="T001", name="Tornillos", price=5.2, stock=40, location="Pasillo 3"))
+    sale_repo = InMemorySaleRepository()
+    sale_service = SaleService(product_repo, sale_repo, InventoryService(product_repo))
+
+    cart = Cart()
+    cart.add_item("T001", 3)
+    receipt = sale_service.confirm_sale(cart)
+
+    assert receipt.items[0].total == 5.2 * 3
+    assert product_repo.find_by_code("T001").stock == 37
+
+
+def test_columnar_search_index_is_built_on_first_search():
+    """
+    Guardar no construye el índice de búsqueda (ocuparía tanta memoria
+    como el catálogo); la primera búsqueda lo arma y las escrituras
+    siguientes lo mantienen al día.
+    """
+    repo = ColumnarProductRepository()
+    repo.save(Product(code="T001", name="Tornillo 1/4", price=0.5, stock=100, location="Pasillo 3"))
+    assert repo._index is None
+
+    assert [p.code for p in repo.search("torn").items] == ["T001"]
+    repo.save(Product(code="T002", name="Tornillo 3/8", price=0.6, stock=50, location="Pasillo 3"))
+    assert [p.code for p in repo.search("torn").items] == ["T001", "T002"]
@@ -0,0 +1,136 @@
+import asyncio
+import os
+import random
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+# Añadir la carpeta src al path para poder importar core/ e infra/
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import pytest
+from core.models import Product, Cart
+from core.services import InventoryService, SaleService
+from core.errors import DomainError
+from core.locks import AsyncKeyedLocks, KeyedLocks
+from infra.memory_repositories import InMemoryProductRepository, InMemorySaleRepository
+
+_INITIAL_STOCK = 300
+_CODES = [f"SKU{n:02}" for n in range(12)]
+
+
+def _build_services():
+    product_repo = InMemoryProductRepository()
+    sale_repo = InMemorySaleRepository()
+    product_repo.save_many(
+        Product(code=code, name=f"Producto {code}", price=2.5, stock=_INITIAL_STOCK, location="A1")
+        for code in _CODES
+    )
+    inventory_service = InventoryService(product_repo)
+    sale_service = SaleService(product_repo, sale_repo, inventory_service)
+    return product_repo, sale_repo, sale_service
+
+
+@pytest.fixture
+def frequent_thread_switches():
+    """
+    Fuerza cambios de hilo muy frecuentes para que las carreras
+    aparezcan si la venta no fuese atómica.
+    """
+    previous = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    yield
+    sys.setswitchinterval(previous)
+
+
+def test_concurrent_sales_conserve_stock(frequent_thread_switches):
+    """
+    Miles de carritos concurrentes sobre pocos productos: el stock final
+    debe coincidir exactamente con lo registrado como vendido y nunca
+    quedar negativo.
+    """
+    product_repo, sale_repo, sale_service = _build_services()
+    rng = random.Random(42)
+
+    carts = []
+    for _ in range(3000):
+        cart = Cart()
+        for code in rng.sample(_CODES, rng.randint(1, 4)):
+            cart.add_item(code, rng.randint(1, 3))
+        carts.append(cart)
+
+    def sell(cart: Cart) -> bool:
+        try:
+            sale_service.confirm_sale(cart)
+            return True
+        except DomainError:
+            return False
+
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        results = list(pool.map(sell, carts))
+
+    sold = {code: 0 for code in _CODES}
+    for sale in sale_repo.list_sales():
+        for line in sale["items"]:
+            sold[line["product_code"]] += line["quantity"]
+
+    assert sum(results) == len(sale_repo.list_sales())
+    assert not all(results)  # el stock se agotó: hubo ventas rechazadas
+    for code in _CODES:
+        stock = product_repo.find_by_code(code).stock
+        assert stock >= 0
+        assert stock == _INITIAL_STOCK - sold[code]
+
+
+class _FailingSaleRepository(InMemorySaleRepository):
+    def save_sale(self, data: dict) -> None:
+        raise RuntimeError("fallo simulado al registrar la venta")
+
+
+def test_confirm_sale_rolls_back_stock_when_registration_fails():
+    """
+    Si el registro de la venta falla, el stock descontado se revierte.
+    """
+    product_repo = InMemoryProductRepository()
+    product_repo.save(Product(code="P001", name="Taladro", price=50.0, stock=10, location="B2"))
+    inventory_service = InventoryService(product_repo)
+    sale_service = SaleService(product_repo, _FailingSaleRepository(), inventory_service)
+
+    cart = Cart()
+    cart.add_item("P001", 4)
+
+    with pytest.raises(RuntimeError):
+        sale_service.confirm_sale(cart)
+
+    assert product_repo.find_by_code("P001").stock == 10
+
+
+def test_keyed_locks_forget_keys_once_released(frequent_thread_switches):
+    """
+    Los locks por código existen solo mientras alguien los tiene o los
+    espera: códigos inexistentes o de un solo uso no se acumulan.
+    """
+    locks = KeyedLocks()
+    counter = {"value": 0}
+
+    def work(n: int) -> None:
+        with locks.hold([f"X{n}", "COMUN"]):
+            value = counter["value"]
+            counter["value"] = value + 1
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(work, range(500)))
+
+    assert counter["value"] == 500
+    assert len(locks) == 0
+
+    async_locks = AsyncKeyedLocks()
+
+    async def run():
+        async def hold(n: int) -> None:
+            async with async_locks.hold([f"X{n}", "COMUN"]):
+                await asyncio.sleep(0)
+
+        await asyncio.gather(*(hold(n) for n in range(100)))
+
+    asyncio.run(run())
+    assert len(async_locks) == 0
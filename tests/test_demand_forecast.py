@@ -0,0 +1,88 @@
+import os
+import sys
+
+import pytest
+
+# Añadir la carpeta src al path para poder importar core/ e infra/
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src"))
+
+np = pytest.importorskip("numpy")
+
+from core.models import Product
+from infra.demand_forecast import DailySales, DemandForecast, ReorderPolicy, forecast_demand, moving_average
+from infra.memory_repositories import InMemoryProductRepository, InMemorySaleRepository
+from infra.partitioned_sales import PartitionedSaleRepository
+
+_DAY = 86_400
+_START = 20_000 * _DAY
+
+
+def _sale(day: int, *lines, hour: int = 10) -> dict:
+    items = [
+        {"product_code": code, "name": code, "quantity": quantity, "unit_price": 1.0, "total": float(quantity)}
+        for code, quantity in lines
+    ]
+    timestamp = _START + day * _DAY + hour * 3600
+    return {"items": items, "grand_total": float(sum(q for _, q in lines)), "timestamp": timestamp}
+
+
+def test_daily_sales_from_dicts_and_compacted_partitions_match(tmp_path):
+    sales = [
+        _sale(0, ("T001", 5), ("H001", 1)),
+        _sale(0, ("T001", 3)),
+        _sale(2, ("T001", 4), ("X999", 7)),
+        _sale(5, ("H001", 2)),  # fuera de los 4 días pedidos
+    ]
+    codes = ["H001", "T001", "P001"]
+    expected = [[1, 0, 0, 0], [8, 0, 4, 0], [0, 0, 0, 0]]
+
+    from_dicts = DailySales.from_sales(sales, codes, _START + 3600, days=4)
+    assert from_dicts.start == _START
+    assert from_dicts.units.tolist() == expected
+
+    repo = PartitionedSaleRepository(str(tmp_path))
+    repo.save_sales(sales)
+    repo.compact(before=_START + 2 * _DAY)  # días 0 y 1 compactados, 2 y 5 en .jsonl
+    assert DailySales.from_repository(repo, codes, _START, days=4).units.tolist() == expected
+
+
+def test_codes_are_matched_exactly_including_non_ascii_and_long_texts():
+    codes = ["T001", "Ñ-01", "T0011234567890"]
+    sales = [
+        _sale(0, ("T001", 1), ("Ñ-01", 2), ("T0011234567890", 3)),
+        # Prefijos y textos más largos que cualquier código no coinciden.
+        _sale(0, ("T00", 7), ("T00112345678901", 7), ("Ñ-011", 7)),
+    ]
+    daily = DailySales.from_sales(sales, codes, _START, days=1)
+    assert daily.units[:, 0].tolist() == [1, 2, 3]
+
+
+def test_moving_average_and_reorder_points():
+    units = np.array([[2, 4, 6, 8], [0, 0, 0, 0], [10, 10, 10, 10]], dtype="float32")
+    assert moving_average(units, 2)[0].tolist() == [3.0, 5.0, 7.0]
+
+    daily = DailySales(["T001", "P001", "H001"], _START, units)
+    forecast = DemandForecast(daily, [20, 5, 500], ReorderPolicy(window_days=4, lead_time_days=4, review_days=10))
+
+    assert forecast.daily_demand.tolist() == [5.0, 0.0, 10.0]
+    assert forecast.days_of_cover.tolist() == [4.0, float("inf"), 50.0]
+    # 5/día * 4 días + 1.65 * desvío (2.236) * 2 = 27.38
+    assert forecast.reorder_point[0] == pytest.approx(27.379, abs=1e-3)
+    (item,) = forecast.low_stock()
+    assert item.code == "T001" and item.order_quantity == 58  # ceil(27.38 + 50 - 20)
+
+
+def test_forecast_for_the_catalog_reports_low_stock_first():
+    product_repo = InMemoryProductRepository()
+    product_repo.save_many([
+        Product("T001", "Tornillos", 0.5, stock=30, location="Tornillería"),
+        Product("C001", "Clavos", 0.2, stock=4, location="Tornillería"),
+        Product("H001", "Martillo", 12.0, stock=50, location="Herramientas"),
+    ])
+    sale_repo = InMemorySaleRepository()
+    sale_repo.save_sales([_sale(day, ("T001", 10), ("C001", 2), ("H001", 1)) for day in range(28)])
+
+    forecast = forecast_demand(product_repo, sale_repo, now=_START + 28 * _DAY + 60)
+
+    assert [item.code for item in forecast.low_stock()] == ["C001", "T001"]
+    assert forecast.low_stock(limit=1)[0].days_of_cover == 2.0
@@ -0,0 +1,107 @@
+import os
+import sys
+import threading
+
+import pytest
+
+# Añadir la carpeta src al path para poder importar core/ e infra/
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from core.errors import ValidationError
+from core.idempotency import IdempotencyIndex
+from core.models import Cart
+from core.services import InventoryService, SaleService
+from infra.memory_repositories import InMemoryProductRepository, InMemorySaleRepository
+
+
+class _FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class _FailingOnceSaleRepository(InMemorySaleRepository):
+    def __init__(self) -> None:
+        super().__init__()
+        self.fail_next = True
+
+    def save_sale(self, data: dict) -> None:
+        if self.fail_next:
+            self.fail_next = False
+            raise OSError("tiempo de espera agotado")
+        super().save_sale(data)
+
+
+def _services(sale_repo=None):
+    product_repo = InMemoryProductRepository()
+    product_repo.seed_demo_data()
+    sale_repo = sale_repo or InMemorySaleRepository()
+    return product_repo, sale_repo, SaleService(product_repo, sale_repo, InventoryService(product_repo))
+
+
+def _cart(code: str = "H001", quantity: int = 2) -> Cart:
+    cart = Cart()
+    cart.add_item(code, quantity)
+    return cart
+
+
+def test_retry_with_same_key_returns_stored_receipt_without_selling_again():
+    product_repo, sale_repo, sale_service = _services()
+
+    first = sale_service.confirm_sale(_cart(), idempotency_key="caja1-0001")
+    retry = sale_service.confirm_sale(_cart(), idempotency_key="caja1-0001")
+
+    assert retry is first
+    assert product_repo.find_by_code("H001").stock == 23
+    assert len(sale_repo.list_sales()) == 1
+
+    with pytest.raises(ValidationError):
+        sale_service.confirm_sale(_cart(quantity=5), idempotency_key="caja1-0001")
+
+
+def test_failed_sale_releases_key_for_retry():
+    product_repo, sale_repo, sale_service = _services(_FailingOnceSaleRepository())
+
+    with pytest.raises(OSError):
+        sale_service.confirm_sale(_cart(), idempotency_key="caja1-0002")
+    sale_service.confirm_sale(_cart(), idempotency_key="caja1-0002")
+
+    assert product_repo.find_by_code("H001").stock == 23
+    assert len(sale_repo.list_sales()) == 1
+
+
+def test_concurrent_retries_sell_once():
+    product_repo, sale_repo, sale_service = _services()
+    receipts = []
+
+    def retry() -> None:
+        receipts.append(sale_service.confirm_sale(_cart(), idempotency_key="caja2-0001"))
+
+    threads = [threading.Thread(target=retry) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(receipts) == 8 and all(receipt is receipts[0] for receipt in receipts)
+    assert product_repo.find_by_code("H001").stock == 23
+    assert len(sale_repo.list_sales()) == 1
+
+
+def test_index_is_bounded_by_size_and_age():
+    clock = _FakeClock()
+    index = IdempotencyIndex(max_keys=2, ttl=60.0, clock=clock)
+    for key in ("a", "b", "c"):
+        assert index.begin(key) is None
+        index.complete(key, key.upper())
+
+    assert len(index) == 2
+    assert index.begin("c") == "C"
+    assert index.begin("a") is None  # expulsada por tamaño: se ejecuta de nuevo
+    index.abandon("a")
+
+    clock.now = 61.0
+    assert index.begin("c") is None  # vencida
+    assert len(index) == 0
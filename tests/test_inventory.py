@@ -5,9 +5,10 @@ import sys
 sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src"))
 
 import pytest
+from dataclasses import replace
 from core.models import Product
 from core.services import InventoryService
-from core.errors import DomainError, ValidationError
+from core.errors import ConcurrencyError, DomainError, ValidationError
 from infra.memory_repositories import InMemoryProductRepository
 
 
@@ -129,3 +130,78 @@ def test_discount_stock_raises_if_stock_would_be_negative():
 
     with pytest.raises(DomainError):
         service.discount_stock(item)
+
+
+def test_check_items_availability_sums_lines_with_same_code():
+    """
+    La validación por lotes debe sumar las líneas que comparten
+    código (tras sanitizar) antes de comparar con el stock.
+    """
+    repo = _build_repo_with_sample_product()
+    service = InventoryService(repo)
+
+    from core.models import CartItem
+
+    items = [
+        CartItem(product_code="P001", quantity=3),
+        CartItem(product_code=" P001 ", quantity=3),
+    ]
+
+    with pytest.raises(DomainError):
+        service.check_items_availability(items)
+
+    products = service.check_items_availability(items[:1])
+    service.discount_items_stock(items[:1], products)
+
+    assert repo.find_by_code("P001").stock == 2
+
+
+class _ContendedProductRepository(InMemoryProductRepository):
+    """
+    Simula otro proceso que vende `conflicts` veces justo entre la
+    lectura y el guardado condicional de este proceso.
+    """
+
+    def __init__(self, conflicts: int) -> None:
+        super().__init__()
+        self.conflicts = conflicts
+
+    def compare_and_save_many(self, products):
+        products = list(products)
+        if self.conflicts > 0:
+            self.conflicts -= 1
+            current = self.find_by_code("P001")
+            super().compare_and_save_many([replace(current, stock=current.stock - 1)])
+        return super().compare_and_save_many(products)
+
+
+def _contended_service(monkeypatch, conflicts: int, stock: int = 5):
+    monkeypatch.setattr("core.services._retry_delay", lambda attempt: 0.0)
+    repo = _ContendedProductRepository(conflicts)
+    repo.save(Product(code="P001", name="Martillo", price=10.0, stock=stock, location="A1"))
+    return repo, InventoryService(repo)
+
+
+def test_discount_stock_retries_on_version_conflict(monkeypatch):
+    """
+    Si otro proceso modificó el producto, discount_stock vuelve a leer
+    y reintenta: ninguna de las dos ventas se pierde.
+    """
+    from core.models import CartItem
+
+    repo, service = _contended_service(monkeypatch, conflicts=2)
+
+    service.discount_stock(CartItem(product_code="P001", quantity=2))
+
+    product = repo.find_by_code("P001")
+    assert product.stock == 5 - 2 - 2  # dos ventas ajenas y la propia
+    assert product.version == 3
+
+
+def test_discount_stock_gives_up_after_repeated_conflicts(monkeypatch):
+    from core.models import CartItem
+
+    repo, service = _contended_service(monkeypatch, conflicts=1000, stock=1000)
+
+    with pytest.raises(ConcurrencyError):
+        service.discount_stock(CartItem(product_code="P001", quantity=1))
@@ -0,0 +1,124 @@
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import replace
+
+import pytest
+
+# Añadir la carpeta src al path para poder importar core/ e infra/
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from core.errors import DomainError, ValidationError
+from core.models import Cart, Product
+from core.services import InventoryService, SaleService
+from infra.inventory_server import InventoryServer
+from infra.memory_repositories import InMemoryProductRepository, InMemorySaleRepository
+from infra.remote_repositories import (
+    InventoryClient,
+    RemoteProductRepository,
+    RemoteSaleRepository,
+    RemoteSaleService,
+)
+
+
+@pytest.fixture
+def server():
+    product_repo = InMemoryProductRepository()
+    product_repo.save_many([
+        Product(code="T001", name="Tornillos", price=0.5, stock=1000, location="Tornillería"),
+        Product(code="H001", name="Martillo", price=12.0, stock=5, location="Herramientas"),
+    ])
+    with InventoryServer(product_repo, InMemorySaleRepository()).start() as running:
+        yield running
+
+
+def _cart(*lines) -> Cart:
+    cart = Cart()
+    for code, quantity in lines:
+        cart.add_item(code, quantity)
+    return cart
+
+
+def test_remote_repositories_implement_the_ports(server):
+    with InventoryClient(server.address) as client:
+        products = RemoteProductRepository(client)
+        sales = RemoteSaleRepository(client)
+
+        assert products.find_by_code("T001").name == "Tornillos"
+        assert products.find_by_code("X999") is None
+        assert set(products.find_by_codes(["T001", "H001", "X999"])) == {"T001", "H001"}
+        assert products.search("marti").items[0].code == "H001"
+        assert [p.code for p in products.iter_products(batch_size=1)] == ["H001", "T001"]
+
+        read = products.find_by_code("H001")
+        assert products.compare_and_save_many([replace(read, price=13.0)]) == []
+        assert products.compare_and_save_many([read]) == ["H001"]
+        assert products.find_by_code("H001").price == 13.0
+
+        sales.save_sale({"items": [], "grand_total": 0.0})
+        assert sales.list_sales() == [{"items": [], "grand_total": 0.0}]
+
+
+def test_terminals_share_one_inventory(server):
+    clients = [InventoryClient(server.address, connections=2) for _ in range(4)]
+    terminals = [RemoteSaleService(client) for client in clients]
+
+    def sell(n: int) -> int:
+        try:
+            terminals[n % len(terminals)].confirm_sale(_cart(("H001", 1), ("T001", 10)))
+            return 1
+        except DomainError:
+            return 0
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        sold = sum(executor.map(sell, range(40)))
+
+    products = RemoteProductRepository(clients[0])
+    assert sold == 5
+    assert products.find_by_code("H001").stock == 0
+    assert products.find_by_code("T001").stock == 1000 - 10 * sold
+    assert len(RemoteSaleRepository(clients[0]).list_sales()) == sold
+    for client in clients:
+        client.close()
+
+
+def test_pipelined_and_batched_sales_keep_their_errors(server):
+    with InventoryClient(server.address, connections=1) as client:
+        terminal = RemoteSaleService(client)
+
+        # Varias ventas en vuelo sin esperar respuestas.
+        pending = [terminal.submit_sale(_cart(("T001", 1))) for _ in range(20)]
+        receipts = [future.result(5) for future in pending]
+        assert len({receipt.sale_id for receipt in receipts}) == 20
+
+        # Una trama con varias ventas: el servidor las confirma en lote,
+        # pero cada una conserva su resultado.
+        batch = terminal.submit_sales([_cart(("H001", 4)), _cart(("H001", 4)), _cart(("X999", 1))])
+        assert batch[0].result(5).grand_total == 48.0
+        with pytest.raises(DomainError):
+            batch[1].result(5)
+        with pytest.raises(DomainError):
+            batch[2].result(5)
+
+        with pytest.raises(ValidationError):
+            terminal.confirm_sale(_cart(("T001", 1)), idempotency_key="")
+
+        outcomes = terminal.confirm_sales([_cart(("T001", 2)), _cart(("H001", 9))])
+        assert outcomes[0].ok and not outcomes[1].ok
+        assert RemoteProductRepository(client).find_by_code("T001").stock == 1000 - 20 - 2
+
+
+def test_calls_fail_cleanly_when_the_server_goes_away(tmp_path):
+    product_repo = InMemoryProductRepository()
+    product_repo.save(Product(code="T001", name="Tornillos", price=0.5, stock=10, location="Tornillería"))
+    sale_service = SaleService(product_repo, InMemorySaleRepository(), InventoryService(product_repo))
+    path = str(tmp_path / "inventario.sock")
+    server = InventoryServer(product_repo, InMemorySaleRepository(), sale_service, address=path).start()
+    client = InventoryClient(path)
+    products = RemoteProductRepository(client)
+    assert products.find_by_code("T001").stock == 10
+
+    server.close()
+    with pytest.raises(ConnectionError):
+        products.find_by_code("T001")
+    client.close()
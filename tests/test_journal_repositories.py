@@ -0,0 +1,84 @@
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+# Añadir la carpeta src al path para poder importar core/ e infra/
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from infra.journal_repositories import JournalSaleRepository
+
+
+def _sale(n: int) -> dict:
+    return {
+        "items": [
+            {"product_code": "T001", "name": "Tornillos", "quantity": n, "unit_price": 1.0, "total": float(n)}
+        ],
+        "grand_total": float(n),
+    }
+
+
+def test_concurrent_sales_share_fsyncs_and_rotate_segments(tmp_path):
+    """
+    Con group commit, muchas ventas concurrentes se confirman con
+    menos fsync que ventas; al superar el tamaño se rota de segmento.
+    """
+    repo = JournalSaleRepository(
+        str(tmp_path), commit_window=0.01, segment_max_bytes=4096
+    )
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        list(pool.map(lambda n: repo.save_sale(_sale(n)), range(1, 401)))
+    repo.close()
+
+    assert repo.fsync_count < 400
+    assert len(os.listdir(tmp_path)) > 1
+    totals = sorted(sale["grand_total"] for sale in repo.iter_sales())
+    assert totals == [float(n) for n in range(1, 401)]
+
+
+def test_reopen_discards_incomplete_tail_and_keeps_appending(tmp_path):
+    """
+    Una línea a medio escribir (caída del proceso) se descarta al reabrir.
+    """
+    with JournalSaleRepository(str(tmp_path)) as repo:
+        repo.save_sale(_sale(1))
+
+    segment = tmp_path / "sales-00000001.jsonl"
+    with open(segment, "ab") as f:
+        f.write(b'{"items":[{"product_co')
+
+    with JournalSaleRepository(str(tmp_path)) as repo:
+        repo.save_sale(_sale(2))
+        assert [sale["grand_total"] for sale in repo.iter_sales()] == [1.0, 2.0]
+
+
+def test_pages_resume_from_segment_and_offset(tmp_path):
+    """
+    El token de cada página es (segmento, posición): recorrer todo el
+    journal página por página entrega cada venta una vez, también a
+    través de varios segmentos y de ventas que llegan después.
+    """
+    with JournalSaleRepository(str(tmp_path), segment_max_bytes=1024) as repo:
+        repo.save_sales([_sale(n) for n in range(1, 21)])
+        for n in range(21, 61):
+            repo.save_sale(_sale(n))
+        assert len(os.listdir(tmp_path)) > 1
+
+        seen, token = [], 0
+        while True:
+            page = repo.page_sales(since=token, limit=7)
+            if not page.items:
+                break
+            seen.extend(sale["grand_total"] for sale in page.items)
+            token = page.next_token
+        assert seen == [float(n) for n in range(1, 61)]
+        assert repo.page_sales(since=token).next_token == token
+
+        repo.save_sale(_sale(61))
+        assert [sale["grand_total"] for sale in repo.iter_sales(since=token)] == [61.0]
+
+
+def test_save_sales_is_one_fsync_batch_even_above_max_batch(tmp_path):
+    with JournalSaleRepository(str(tmp_path), max_batch=4) as repo:
+        repo.save_sales([_sale(n) for n in range(1, 11)])
+        assert repo.fsync_count == 1
+        assert len(repo.list_sales()) == 10
@@ -0,0 +1,104 @@
+import os
+import sys
+
+# Añadir la carpeta src al path para poder importar core/ e infra/
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import pytest
+from core.errors import DomainError, ValidationError
+from core.models import Cart, Product
+from core.services import InventoryService, SaleService
+from infra.memory_repositories import InMemoryProductRepository, InMemorySaleRepository
+from infra.metrics import HistogramMetricsSink, render_prometheus
+from infra.profiling import AllocationProfilingSink, profile_sales
+
+
+def _build(sink):
+    product_repo = InMemoryProductRepository()
+    product_repo.save(Product(code="P001", name="Taladro", price=50.0, stock=10, location="B2"))
+    inventory_service = InventoryService(product_repo, metrics=sink)
+    sale_service = SaleService(product_repo, InMemorySaleRepository(), inventory_service, metrics=sink)
+    return sale_service
+
+
+def test_sale_stages_repository_calls_and_errors_are_recorded():
+    """
+    Cada venta registra la duración de sus etapas, las llamadas a
+    repositorios y los errores de dominio por tipo.
+    """
+    sink = HistogramMetricsSink()
+    sale_service = _build(sink)
+
+    cart = Cart()
+    cart.add_item("P001", 2)
+    sale_service.confirm_sale(cart)
+
+    bad_quantity = Cart()
+    bad_quantity.add_item("P001", 0)
+    with pytest.raises(ValidationError):
+        sale_service.confirm_sale(bad_quantity)
+
+    too_many = Cart()
+    too_many.add_item("P001", 999)
+    with pytest.raises(DomainError):
+        sale_service.confirm_sale(too_many)
+
+    histograms = sink.histograms()
+    assert histograms[("sale", "validation")].count == 2  # también la que falló por stock
+    for stage in ("build_receipt_items", "apply_stock_discount", "register_sale"):
+        assert histograms[("sale", stage)].count == 1
+    assert histograms[("sale", "confirm_sale")].count == 3
+
+    calls = sink.repository_calls()
+    assert calls[("inventory", "product", "find_by_codes")] == 2
+    assert calls[("inventory", "product", "compare_and_save_many")] == 1
+    assert calls[("sale", "sale", "save_sale")] == 1
+
+    assert sink.errors() == {
+        ("sale", "ValidationError"): 1,
+        ("sale", "DomainError"): 1,
+        ("inventory", "DomainError"): 1,
+    }
+
+
+def test_prometheus_export_has_cumulative_buckets():
+    sink = HistogramMetricsSink(buckets=[0.001, 0.01])
+    sink.observe_stage("sale", "register_sale", 0.0005)
+    sink.observe_stage("sale", "register_sale", 0.005)
+    sink.observe_stage("sale", "register_sale", 2.0)
+    sink.count_error("sale", "ValidationError")
+
+    text = render_prometheus(sink)
+
+    assert 'sigi_stage_duration_seconds_bucket{component="sale",stage="register_sale",le="0.001"} 1' in text
+    assert 'sigi_stage_duration_seconds_bucket{component="sale",stage="register_sale",le="0.01"} 2' in text
+    assert 'sigi_stage_duration_seconds_bucket{component="sale",stage="register_sale",le="+Inf"} 3' in text
+    assert 'sigi_stage_duration_seconds_count{component="sale",stage="register_sale"} 3' in text
+    assert 'sigi_errors_total{component="sale",error="ValidationError"} 1' in text
+
+
+def test_profiling_sink_reports_allocations_per_stage():
+    """
+    En modo perfilado cada etapa informa su memoria, y la corrida
+    informa memoria por venta, lugares del código y funciones calientes.
+    """
+    sink = AllocationProfilingSink()
+    sale_service = _build(sink)
+    carts = []
+    for _ in range(6):
+        cart = Cart()
+        cart.add_item("P001", 1)
+        carts.append(cart)
+
+    profile = profile_sales(sale_service.confirm_sale, sink, carts, top=5)
+
+    assert profile.sales == 3 and not profile.errors
+    stages = profile.stages
+    assert stages[("sale", "confirm_sale")].calls == 3
+    assert stages[("sale", "register_sale")].net_bytes > 0  # la venta queda guardada
+    assert all(totals.peak_bytes >= 0 for totals in stages.values())
+    # Una etapa anidada nunca tiene un pico mayor que la que la contiene.
+    assert stages[("sale", "validation")].peak_bytes <= stages[("sale", "confirm_sale")].peak_bytes
+    assert profile.top_sites and "confirm_sale" in profile.hot_spots
+    # Las duraciones siguen registrándose como en HistogramMetricsSink.
+    assert sink.histograms()[("sale", "confirm_sale")].count == 6
@@ -0,0 +1,82 @@
+import os
+import sys
+
+# Añadir la carpeta src al path para poder importar core/ e infra/
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import pytest
+from core.models import Product
+from infra.columnar_repositories import ColumnarProductRepository
+from infra.journal_repositories import JournalSaleRepository
+from infra.memory_repositories import InMemoryProductRepository, InMemorySaleRepository
+from infra.sqlite_repositories import (
+    SQLiteConnectionPool,
+    SQLiteProductRepository,
+    SQLiteSaleRepository,
+)
+
+
+def _product(code: str) -> Product:
+    return Product(code=code, name="Clavo", price=0.1, stock=100, location="C1")
+
+
+@pytest.fixture(params=["memory", "columnar", "sqlite"])
+def product_repo(request, tmp_path):
+    if request.param == "memory":
+        return InMemoryProductRepository()
+    if request.param == "columnar":
+        return ColumnarProductRepository()
+    return SQLiteProductRepository(SQLiteConnectionPool(str(tmp_path / "p.db")))
+
+
+@pytest.fixture(params=["memory", "sqlite", "journal"])
+def sale_repo(request, tmp_path):
+    if request.param == "memory":
+        yield InMemorySaleRepository()
+    elif request.param == "sqlite":
+        yield SQLiteSaleRepository(SQLiteConnectionPool(str(tmp_path / "s.db")))
+    else:
+        repo = JournalSaleRepository(str(tmp_path / "journal"), commit_window=0.0)
+        yield repo
+        repo.close()
+
+
+def test_iter_products_is_ordered_and_stable_across_inserts(product_repo):
+    """
+    El recorrido por páginas entrega cada producto una sola vez, en
+    orden de código, aunque se inserten productos entre páginas.
+    """
+    product_repo.save_many(_product(f"C{n:03}") for n in range(0, 50, 2))
+
+    seen = []
+    for product in product_repo.iter_products(batch_size=7):
+        seen.append(product.code)
+        if product.code == "C010":
+            product_repo.save(_product("C001"))  # ya quedó atrás
+            product_repo.save(_product("C047"))  # todavía no llega
+
+    assert seen == sorted(set(seen))
+    assert "C001" not in seen and "C047" in seen
+    assert len(seen) == 26
+
+    first = product_repo.page_products(limit=3)
+    assert [p.code for p in first.items] == ["C000", "C001", "C002"]
+    assert product_repo.page_products(after=first.next_token, limit=3).items[0].code == "C004"
+
+
+def test_iter_sales_resumes_from_token(sale_repo):
+    """
+    iter_sales recorre todo el historial y el token de una página
+    permite retomar más tarde recibiendo solo las ventas nuevas.
+    """
+    for n in range(5):
+        sale_repo.save_sale({"items": [], "grand_total": float(n)})
+
+    assert [s["grand_total"] for s in sale_repo.iter_sales(batch_size=2)] == [0.0, 1.0, 2.0, 3.0, 4.0]
+
+    page = sale_repo.page_sales(limit=10)
+    assert len(page.items) == 5
+    assert sale_repo.page_sales(since=page.next_token).items == []
+
+    sale_repo.save_sale({"items": [], "grand_total": 5.0})
+    assert [s["grand_total"] for s in sale_repo.iter_sales(since=page.next_token)] == [5.0]
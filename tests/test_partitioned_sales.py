@@ -0,0 +1,148 @@
+import os
+import sys
+import threading
+
+# Añadir la carpeta src al path para poder importar core/ e infra/
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from core.models import Cart, Product
+from core.services import InventoryService, SaleService
+import infra.partitioned_sales as partitioned_sales
+from infra.memory_repositories import InMemoryProductRepository
+from infra.partitioned_sales import PartitionedSaleRepository
+
+_DAY = 86_400
+_START = 20_000 * _DAY  # medianoche UTC
+
+
+class FakeClock:
+    def __init__(self, now: float) -> None:
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _sale(timestamp: float, total: float = 1.0) -> dict:
+    line = {"product_code": "T001", "name": "Tornillos", "quantity": 1, "unit_price": total, "total": total}
+    return {"items": [line], "grand_total": total, "sale_id": f"v{timestamp:.0f}", "timestamp": timestamp}
+
+
+def test_sales_get_id_and_timestamp_and_land_in_their_day(tmp_path):
+    clock = FakeClock(_START + 3600)
+    product_repo = InMemoryProductRepository()
+    product_repo.save(Product(code="T001", name="Tornillos", price=0.5, stock=100, location="Tornillería"))
+    sale_repo = PartitionedSaleRepository(str(tmp_path), clock=clock)
+    sale_service = SaleService(product_repo, sale_repo, InventoryService(product_repo), clock=clock)
+
+    cart = Cart()
+    cart.add_item("T001", 2)
+    receipt = sale_service.confirm_sale(cart)
+    clock.now += _DAY
+    second = sale_service.confirm_sale(cart)
+
+    assert receipt.timestamp == _START + 3600 and receipt.sale_id != second.sale_id
+    assert sale_repo.partitions() == [20_000, 20_001]
+    assert [sale["sale_id"] for sale in sale_repo.list_sales()] == [receipt.sale_id, second.sale_id]
+    assert sorted(os.listdir(tmp_path)) == ["sales-20241004.jsonl", "sales-20241005.jsonl"]
+
+
+def test_range_queries_compaction_and_late_writes(tmp_path):
+    clock = FakeClock(_START + 10 * _DAY)
+    repo = PartitionedSaleRepository(str(tmp_path), clock=clock)
+    repo.save_sales([_sale(_START + day * _DAY + hour * 3600) for day in range(5) for hour in (1, 23)])
+
+    def hours(sales):
+        return [(sale["timestamp"] - _START) / 3600 for sale in sales]
+
+    expected = [23, 25, 47, 49]
+    assert hours(repo.sales_between(_START + 2 * 3600, _START + 2 * _DAY + 7200)) == expected
+
+    assert repo.compact(before=_START + 4 * _DAY) == 4
+    assert len([name for name in os.listdir(tmp_path) if name.endswith(".snap")]) == 4
+    assert hours(repo.sales_between(_START + 2 * 3600, _START + 2 * _DAY + 7200)) == expected
+
+    # Venta tardía de un día ya compactado: queda en un .jsonl junto al snapshot
+    # y se funde en la próxima compactación, ordenada por timestamp.
+    repo.save_sale(_sale(_START + _DAY + 12 * 3600))
+    assert hours(repo.sales_between(_START + _DAY, _START + 2 * _DAY)) == [25, 47, 36]
+    repo.compact(before=_START + 4 * _DAY)
+    assert hours(repo.sales_between(_START + _DAY, _START + 2 * _DAY)) == [25, 36, 47]
+
+    # Reabrir lee lo compactado con sus ids y timestamps.
+    reopened = PartitionedSaleRepository(str(tmp_path), clock=clock)
+    assert reopened.list_sales() == repo.list_sales()
+    assert reopened.list_sales()[0]["sale_id"] == f"v{_START + 3600:.0f}"
+    first = reopened.page_sales(limit=3)
+    page = reopened.page_sales(since=first.next_token, limit=2)
+    assert hours(first.items) == [1, 23, 25] and hours(page.items) == [36, 47]
+    assert hours(reopened.page_sales(since=page.next_token, limit=1).items) == [49]
+
+
+def test_retention_drops_whole_partitions(tmp_path):
+    clock = FakeClock(_START + 4 * _DAY + 60)
+    repo = PartitionedSaleRepository(str(tmp_path), clock=clock)
+    repo.save_sales([_sale(_START + day * _DAY + 60) for day in range(5)])
+    repo.compact()
+
+    assert repo.apply_retention(keep_days=2) == 3
+    assert repo.partitions() == [20_003, 20_004]
+    assert repo.drop_before(_START + 4 * _DAY + 7200) == 1
+    assert sorted(os.listdir(tmp_path)) == ["sales-20241008.jsonl"]
+    assert len(repo.list_sales()) == 1
+
+
+def test_interrupted_compaction_is_finished_on_reopen(tmp_path):
+    clock = FakeClock(_START + 2 * _DAY)
+    repo = PartitionedSaleRepository(str(tmp_path), clock=clock)
+    repo.save_sales([_sale(_START + 60), _sale(_START + 120)])
+    repo.compact()
+    repo.save_sale(_sale(_START + 90))
+
+    # Simula una caída después de renombrar el registro del día.
+    log = tmp_path / "sales-20241004.jsonl"
+    log.rename(tmp_path / "sales-20241004.abc123.compacting")
+
+    reopened = PartitionedSaleRepository(str(tmp_path), clock=clock)
+    assert [sale["timestamp"] - _START for sale in reopened.list_sales()] == [60, 90, 120]
+    assert sorted(os.listdir(tmp_path)) == ["sales-20241004.abc123.snap"]
+
+
+def test_page_tokens_survive_retention_and_late_writes(tmp_path):
+    clock = FakeClock(_START + 4 * _DAY)
+    repo = PartitionedSaleRepository(str(tmp_path), clock=clock)
+    repo.save_sales([_sale(_START + day * _DAY + hour * 3600) for day in range(4) for hour in (1, 2)])
+
+    page = repo.page_sales(limit=3)
+    # Ni la retención ni una venta tardía de un día ya leído corren el token.
+    repo.drop_before(_START + _DAY)
+    repo.save_sale(_sale(_START + _DAY + 60))
+    page = repo.page_sales(since=page.next_token, limit=3)
+    assert [sale["timestamp"] - _START for sale in page.items] == [_DAY + 7200, _DAY + 60, 2 * _DAY + 3600]
+
+
+def test_compaction_does_not_block_writes_or_hide_the_day(tmp_path, monkeypatch):
+    clock = FakeClock(_START + 2 * _DAY)
+    repo = PartitionedSaleRepository(str(tmp_path), clock=clock)
+    repo.save_sales([_sale(_START + 60), _sale(_START + 120)])
+    seen = []
+    save_snapshot = partitioned_sales.save_sale_snapshot
+
+    def slow_save(path, sales):
+        # A mitad de la compactación, otro hilo escribe y lee el mismo día.
+        def write_and_read():
+            repo.save_sale(_sale(_START + 90))
+            seen.extend(sale["timestamp"] - _START for sale in repo.list_sales())
+
+        worker = threading.Thread(target=write_and_read)
+        worker.start()
+        worker.join(5)
+        assert not worker.is_alive()
+        return save_snapshot(path, sales)
+
+    monkeypatch.setattr(partitioned_sales, "save_sale_snapshot", slow_save)
+    assert repo.compact() == 1
+
+    assert seen == [60, 120, 90]
+    assert [sale["timestamp"] - _START for sale in repo.list_sales()] == [60, 120, 90]
+    assert len([name for name in os.listdir(tmp_path) if name.endswith(".compacting")]) == 0
@@ -0,0 +1,182 @@
+import asyncio
+import os
+import pickle
+import sys
+
+import pytest
+
+# Añadir la carpeta src al path para poder importar core/ e infra/
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from core.errors import ValidationError
+from core.models import Cart, Product
+from core.pricing import BundleDiscount, LineDiscount, PercentOff, PricingEngine, VolumeDiscount
+from core.async_services import AsyncSaleService
+from core.services import InventoryService, SaleService
+from core.sharding import LocalInventoryShard, ShardedSaleService, shard_of
+from infra.async_adapters import ThreadPoolProductRepository, ThreadPoolSaleRepository
+from infra.memory_repositories import InMemoryProductRepository, InMemorySaleRepository
+from infra.sqlite_repositories import SQLiteConnectionPool, SQLiteProductRepository, SQLiteSaleRepository
+
+_SCREW = Product(code="T001", name="Tornillos", price=0.5, stock=1000, location="Tornillería")
+_DRILL = Product(code="D001", name="Taladro", price=50.0, stock=10, location="Eléctricas")
+_BITS = Product(code="B001", name="Brocas", price=10.0, stock=10, location="Eléctricas")
+
+
+def test_best_rule_per_line_from_code_location_and_store_indexes():
+    engine = PricingEngine([
+        VolumeDiscount("tornillos-100", min_quantity=100, percent=10, product_code="T001"),
+        VolumeDiscount("tornillos-500", min_quantity=500, percent=20, product_code="T001"),
+        PercentOff("electricas", percent=5, location="Eléctricas"),
+        PercentOff("tienda", percent=2),
+        BundleDiscount("combo-taladro", product_codes=("D001", "B001"), percent=15),
+    ])
+
+    discounts = engine.discounts([(_SCREW, 150), (_DRILL, 2), (_BITS, 1)])
+
+    assert discounts[0] == LineDiscount(amount=7.5, rule_id="tornillos-100")
+    # Un solo combo completo: 15% sobre una unidad gana al 5% sobre dos.
+    assert discounts[1] == LineDiscount(amount=7.5, rule_id="combo-taladro")
+    assert discounts[2] == LineDiscount(amount=1.5, rule_id="combo-taladro")
+    assert engine.discounts([(_SCREW, 600)])[0].rule_id == "tornillos-500"
+    assert engine.discounts([(_SCREW, 10)])[0] == LineDiscount(amount=0.1, rule_id="tienda")
+
+
+def test_inactive_and_invalid_rules():
+    engine = PricingEngine(
+        [
+            PercentOff("vencida", percent=50, valid_until=100.0),
+            PercentOff("futura", percent=50, valid_from=300.0),
+        ],
+        now=200.0,
+    )
+    assert engine.rule_count == 0
+    assert engine.discounts([(_SCREW, 1)], now=200.0) == [None]
+
+    with pytest.raises(ValidationError):
+        PricingEngine([PercentOff("mal", percent=120)])
+    with pytest.raises(ValidationError):
+        PricingEngine([BundleDiscount("solo", product_codes=("D001",), percent=10)])
+    with pytest.raises(ValidationError):
+        PricingEngine([VolumeDiscount("ambos", 10, 5, product_code="T001", location="Tornillería")])
+
+
+def test_sale_receipt_and_stored_sale_show_discounts(tmp_path):
+    pool = SQLiteConnectionPool(str(tmp_path / "sigi.db"))
+    product_repo = SQLiteProductRepository(pool)
+    product_repo.save_many([_SCREW, _DRILL])
+    sale_repo = SQLiteSaleRepository(pool)
+    engine = PricingEngine([VolumeDiscount("tornillos-100", 100, 10, product_code="T001")])
+    sale_service = SaleService(product_repo, sale_repo, InventoryService(product_repo), pricing=engine)
+
+    cart = Cart()
+    cart.add_item("T001", 100)
+    cart.add_item("D001", 1)
+    receipt = sale_service.confirm_sale(cart)
+
+    screws, drill = receipt.items
+    assert (screws.discount, screws.promotion, screws.total) == (5.0, "tornillos-100", 45.0)
+    assert (drill.discount, drill.promotion, drill.total) == (0.0, None, 50.0)
+    assert receipt.grand_total == 95.0
+
+    stored = sale_repo.list_sales()[0]
+    assert stored["items"][0]["discount"] == 5.0 and stored["items"][0]["promotion"] == "tornillos-100"
+    assert "promotion" not in stored["items"][1]
+
+    # Sin motor de precios, la venta se valoriza como siempre.
+    sale_service.set_pricing(None)
+    assert sale_service.confirm_sale(cart).grand_total == 100.0
+    pool.close()
+
+
+def test_promotions_start_and_expire_while_the_service_runs():
+    """
+    Un mismo SaleService de larga vida: la liquidación empieza y vence
+    según el momento de cada venta, sin volver a crear el motor.
+    """
+    now = [1_000.0]
+    product_repo = InMemoryProductRepository()
+    product_repo.save(_DRILL)
+    engine = PricingEngine([
+        PercentOff("liquidacion", percent=20, product_code="D001", valid_from=2_000.0, valid_until=3_000.0),
+        PercentOff("tienda", percent=5, valid_until=2_500.0),
+    ], clock=lambda: now[0])
+    sale_service = SaleService(
+        product_repo, InMemorySaleRepository(), InventoryService(product_repo), pricing=engine, clock=lambda: now[0]
+    )
+    cart = Cart()
+    cart.add_item("D001", 1)
+
+    totals = []
+    for now[0] in (1_000.0, 2_000.0, 2_499.0, 2_500.0, 3_000.0, 1_500.0):
+        totals.append(sale_service.confirm_sale(cart).grand_total)
+    assert totals == [47.5, 40.0, 40.0, 40.0, 50.0, 47.5]
+    assert engine.discounts([(_DRILL, 1)], now=2_999.0)[0].rule_id == "liquidacion"
+
+
+def test_async_and_sharded_sales_apply_promotions():
+    engine = PricingEngine([
+        VolumeDiscount("tornillos-100", 100, 10, product_code="T001"),
+        PercentOff("electricas", percent=5, location="Eléctricas"),
+    ])
+    cart = Cart()
+    cart.add_item("T001", 100)
+    cart.add_item("D001", 1)
+
+    product_repo = InMemoryProductRepository()
+    product_repo.save_many([_SCREW, _DRILL])
+    async_service = AsyncSaleService(
+        ThreadPoolProductRepository(product_repo),
+        ThreadPoolSaleRepository(InMemorySaleRepository()),
+        pricing=engine,
+    )
+    receipt = asyncio.run(async_service.confirm_sale(cart))
+    assert [line.promotion for line in receipt.items] == ["tornillos-100", "electricas"]
+    assert receipt.grand_total == 45.0 + 47.5
+
+    # Con el tornillo y el taladro en shards distintos, la venta se reparte.
+    shard_count = next(n for n in range(2, 10) if shard_of("T001", n) != shard_of("D001", n))
+    shards = [
+        LocalInventoryShard(InMemoryProductRepository(), pricing=engine) for _ in range(shard_count)
+    ]
+    sharded = ShardedSaleService(shards, InMemorySaleRepository())
+    sharded.load_products([_SCREW, _DRILL])
+    single = Cart()
+    single.add_item("D001", 2)
+    spanning, alone = sharded.confirm_sales([cart, single])
+    sharded.close()
+    assert spanning.receipt.grand_total == 45.0 + 47.5
+    assert alone.receipt.items[0].promotion == "electricas"
+
+    # Los shards en procesos reciben el motor por pickle.
+    assert pickle.loads(pickle.dumps(engine)).discounts([(_SCREW, 100)])[0].rule_id == "tornillos-100"
+
+
+def test_sharded_sales_are_priced_at_the_coordinator_timestamp():
+    # El reloj del motor en los shards no importa: valoriza con el
+    # momento que fija el coordinador para el lote.
+    engine = PricingEngine(
+        [PercentOff("liquidacion", percent=20, valid_from=2_000.0, valid_until=3_000.0)],
+        clock=lambda: 0.0,
+    )
+    shard_count = next(n for n in range(2, 10) if shard_of("T001", n) != shard_of("D001", n))
+    shards = [
+        LocalInventoryShard(InMemoryProductRepository(), pricing=engine) for _ in range(shard_count)
+    ]
+    now = [2_500.0]
+    sale_repo = InMemorySaleRepository()
+    sharded = ShardedSaleService(shards, sale_repo, clock=lambda: now[0])
+    sharded.load_products([_SCREW, _DRILL])
+    spanning, single = Cart(), Cart()
+    spanning.add_item("T001", 10)
+    spanning.add_item("D001", 1)
+    single.add_item("D001", 1)
+
+    outcomes = sharded.confirm_sales([spanning, single])
+    now[0] = 3_000.0
+    expired = sharded.confirm_sale(single)
+    sharded.close()
+
+    assert [o.receipt.grand_total for o in outcomes] == [44.0, 40.0]
+    assert expired.grand_total == 50.0
+    assert [sale["timestamp"] for sale in sale_repo.list_sales()] == [2_500.0, 2_500.0, 3_000.0]
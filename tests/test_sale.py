@@ -7,7 +7,7 @@ sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src"))
 import pytest
 from core.models import Product, Cart
 from core.services import InventoryService, SaleService
-from core.errors import DomainError
+from core.errors import DomainError, ValidationError
 from infra.memory_repositories import InMemoryProductRepository, InMemorySaleRepository
 
 
@@ -109,3 +109,111 @@ def test_confirm_sale_raises_when_insufficient_stock():
 
     with pytest.raises(DomainError):
         sale_service.confirm_sale(cart)
+
+
+class _CountingProductRepository(InMemoryProductRepository):
+    """
+    Repositorio en memoria que cuenta las llamadas recibidas.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.calls = 0
+
+    def find_by_code(self, code):
+        self.calls += 1
+        return super().find_by_code(code)
+
+    def find_by_codes(self, codes):
+        self.calls += 1
+        return super().find_by_codes(codes)
+
+    def save(self, product):
+        self.calls += 1
+        super().save(product)
+
+    def save_many(self, products):
+        self.calls += 1
+        super().save_many(products)
+
+    def compare_and_save_many(self, products):
+        self.calls += 1
+        return super().compare_and_save_many(products)
+
+
+def test_confirm_sale_repository_calls_do_not_grow_with_cart_lines():
+    """
+    confirm_sale debe consultar y guardar el carrito completo en lote:
+    las llamadas al repositorio no dependen del número de líneas.
+    """
+    product_repo = _CountingProductRepository()
+    for n in range(40):
+        product_repo.save_many(
+            [Product(code=f"P{n:03}", name="Tornillo", price=1.0, stock=10, location="A1")]
+        )
+    sale_service = SaleService(
+        product_repo, InMemorySaleRepository(), InventoryService(product_repo)
+    )
+
+    small_cart = Cart()
+    small_cart.add_item("P000", 1)
+    product_repo.calls = 0
+    sale_service.confirm_sale(small_cart)
+    calls_small = product_repo.calls
+
+    big_cart = Cart()
+    for n in range(40):
+        big_cart.add_item(f"P{n:03}", 2)
+    product_repo.calls = 0
+    sale_service.confirm_sale(big_cart)
+
+    assert product_repo.calls == calls_small == 2
+    assert product_repo.find_by_code("P001").stock == 8
+
+
+def test_confirm_sales_first_cart_wins_and_results_keep_input_order():
+    """
+    confirm_sales atiende los carritos en orden: cuando el stock no
+    alcanza gana el que llegó antes, y cada carrito recibe su propio
+    recibo o error en la misma posición de entrada.
+    """
+    product_repo, sale_repo, sale_service = _build_repos_and_services()
+
+    first, second, invalid, third = Cart(), Cart(), Cart(), Cart()
+    first.add_item("P001", 7)     # deja 3 de P001
+    second.add_item("P001", 5)    # no alcanza: rechazado completo
+    second.add_item("P002", 1)
+    invalid.add_item("P002", 0)   # cantidad inválida
+    third.add_item("P001", 3)     # alcanza con lo que quedó
+    third.add_item("P002", 4)
+
+    outcomes = sale_service.confirm_sales([first, second, invalid, Cart(), third])
+
+    assert [o.ok for o in outcomes] == [True, False, False, False, True]
+    assert isinstance(outcomes[2].error, ValidationError)
+    assert outcomes[4].receipt.grand_total == 3 * 50.0 + 4 * 5.0
+    assert product_repo.find_by_code("P001").stock == 0
+    assert product_repo.find_by_code("P002").stock == 16
+    assert [s["grand_total"] for s in sale_repo.list_sales()] == [350.0, 170.0]
+
+
+def test_confirm_sales_touches_repositories_once_per_batch():
+    product_repo = _CountingProductRepository()
+    product_repo.save_many(
+        [Product(code=f"P{n:03}", name="Tornillo", price=1.0, stock=100, location="A1") for n in range(20)]
+    )
+    sale_service = SaleService(
+        product_repo, InMemorySaleRepository(), InventoryService(product_repo)
+    )
+    carts = []
+    for n in range(50):
+        cart = Cart()
+        cart.add_item(f"P{n % 20:03}", 1)
+        cart.add_item(f"P{(n + 1) % 20:03}", 1)
+        carts.append(cart)
+
+    product_repo.calls = 0
+    outcomes = sale_service.confirm_sales(carts)
+
+    assert all(o.ok for o in outcomes)
+    assert product_repo.calls == 2  # un find_by_codes y un compare_and_save_many
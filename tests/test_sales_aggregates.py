@@ -0,0 +1,106 @@
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Añadir la carpeta src al path para poder importar core/ e infra/
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from core.models import Cart, Product
+from core.services import InventoryService, SaleService
+from infra.memory_repositories import InMemoryProductRepository, InMemorySaleRepository
+from infra.sales_aggregates import AggregatingSaleRepository, SalesAggregates
+
+_DAY = 86400.0
+
+
+class _FakeClock:
+    def __init__(self, now: float) -> None:
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_aggregates_follow_each_sale_and_rebuild_from_history():
+    """
+    Los acumulados se actualizan con cada venta y pueden reconstruirse
+    desde el historial con el mismo resultado.
+    """
+    clock = _FakeClock(now=10 * _DAY + 3600)
+    product_repo = InMemoryProductRepository()
+    product_repo.seed_demo_data()
+    inner = InMemorySaleRepository()
+    sale_repo = AggregatingSaleRepository(inner, SalesAggregates(clock=clock))
+    sale_service = SaleService(product_repo, sale_repo, InventoryService(product_repo), clock=clock)
+
+    cart = Cart()
+    cart.add_item("T001", 3)
+    cart.add_item("H001", 1)
+    sale_service.confirm_sale(cart)
+
+    clock.now += _DAY
+    cart = Cart()
+    cart.add_item("T001", 2)
+    sale_service.confirm_sale(cart)
+
+    aggregates = sale_repo.aggregates
+    assert aggregates.units_sold("T001") == 5
+    assert aggregates.revenue("H001") == 9.5
+    assert aggregates.units_sold("NO_EXISTE") == 0
+    assert aggregates.top_sellers(1) == [("T001", 5)]
+
+    first_day = aggregates.totals_at(10 * _DAY)
+    assert (first_day.sales, first_day.units) == (1, 4)
+    assert aggregates.totals_at(11 * _DAY + 5).units == 2
+    assert aggregates.overall()[0] == 2
+
+    rebuilt = SalesAggregates()
+    rebuilt.rebuild(inner.iter_sales())
+    assert rebuilt.units_sold("T001") == 5
+    assert rebuilt.overall() == aggregates.overall()
+    # Cada venta lleva su timestamp: la reconstrucción cae en los mismos días.
+    assert rebuilt.totals_at(10 * _DAY) == first_day
+
+
+def test_undated_history_is_not_put_in_todays_bucket():
+    clock = _FakeClock(now=50 * _DAY)
+    aggregates = SalesAggregates(clock=clock)
+    line = {"product_code": "T001", "name": "Tornillos", "quantity": 2, "unit_price": 0.5, "total": 1.0}
+    aggregates.rebuild([
+        {"items": [line], "grand_total": 1.0},  # historial anterior a los timestamps
+        {"items": [line], "grand_total": 1.0, "timestamp": 3 * _DAY},
+    ])
+
+    assert aggregates.overall() == (2, 2.0)
+    assert aggregates.units_sold("T001") == 4
+    assert aggregates.undated_sales == 1
+    assert aggregates.totals_at(3 * _DAY).sales == 1
+    assert aggregates.totals_at(clock.now).sales == 0
+
+
+class _SlowHistory(InMemorySaleRepository):
+    def iter_sales(self, since: int = 0, batch_size: int = 500):
+        for sale in super().iter_sales(since, batch_size):
+            time.sleep(0.001)
+            yield sale
+
+
+def test_rebuild_while_sales_are_being_registered_counts_each_sale_once():
+    inner = _SlowHistory()
+    sale_repo = AggregatingSaleRepository(inner, SalesAggregates())
+    line = {"product_code": "T001", "name": "Tornillos", "quantity": 1, "unit_price": 1.0, "total": 1.0}
+
+    def sell(n: int) -> None:
+        sale_repo.save_sale({"items": [line], "grand_total": 1.0, "timestamp": float(n)})
+
+    for n in range(100):
+        sell(n)
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        futures = [pool.submit(sell, n) for n in range(100, 300)]
+        sale_repo.rebuild()
+        for future in futures:
+            future.result()
+
+    assert sale_repo.aggregates.overall() == (300, 300.0)
+    assert sale_repo.aggregates.units_sold("T001") == len(inner.list_sales()) == 300
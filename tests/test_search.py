@@ -0,0 +1,87 @@
+import os
+import sys
+
+# Añadir la carpeta src al path para poder importar core/ e infra/
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import pytest
+from core.models import Product
+from core.services import InventoryService
+from core.errors import ValidationError
+from infra.columnar_repositories import ColumnarProductRepository
+from infra.memory_repositories import InMemoryProductRepository
+from infra.search_index import ProductSearchIndex
+from infra.sqlite_repositories import SQLiteConnectionPool, SQLiteProductRepository
+
+
+@pytest.fixture(params=["memory", "columnar", "sqlite"])
+def repo(request, tmp_path):
+    if request.param == "memory":
+        repo = InMemoryProductRepository()
+    elif request.param == "columnar":
+        repo = ColumnarProductRepository()
+    else:
+        repo = SQLiteProductRepository(SQLiteConnectionPool(str(tmp_path / "s.db")))
+    repo.save_many(
+        [
+            Product(code="H001", name="Martillo 16 oz mango fibra", price=9.5, stock=25,
+                    location="Pasillo 1 - Herramientas de mano"),
+            Product(code="P001", name="Galón de pintura blanca interior", price=18.0, stock=15,
+                    location="Pasillo 4 - Pinturas"),
+            Product(code="P002", name="Galón de PINTURA azul exterior", price=21.0, stock=8,
+                    location="Pasillo 4 - Pinturas"),
+            Product(code="P003", name="Rodillo para pintura", price=4.0, stock=30,
+                    location="Pasillo 5 - Accesorios"),
+        ]
+    )
+    return repo
+
+
+def test_search_matches_prefixes_without_case_or_accents(repo):
+    """
+    "galon pint" encuentra "Galón de pintura..." sin importar acentos
+    ni mayúsculas, y todas las palabras deben coincidir.
+    """
+    service = InventoryService(repo)
+
+    result = service.search_products("galon PINT")
+
+    assert [p.code for p in result.items] == ["P001", "P002"]
+    assert result.total == 2
+    assert service.search_products("martillo pintura").total == 0
+
+
+def test_search_filters_by_location_and_paginates(repo):
+    """
+    El filtro de ubicación y la paginación se aplican sobre
+    resultados ordenados por código.
+    """
+    service = InventoryService(repo)
+
+    page = service.search_products("pint", location="pasillo 4 - pinturas", offset=1, limit=1)
+    assert [p.code for p in page.items] == ["P002"]
+    assert page.total == 2
+
+    repo.save(Product(code="P003", name="Brocha", price=4.0, stock=30, location="Pasillo 5 - Accesorios"))
+    assert [p.code for p in service.search_products("pintura").items] == ["P001", "P002"]
+
+
+def test_search_validates_page_arguments():
+    service = InventoryService(InMemoryProductRepository())
+
+    with pytest.raises(ValidationError):
+        service.search_products("tornillo", limit=0)
+    with pytest.raises(ValidationError):
+        service.search_products("tornillo", offset=-1)
+
+
+def test_index_pages_match_the_sorted_search():
+    index = ProductSearchIndex()
+    for n in (7, 3, 11, 5, 1, 9):
+        index.add(Product(code=f"T{n:03}", name=f"Tornillo {n}", price=0.5, stock=1, location="Tornillería"))
+
+    codes = index.search("torn")
+    assert codes == ["T001", "T003", "T005", "T007", "T009", "T011"]
+    assert index.search_page("torn", offset=2, limit=3) == (codes[2:5], 6)
+    assert index.search_page("torn", offset=5, limit=3) == (codes[5:], 6)
+    assert index.search_page("torn", location="pasillo 9", offset=0, limit=3) == ([], 0)
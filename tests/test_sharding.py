@@ -0,0 +1,151 @@
+import os
+import sys
+
+# Añadir la carpeta src al path para poder importar core/ e infra/
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import pytest
+from core.models import Cart, Product
+from core.sharding import LocalInventoryShard, ShardedSaleService, shard_of
+from infra.memory_repositories import InMemoryProductRepository, InMemorySaleRepository
+from infra.process_shards import start_process_shards
+
+_CODES = [f"SKU{n:03}" for n in range(30)]
+
+
+def _catalog():
+    return [
+        Product(code=code, name=f"Producto {code}", price=2.0, stock=10, location="A1")
+        for code in _CODES
+    ]
+
+
+def _codes_on_distinct_shards(shard_count: int):
+    first = _CODES[0]
+    other = next(c for c in _CODES if shard_of(c, shard_count) != shard_of(first, shard_count))
+    return first, other
+
+
+def _local_service(sale_repo=None, shard_count: int = 3) -> ShardedSaleService:
+    shards = [LocalInventoryShard(InMemoryProductRepository()) for _ in range(shard_count)]
+    service = ShardedSaleService(shards, sale_repo or InMemorySaleRepository())
+    service.load_products(_catalog())
+    return service
+
+
+def test_distributed_carts_commit_or_abort_on_every_shard():
+    """
+    Un carrito repartido se vende completo o no se vende: si una parte
+    no tiene stock, la reserva de las otras partes se deshace.
+    """
+    sale_repo = InMemorySaleRepository()
+    service = _local_service(sale_repo)
+    a, b = _codes_on_distinct_shards(3)
+
+    spanning = Cart()
+    spanning.add_item(b, 2)
+    spanning.add_item(a, 3)
+    single = Cart()
+    single.add_item(a, 1)
+    too_many = Cart()
+    too_many.add_item(a, 1)
+    too_many.add_item(b, 50)
+
+    outcomes = service.confirm_sales([spanning, single, too_many, Cart()])
+
+    assert [o.ok for o in outcomes] == [True, True, False, False]
+    assert [line.product_code for line in outcomes[0].receipt.items] == [b, a]
+    assert outcomes[0].receipt.grand_total == 10.0
+    stock = {code: p.stock for code, p in service.find_products([a, b]).items()}
+    assert stock == {a: 6, b: 8}
+    assert [s["grand_total"] for s in sale_repo.list_sales()] == [10.0, 2.0]
+    service.close()
+
+
+class _FailingSaleRepository(InMemorySaleRepository):
+    def save_sales(self, sales):
+        raise RuntimeError("fallo simulado al registrar las ventas")
+
+
+def test_registration_failure_returns_stock_on_every_shard():
+    service = _local_service(_FailingSaleRepository())
+    a, b = _codes_on_distinct_shards(3)
+    spanning, single = Cart(), Cart()
+    spanning.add_item(a, 2)
+    spanning.add_item(b, 2)
+    single.add_item(b, 1)
+
+    with pytest.raises(RuntimeError):
+        service.confirm_sales([spanning, single])
+
+    assert all(p.stock == 10 for p in service.find_products([a, b]).values())
+    service.close()
+
+
+class _BrokenShard(LocalInventoryShard):
+    """
+    Shard cuyo lote falla después de vender y reservar lo que le toca
+    antes de la operación número `fail_at`.
+    """
+
+    def __init__(self, fail_at: int) -> None:
+        super().__init__(InMemoryProductRepository())
+        self.fail_at = fail_at
+
+    def _prepare(self, operation):
+        outcome = super()._prepare(operation)
+        self.fail_at -= 1
+        if self.fail_at == 0:
+            raise OSError("el proceso del shard murió")
+        return outcome
+
+
+def test_a_failing_shard_leaves_no_stock_discounted_on_any_shard():
+    a, b = _codes_on_distinct_shards(2)
+    shards = [LocalInventoryShard(InMemoryProductRepository()) for _ in range(2)]
+    shards[shard_of(b, 2)] = broken = _BrokenShard(fail_at=2)
+    service = ShardedSaleService(shards, InMemorySaleRepository())
+    service.load_products(_catalog())
+
+    spanning, single_a, single_b, other_spanning = Cart(), Cart(), Cart(), Cart()
+    spanning.add_item(a, 3)
+    spanning.add_item(b, 1)
+    single_a.add_item(a, 2)
+    single_b.add_item(b, 4)
+    other_spanning.add_item(b, 2)
+    other_spanning.add_item(a, 1)
+
+    # El shard de `b` vende single_b y reserva su parte de `spanning`
+    # antes de fallar en `other_spanning`.
+    with pytest.raises(OSError):
+        service.confirm_sales([spanning, single_a, single_b, other_spanning])
+
+    assert all(p.stock == 10 for p in service.find_products([a, b]).values())
+    assert all(not shard._prepared for shard in shards)
+    broken.fail_at = 0
+    assert service.confirm_sale(spanning).grand_total == 8.0
+    service.close()
+
+
+def test_process_shards_sell_end_to_end():
+    """
+    Con shards en procesos trabajadores el resultado es el mismo.
+    """
+    shards = start_process_shards(2)
+    try:
+        service = ShardedSaleService(shards, InMemorySaleRepository())
+        service.load_products(_catalog())
+        a, b = _codes_on_distinct_shards(2)
+        cart = Cart()
+        cart.add_item(a, 4)
+        cart.add_item(b, 1)
+
+        receipt = service.confirm_sale(cart)
+
+        assert receipt.grand_total == 10.0
+        stock = {code: p.stock for code, p in service.find_products([a, b]).items()}
+        assert stock == {a: 6, b: 9}
+        service.close()
+    finally:
+        for shard in shards:
+            shard.close()
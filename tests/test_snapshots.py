@@ -0,0 +1,199 @@
+import os
+import threading
+import time
+import sys
+
+import pytest
+from dataclasses import replace
+
+# Añadir la carpeta src al path para poder importar core/ e infra/
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from core.models import Cart, Product
+from core.services import InventoryService, SaleService
+from infra.memory_repositories import InMemoryProductRepository, InMemorySaleRepository
+from infra.snapshots import (
+    ChangeLoggingProductRepository,
+    ProductChangeLog,
+    restore_product_repository,
+    restore_sale_repository,
+    save_product_snapshot,
+    save_sale_repository_snapshot,
+)
+
+
+@pytest.mark.parametrize("columnar", [False, True])
+def test_restored_repository_matches_original_and_replays_change_log(tmp_path, columnar):
+    """
+    El repositorio restaurado desde el snapshot más el registro de
+    cambios queda igual al original, y sigue vendiendo y buscando.
+    """
+    repo = InMemoryProductRepository()
+    repo.seed_demo_data()
+    snapshot = str(tmp_path / "productos.snap")
+    assert save_product_snapshot(snapshot, repo.iter_products()) == 4
+
+    # Cambios posteriores al snapshot: una venta y un producto nuevo.
+    log = ProductChangeLog(str(tmp_path / "cambios.jsonl"))
+    logged = ChangeLoggingProductRepository(repo, log)
+    sale_service = SaleService(logged, InMemorySaleRepository(), InventoryService(logged))
+    cart = Cart()
+    cart.add_item("H001", 3)
+    sale_service.confirm_sale(cart)
+    logged.save(Product(code="B001", name="Brocha 2\"", price=3.5, stock=12, location="Pasillo 4 - Pinturas"))
+
+    restored = restore_product_repository(snapshot, change_log=log, columnar=columnar)
+    log.close()
+
+    assert restored.list_all() and sorted(restored.list_all(), key=lambda p: p.code) == sorted(
+        repo.list_all(), key=lambda p: p.code
+    )
+    assert restored.find_by_code("H001").stock == 22
+    assert restored.find_by_code("H001").version == 1
+    assert [p.code for p in restored.search("taladro electrico").items] == ["D001"]
+
+    restored_sales = SaleService(restored, InMemorySaleRepository(), InventoryService(restored))
+    cart = Cart()
+    cart.add_item("H001", 2)
+    restored_sales.confirm_sale(cart)
+    assert restored.find_by_code("H001").stock == 20
+
+
+def test_change_log_skips_torn_last_line_and_resets(tmp_path):
+    """
+    Una última línea a medio escribir (corte de luz) se descarta, y
+    reset() vacía el registro después de un snapshot nuevo.
+    """
+    path = str(tmp_path / "cambios.jsonl")
+    log = ProductChangeLog(path)
+    log.append([Product(code="H001", name="Martillo", price=9.5, stock=25, location="Pasillo 1")])
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('["D001", "Taladro"')
+
+    assert [p.code for p in log.iter_changes()] == ["H001"]
+    log.reset()
+    assert list(log.iter_changes()) == []
+    log.close()
+
+
+def test_sale_snapshot_round_trips_history(tmp_path):
+    sale_repo = InMemorySaleRepository()
+    sale_repo.save_sales([
+        {
+            "items": [
+                {"product_code": "H001", "name": "Martillo", "quantity": 2, "unit_price": 9.5, "total": 19.0},
+                {"product_code": "T001", "name": "Tornillos", "quantity": 1, "unit_price": 5.2, "total": 5.2},
+            ],
+            "grand_total": 24.2,
+            "timestamp": 1700000000.5,
+        },
+        {
+            "items": [{"product_code": "H001", "name": "Martillo", "quantity": 1, "unit_price": 9.5, "total": 9.5}],
+            "grand_total": 9.5,
+        },
+    ])
+    path = str(tmp_path / "ventas.snap")
+    assert save_sale_repository_snapshot(path, sale_repo) == 2
+
+    assert restore_sale_repository(path).list_sales() == sale_repo.list_sales()
+
+
+def test_snapshot_rejects_other_files(tmp_path):
+    path = tmp_path / "otro.bin"
+    path.write_bytes(b"no es un snapshot")
+    with pytest.raises(ValueError):
+        restore_product_repository(str(path))
+
+
+def test_restored_memory_repository_loads_rows_on_demand(tmp_path):
+    """
+    Tras restaurar, los productos se materializan al leerlos; una
+    escritura previa a la lectura tiene prioridad sobre el snapshot.
+    """
+    repo = InMemoryProductRepository()
+    repo.seed_demo_data()
+    snapshot = str(tmp_path / "productos.snap")
+    save_product_snapshot(snapshot, repo.iter_products())
+
+    restored = restore_product_repository(snapshot)
+    restored.save(Product(code="T001", name="Tornillos", price=6.0, stock=1, location="Pasillo 3"))
+
+    assert restored.find_by_code("H001") == repo.find_by_code("H001")
+    assert restored.find_by_code("T001").price == 6.0
+    assert [p.code for p in restored.page_products(limit=2).items] == ["D001", "H001"]
+    assert [p.code for p in restored.search("tornillos").items] == ["T001"]
+    assert len(restored.list_all()) == 4
+
+
+class _PausingProductRepository(InMemoryProductRepository):
+    """
+    Tras aplicar el primer guardado condicional avisa y demora un poco,
+    como un hilo desalojado justo antes de anotar en el registro.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.applied = threading.Event()
+
+    def compare_and_save_many(self, products):
+        conflicts = super().compare_and_save_many(products)
+        if not self.applied.is_set():
+            self.applied.set()
+            time.sleep(0.1)
+        return conflicts
+
+
+def test_change_log_keeps_the_order_in_which_writes_were_applied(tmp_path):
+    inner = _PausingProductRepository()
+    inner.save(Product(code="H001", name="Martillo", price=9.5, stock=10, location="Pasillo 1"))
+    log = ProductChangeLog(str(tmp_path / "cambios.jsonl"))
+    logged = ChangeLoggingProductRepository(inner, log)
+
+    def discount(quantity: int) -> None:
+        current = logged.find_by_code("H001")
+        assert logged.compare_and_save_many([replace(current, stock=current.stock - quantity)]) == []
+
+    first = threading.Thread(target=discount, args=(1,))
+    first.start()
+    assert inner.applied.wait(5)
+    discount(2)  # lee la versión ya aplicada por el primero
+    first.join()
+
+    replayed = InMemoryProductRepository()
+    log.replay(replayed)
+    log.close()
+    assert replayed.find_by_code("H001") == inner.find_by_code("H001")
+    assert replayed.find_by_code("H001").stock == 7
+
+
+def test_checkpoint_does_not_lose_writes_made_while_it_runs(tmp_path):
+    inner = InMemoryProductRepository()
+    inner.save_many(
+        Product(code=f"T{n:04}", name="Tornillo", price=0.5, stock=1000, location="Pasillo 2")
+        for n in range(2000)
+    )
+    log = ProductChangeLog(str(tmp_path / "cambios.jsonl"))
+    logged = ChangeLoggingProductRepository(inner, log)
+    inventory = InventoryService(logged)
+    snapshot = str(tmp_path / "productos.snap")
+    stop = threading.Event()
+
+    def sell():
+        while not stop.is_set():
+            for n in range(0, 2000, 97):
+                inventory.release_stock({f"T{n:04}": -1})
+
+    seller = threading.Thread(target=sell)
+    seller.start()
+    try:
+        for _ in range(5):
+            assert logged.checkpoint(snapshot) == 2000
+    finally:
+        stop.set()
+        seller.join()
+
+    restored = restore_product_repository(snapshot, change_log=log)
+    log.close()
+    by_code = {p.code: p for p in inner.list_all()}
+    assert {p.code: p for p in restored.list_all()} == by_code
+    assert by_code["T0000"].stock < 1000
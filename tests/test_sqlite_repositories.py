@@ -0,0 +1,137 @@
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+# Añadir la carpeta src al path para poder importar core/ e infra/
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import pytest
+from dataclasses import replace
+from core.errors import DomainError
+from core.models import Product, Cart
+from core.services import InventoryService, SaleService
+from infra.sqlite_repositories import (
+    SQLiteConnectionPool,
+    SQLiteProductRepository,
+    SQLiteSaleRepository,
+)
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "sigi.db")
+
+
+def _product(code: str, stock: int = 10) -> Product:
+    return Product(code=code, name=f"Producto {code}", price=4.5, stock=stock, location="A1")
+
+
+def test_products_are_upserted_and_survive_reopening(db_path):
+    """
+    save_many inserta o actualiza, y los datos persisten al reabrir la BD.
+    """
+    pool = SQLiteConnectionPool(db_path)
+    repo = SQLiteProductRepository(pool)
+    repo.save_many([_product("P001"), _product("P002")])
+    repo.save_many([_product("P002", stock=3)])
+    pool.close()
+
+    reopened = SQLiteProductRepository(SQLiteConnectionPool(db_path))
+
+    found = reopened.find_by_codes(["P001", "P002", "NO_EXISTE"])
+    assert sorted(found) == ["P001", "P002"]
+    assert found["P002"].stock == 3
+    assert reopened.find_by_code("NO_EXISTE") is None
+    assert [p.code for p in reopened.list_all()] == ["P001", "P002"]
+
+
+def test_concurrent_sales_are_stored_with_their_lines(db_path):
+    """
+    Ventas desde varios hilos: cabecera y líneas quedan guardadas
+    y el stock final es consistente.
+    """
+    pool = SQLiteConnectionPool(db_path)
+    product_repo = SQLiteProductRepository(pool)
+    sale_repo = SQLiteSaleRepository(pool)
+    product_repo.save_many([_product("P001", stock=100), _product("P002", stock=100)])
+    sale_service = SaleService(product_repo, sale_repo, InventoryService(product_repo))
+
+    def sell(_: int) -> None:
+        cart = Cart()
+        cart.add_item("P001", 1)
+        cart.add_item("P002", 2)
+        sale_service.confirm_sale(cart)
+
+    with ThreadPoolExecutor(max_workers=8) as pool_executor:
+        list(pool_executor.map(sell, range(40)))
+
+    sales = sale_repo.list_sales()
+    assert len(sales) == 40
+    assert len({sale["sale_id"] for sale in sales}) == 40
+    assert all(isinstance(sale["timestamp"], float) for sale in sales)
+    assert sales[0]["items"][1] == {
+        "product_code": "P002",
+        "name": "Producto P002",
+        "quantity": 2,
+        "unit_price": 4.5,
+        "total": 9.0,
+    }
+    assert product_repo.find_by_code("P001").stock == 60
+    assert product_repo.find_by_code("P002").stock == 20
+    pool.close()
+
+
+def test_compare_and_save_many_rejects_stale_versions(db_path):
+    """
+    El guardado condicional es todo o nada: si un producto se leyó con
+    una versión vieja no se guarda ninguno y se informa su código.
+    """
+    repo = SQLiteProductRepository(SQLiteConnectionPool(db_path))
+    repo.save_many([_product("P001"), _product("P002")])
+    p1, p2 = repo.find_by_code("P001"), repo.find_by_code("P002")
+
+    assert repo.compare_and_save_many([replace(p1, stock=9)]) == []
+    conflicts = repo.compare_and_save_many([replace(p1, stock=1), replace(p2, stock=1)])
+
+    assert conflicts == ["P001"]
+    assert (repo.find_by_code("P001").stock, repo.find_by_code("P001").version) == (9, 1)
+    assert repo.find_by_code("P002").stock == 10
+    assert repo.compare_and_save_many([_product("NO_EXISTE")]) == ["NO_EXISTE"]
+
+
+def test_sales_from_independent_processes_do_not_lose_stock(db_path):
+    """
+    Dos pilas completas (pool, repositorios y servicios propios, sin
+    locks compartidos), como dos procesos sobre el mismo archivo:
+    ninguna venta pisa el descuento de la otra y no se vende de más.
+    """
+    setup = SQLiteConnectionPool(db_path)
+    SQLiteProductRepository(setup).save_many([_product("P001", stock=50)])
+    setup.close()
+
+    stacks = []
+    for _ in range(2):
+        pool = SQLiteConnectionPool(db_path)
+        product_repo = SQLiteProductRepository(pool)
+        stacks.append(
+            (pool, SaleService(product_repo, SQLiteSaleRepository(pool), InventoryService(product_repo)))
+        )
+
+    def sell(n: int) -> bool:
+        cart = Cart()
+        cart.add_item("P001", 1)
+        try:
+            stacks[n % 2][1].confirm_sale(cart)
+            return True
+        except DomainError:
+            return False
+
+    with ThreadPoolExecutor(max_workers=8) as pool_executor:
+        sold = sum(pool_executor.map(sell, range(60)))
+
+    product_repo = SQLiteProductRepository(stacks[0][0])
+    assert sold == 50
+    assert product_repo.find_by_code("P001").stock == 0
+    assert len(SQLiteSaleRepository(stacks[0][0]).list_sales()) == 50
+    for pool, _ in stacks:
+        pool.close()
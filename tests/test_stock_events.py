@@ -0,0 +1,152 @@
+import os
+import sys
+import threading
+import time
+
+# Añadir la carpeta src al path para poder importar core/ e infra/
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from dataclasses import replace
+from core.catalog import CatalogImportService
+from core.events import CROSSED_LOW, CROSSED_RESTOCKED, DROP_OLDEST, StockEventBus
+from core.models import Cart, CartItem, Product
+from core.services import InventoryService, SaleService
+from infra.event_repositories import StockEventProductRepository
+from infra.memory_repositories import InMemoryProductRepository, InMemorySaleRepository
+
+
+def _build(bus: StockEventBus):
+    repo = StockEventProductRepository(InMemoryProductRepository(), bus)
+    repo.save_many([
+        Product(code="T001", name="Tornillos", price=0.5, stock=100, location="Tornillería"),
+        Product(code="H001", name="Martillo", price=12.0, stock=7, location="Herramientas"),
+    ])
+    return repo
+
+
+def test_sales_and_saves_publish_stock_changes_with_threshold_crossings():
+    bus = StockEventBus(low_stock_threshold=5, threshold_for={"T001": 50}.get, clock=lambda: 123.0)
+    repo = _build(bus)
+    inventory = InventoryService(repo, events=bus)
+    sales = SaleService(repo, InMemorySaleRepository(), inventory)
+
+    with bus.subscribe() as subscription:
+        inventory.discount_stock(CartItem("H001", 1))
+        cart = Cart()
+        cart.add_item("H001", 2)
+        cart.add_item("T001", 60)
+        sales.confirm_sale(cart)
+        # Reposición fuera del servicio: la publica el repositorio.
+        repo.save(replace(repo.find_by_code("H001"), stock=20))
+        repo.save(replace(repo.find_by_code("H001"), name="Martillo 16oz"))  # sin cambio de stock
+
+        events = subscription.poll()
+        assert [(e.code, e.old_stock, e.new_stock, e.crossed) for e in events] == [
+            ("H001", 7, 6, None),
+            ("H001", 6, 4, CROSSED_LOW),
+            ("T001", 100, 40, CROSSED_LOW),
+            ("H001", 4, 20, CROSSED_RESTOCKED),
+        ]
+        assert [e.sequence for e in events] == [1, 2, 3, 4]
+        assert events[2].threshold == 50 and events[2].is_low
+        assert events[0].timestamp == 123.0
+        assert subscription.poll() == []
+
+
+def test_background_consumer_keeps_a_low_stock_view_incrementally():
+    bus = StockEventBus(low_stock_threshold=10)
+    repo = _build(bus)
+    inventory = InventoryService(repo, events=bus)
+    low = set()
+
+    def on_batch(events):
+        for event in events:
+            if event.is_low:
+                low.add(event.code)
+            else:
+                low.discard(event.code)
+
+    with bus.start_consumer(on_batch, max_batch=4):
+        threads = [
+            threading.Thread(target=inventory.discount_stock, args=(CartItem("T001", 9),))
+            for _ in range(10)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        inventory.discount_stock(CartItem("H001", 7))
+        inventory.release_stock({"H001": 30})
+
+    assert repo.find_by_code("T001").stock == 10
+    assert low == {"T001"}
+
+
+def test_slow_consumers_apply_back_pressure_or_lose_the_oldest_events():
+    bus = StockEventBus()
+    repo = _build(bus)
+    inventory = InventoryService(repo, events=bus)
+    blocking = bus.subscribe(capacity=2, block_timeout=5.0)
+    lossy = bus.subscribe(capacity=2, overflow=DROP_OLDEST)
+
+    # Tercer descuento: la cola bloqueante está llena y la venta espera
+    # hasta que el consumidor lee.
+    inventory.discount_stock(CartItem("T001", 1))
+    inventory.discount_stock(CartItem("T001", 1))
+    third = threading.Thread(target=inventory.discount_stock, args=(CartItem("T001", 1),))
+    third.start()
+    third.join(0.2)
+    assert third.is_alive()
+    assert [e.new_stock for e in blocking.poll(max_events=1)] == [99]
+    third.join(5)
+    assert not third.is_alive()
+    assert [e.new_stock for e in blocking.poll()] == [98, 97]
+    assert blocking.dropped == 0
+
+    events = lossy.poll()
+    assert [e.sequence for e in events] == [2, 3]
+    assert lossy.dropped == 1
+
+    blocking.close()
+    lossy.close()
+    assert not bus.has_subscribers
+    inventory.discount_stock(CartItem("T001", 1))
+    assert blocking.poll() == []
+
+
+def test_a_stalled_consumer_delays_each_publish_once_and_not_other_publishers():
+    bus = StockEventBus()
+    stalled = bus.subscribe(capacity=1, block_timeout=0.3)
+    changes = [(f"P{n:03}", 10, 9) for n in range(5)]
+
+    started = time.perf_counter()
+    publishers = [threading.Thread(target=bus.publish, args=(changes,)) for _ in range(2)]
+    for publisher in publishers:
+        publisher.start()
+    for publisher in publishers:
+        publisher.join()
+    elapsed = time.perf_counter() - started
+
+    # Una espera de 0.3 s por publicación, en paralelo: no 0.3 s por evento
+    # ni una publicación detrás de la otra.
+    assert 0.3 <= elapsed < 0.55
+    assert len(stalled) == 1 and stalled.dropped == 9
+    assert stalled.poll()[0].sequence == 10
+
+
+def test_catalog_import_publishes_restocks_and_new_products():
+    bus = StockEventBus(low_stock_threshold=5)
+    repo = _build(bus)
+    inventory = InventoryService(repo, events=bus)
+    inventory.discount_stock(CartItem("H001", 4))  # 7 -> 3, antes de suscribirse
+
+    with bus.subscribe() as subscription:
+        report = CatalogImportService(repo, events=bus).import_rows([
+            (2, {"code": "H001", "name": "Martillo", "price": "12.0", "stock": "40", "location": "Herramientas"}),
+            (3, {"code": "C001", "name": "Clavos", "price": "0.2", "stock": "2", "location": "Tornillería"}),
+        ])
+        assert (report.created, report.updated) == (1, 1)
+        events = {e.code: e for e in subscription.poll()}
+
+    assert (events["H001"].old_stock, events["H001"].new_stock, events["H001"].crossed) == (3, 40, CROSSED_RESTOCKED)
+    assert (events["C001"].old_stock, events["C001"].new_stock, events["C001"].is_low) == (0, 2, True)
@@ -0,0 +1,109 @@
+import os
+import sys
+import time
+
+import pytest
+
+# Añadir la carpeta src al path para poder importar core/ e infra/
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from core.models import Cart, Product
+from core.services import InventoryService, SaleService
+from infra.memory_repositories import InMemoryProductRepository, InMemorySaleRepository
+from infra.write_behind_repositories import WriteBehindProductRepository
+
+
+class _FlakyProductRepository(InMemoryProductRepository):
+    """
+    Cuenta las escrituras por lotes y puede fallar a pedido.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.fail = False
+        self.batches = []
+
+    def save_many(self, products):
+        products = list(products)
+        if self.fail:
+            raise OSError("disco no disponible")
+        self.batches.append([p.code for p in products])
+        super().save_many(products)
+
+
+def _product(code: str, stock: int = 100) -> Product:
+    return Product(code=code, name="Tornillo", price=1.0, stock=stock, location="A1")
+
+
+def test_repeated_sales_of_same_sku_are_coalesced_into_one_write():
+    """
+    Muchas ventas del mismo SKU se ven al instante y llegan al
+    repositorio interno en una sola escritura.
+    """
+    inner = _FlakyProductRepository()
+    inner.save_many([_product("H001"), _product("T001")])
+    inner.batches.clear()
+    repo = WriteBehindProductRepository(inner, flush_interval=60.0)
+    sale_service = SaleService(repo, InMemorySaleRepository(), InventoryService(repo))
+
+    for _ in range(10):
+        cart = Cart()
+        cart.add_item("H001", 2)
+        cart.add_item("T001", 1)
+        sale_service.confirm_sale(cart)
+
+    assert repo.find_by_code("H001").stock == 80
+    assert inner.find_by_code("H001").stock == 100
+    repo.flush()
+    assert sorted(inner.batches[0]) == ["H001", "T001"] and len(inner.batches) == 1
+    assert inner.find_by_code("H001") == repo.find_by_code("H001")
+    assert inner.find_by_code("H001").version == 10
+
+    stats = repo.stats()
+    assert (stats.writes, stats.flushed_products, stats.pending) == (20, 2, 0)
+    repo.close()
+
+
+def test_failed_flush_keeps_changes_pending_until_it_succeeds():
+    inner = _FlakyProductRepository()
+    repo = WriteBehindProductRepository(inner, flush_interval=60.0, max_batch=2, max_pending=2)
+    repo.save(_product("A", stock=5))
+
+    inner.fail = True
+    with pytest.raises(OSError):
+        repo.flush()
+    assert repo.stats().pending == 1
+    assert isinstance(repo.stats().last_error, OSError)
+    assert repo.find_by_code("A").stock == 5
+
+    # Lleno el límite: la escritura nueva necesita una descarga y falla sin aplicarse.
+    repo.save(_product("B"))
+    with pytest.raises(OSError):
+        repo.save(_product("C"))
+    assert repo.find_by_code("C") is None
+
+    inner.fail = False
+    repo.close()
+    assert [p.code for p in inner.list_all()] == ["A", "B"]
+    assert repo.stats().last_error is None
+
+
+def test_background_flush_on_size_trigger_and_version_conflicts():
+    inner = _FlakyProductRepository()
+    repo = WriteBehindProductRepository(inner, flush_interval=60.0, max_batch=2)
+    repo.save_many([_product("A"), _product("B")])
+    # Lote lleno: el hilo descarga sin esperar el intervalo.
+    deadline = time.monotonic() + 5.0
+    while repo.stats().pending and time.monotonic() < deadline:
+        time.sleep(0.001)
+    assert inner.batches == [["A", "B"]]
+
+    assert repo.compare_and_save_many([_product("A", stock=1)]) == []
+    # La versión en memoria ya avanzó: una copia vieja es un conflicto.
+    assert repo.compare_and_save_many([_product("A", stock=2)]) == ["A"]
+    assert repo.compare_and_save_many([_product("X")]) == ["X"]
+
+    repo.close()
+    assert inner.find_by_code("A") == Product("A", "Tornillo", 1.0, 1, "A1", version=1)
+    with pytest.raises(RuntimeError):
+        repo.save(_product("C"))